@@ -28,6 +28,26 @@ def main():
     report_parser = subparsers.add_parser('report', help='Generate security report')
     report_parser.add_argument('-d', '--days', type=int, default=7, help='Report period in days')
     
+    index_parser = subparsers.add_parser('index', help='Index file metadata for search')
+    index_parser.add_argument('paths', nargs='+', help='Files or folders to index')
+    index_parser.add_argument('-j', '--jobs', type=int, default=0, help='Worker processes (default: CPU count)')
+    index_parser.add_argument('--db', help='Inventory database')
+    
+    search_parser = subparsers.add_parser('search', help='Search the metadata inventory')
+    search_parser.add_argument('query', help='Words to find in field names or values')
+    search_parser.add_argument('-n', '--limit', type=int, default=50, help='Maximum results')
+    search_parser.add_argument('--min-risk', type=int, default=0, help='Minimum file risk score')
+    search_parser.add_argument('--db', help='Inventory database')
+    
+    audit_parser = subparsers.add_parser('audit', help='Quickly find files that carry metadata')
+    audit_parser.add_argument('paths', nargs='+', help='Files or folders to audit')
+    audit_parser.add_argument('--csv', help='Write one row per file to this CSV')
+    audit_parser.add_argument('-j', '--jobs', type=int, default=0, help='Directory scanning threads')
+    
+    audio_parser = subparsers.add_parser('audio', help='Look for covert channels in WAV/FLAC audio')
+    audio_parser.add_argument('paths', nargs='+', help='Audio files to analyse')
+    audio_parser.add_argument('--json', action='store_true', help='Print one JSON object per file')
+    
     args = parser.parse_args()
     
     if args.command == 'gui':
@@ -35,6 +55,33 @@ def main():
         app = MainWindow()
         app.run()
     
+    elif args.command == 'audit':
+        from src.cli.commands import CLI
+        cli_args = ['audit'] + args.paths + ['--jobs', str(args.jobs)]
+        if args.csv:
+            cli_args.extend(['--csv', args.csv])
+        CLI().run(cli_args)
+    
+    elif args.command == 'audio':
+        from src.cli.commands import CLI
+        cli_args = ['audio'] + args.paths
+        if args.json:
+            cli_args.append('--json')
+        CLI().run(cli_args)
+    
+    elif args.command in ['index', 'search']:
+        from src.cli.commands import CLI
+        cli = CLI()
+        
+        if args.command == 'index':
+            cli_args = ['index'] + args.paths + ['--jobs', str(args.jobs)]
+        else:
+            cli_args = ['search', args.query, '--limit', str(args.limit), '--min-risk', str(args.min_risk)]
+        if args.db:
+            cli_args.extend(['--db', args.db])
+        
+        cli.run(cli_args)
+    
     elif args.command in ['scrub', 'watch', 'status', 'report']:
         from src.cli.commands import CLI
         cli = CLI()
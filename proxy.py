@@ -1,5 +1,5 @@
 # proxy.py - Main HTTP server (minimal changes)
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 import json
 import os
 import shutil
@@ -7,9 +7,9 @@ from pathlib import Path
 from datetime import datetime
 from urllib.parse import parse_qs, urlparse
 import cgi
-import sys
 import io
-from contextlib import redirect_stdout
+import sys
+import threading
 
 # Import watcher functionality
 from watcher import (
@@ -18,8 +18,14 @@ from watcher import (
     get_watcher_logs, watch_folder, clean_folder
 )
 
-from universal_scrubber import detect_and_scrub
-from metadata_analyzer import show_comprehensive_metadata
+from metadata_analyzer import analyze, analyze_bytes
+from src.core.service import get_scrub_service
+from src.core.verifier import verify_scrubbed
+from src.core.metadata_diff import MetadataDiff
+from src.core.analysis_cache import AnalysisCache
+from src.core.inventory import MetadataInventory
+from src.core.steganalysis import StegDetected
+from src.utils.config import Config
 
 # Add the current directory to path to ensure imports work
 sys.path.append('.')
@@ -27,6 +33,16 @@ sys.path.append('.')
 # Global logs storage (for non-watcher logs)
 logs = []
 
+# Reports for downloads/ and clean/ files, reused until a file changes
+analysis_cache = AnalysisCache.from_config(Config())
+
+# Metadata inventory built by the 'index' command, opened on first search
+inventory = None
+
+# Uploads up to this size are scrubbed entirely in memory; larger ones are
+# scrubbed from the saved upload straight into downloads/
+IN_MEMORY_UPLOAD_LIMIT = 16 * 1024 * 1024
+
 def add_log(message, level="INFO"):
     """Add log entry with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -34,17 +50,32 @@ def add_log(message, level="INFO"):
     logs.append(log_entry)
     print(f"PROXY: {log_entry}")
 
-def get_file_metadata(file_path: Path):
-    """Extract metadata from file and return as formatted string"""
+def warm_analysis_cache(file_path):
+    """Analyse a file into analysis_cache; runs off the request thread"""
+    try:
+        analysis_cache.get_or_analyze(file_path)
+    except Exception as e:
+        add_log(f"Metadata pre-analysis failed: {str(e)}", "WARNING")
+
+def get_file_report(source, name=None):
+    """Extract metadata as a structured report (None on failure).
+
+    source is a path, or the file's bytes together with its name.
+    """
     try:
-        # Capture the metadata output
-        f = io.StringIO()
-        with redirect_stdout(f):
-            show_comprehensive_metadata(file_path)
-        metadata_output = f.getvalue()
-        return metadata_output
+        if isinstance(source, bytes):
+            return analyze_bytes(source, name)
+        return analyze(source)
     except Exception as e:
-        return f"Error extracting metadata: {str(e)}"
+        add_log(f"Metadata extraction error: {str(e)}", "ERROR")
+        return None
+
+def get_inventory():
+    """Return the metadata inventory, opening it on first use"""
+    global inventory
+    if inventory is None:
+        inventory = MetadataInventory.from_config(Config())
+    return inventory
 
 def get_all_logs():
     """Combine proxy logs and watcher logs"""
@@ -69,6 +100,8 @@ class MetadataScrubberHandler(SimpleHTTPRequestHandler):
             self.send_download_file(parsed_path.path)
         elif parsed_path.path.startswith('/metadata/'):
             self.send_file_metadata(parsed_path.path)
+        elif parsed_path.path == '/search':
+            self.send_search_results(parsed_path.query)
         else:
             # Serve static files (HTML, CSS, JS)
             super().do_GET()
@@ -113,52 +146,86 @@ class MetadataScrubberHandler(SimpleHTTPRequestHandler):
                 self.send_error(400, "No file selected")
                 return
 
-            # Ensure uploads directory exists
-            uploads_dir = Path("uploads")
-            uploads_dir.mkdir(exist_ok=True)
             downloads_dir = Path("downloads")
             downloads_dir.mkdir(exist_ok=True)
 
-            # Save uploaded file
-            upload_path = uploads_dir / file_item.filename
-            with open(upload_path, 'wb') as f:
-                f.write(file_item.file.read())
+            upload_file = file_item.file
+            upload_file.seek(0, os.SEEK_END)
+            upload_size = upload_file.tell()
+            upload_file.seek(0)
+
+            # Small uploads are analysed and scrubbed from memory; only large
+            # ones are saved to uploads/ and processed from disk
+            upload_data = None
+            upload_path = None
+            if upload_size <= IN_MEMORY_UPLOAD_LIMIT:
+                upload_data = upload_file.read()
+            else:
+                uploads_dir = Path("uploads")
+                uploads_dir.mkdir(exist_ok=True)
+                upload_path = uploads_dir / file_item.filename
+                with open(upload_path, 'wb') as f:
+                    shutil.copyfileobj(upload_file, f)
 
             add_log(f"File uploaded: {file_item.filename}")
 
             # Get original metadata
-            original_metadata = get_file_metadata(upload_path)
+            if upload_data is not None:
+                original_report = get_file_report(upload_data, file_item.filename)
+            else:
+                original_report = get_file_report(upload_path)
             add_log(f"Original metadata extracted for: {file_item.filename}")
 
-            # Scrub the file
+            # Scrub the file on the shared, capacity-limited engine. Both
+            # paths raise on failure, StegDetected for a quarantined image
             try:
-                detect_and_scrub(upload_path)
-                add_log(f"File scrubbed successfully: {file_item.filename}")
-                
-                # Check if scrubbed file was created
                 scrubbed_filename = f"scrubbed_{file_item.filename}"
                 scrubbed_path = downloads_dir / scrubbed_filename
+                # An earlier upload's output must never be served for this one
+                scrubbed_path.unlink(missing_ok=True)
+                service = get_scrub_service()
                 
-                if scrubbed_path.exists():
-                    # Get scrubbed metadata
-                    scrubbed_metadata = get_file_metadata(scrubbed_path)
-                    add_log(f"Scrubbed metadata extracted for: {scrubbed_filename}")
-                    
-                    response = {
-                        "status": "success",
-                        "message": "File scrubbed successfully",
-                        "original_file": file_item.filename,
-                        "scrubbed_file": scrubbed_filename,
-                        "original_metadata": original_metadata,
-                        "scrubbed_metadata": scrubbed_metadata
-                    }
+                # The scrub reports the fields it removed; nothing is probed again here
+                if upload_data is not None:
+                    scrubbed, metadata_diff = service.submit_bytes(
+                        upload_data, file_item.filename, return_diff=True).result()
+                    scrubbed_path.write_bytes(scrubbed)
                 else:
-                    response = {
-                        "status": "error",
-                        "message": "Scrubbing completed but output file not found"
-                    }
-                    add_log(f"Output file not found: {scrubbed_path}", "ERROR")
+                    _, metadata_diff = service.submit(upload_path, scrubbed_path, strict=True,
+                                                      return_diff=True).result()
+                metadata_diff = metadata_diff or MetadataDiff(name=file_item.filename, checked=False)
+                add_log(f"File scrubbed successfully: {file_item.filename}")
+                
+                # Check for residual metadata; the full report stays
+                # available on demand from /metadata/<file>
+                verification = verify_scrubbed(scrubbed_path)
+                add_log(f"Scrubbed output verified for: {scrubbed_filename} "
+                        f"({'pass' if verification.passed else 'fail'})")
+                
+                if metadata_diff.checked:
+                    add_log(f"Metadata removed from {file_item.filename}: "
+                            f"{', '.join(metadata_diff.removed_fields()) or 'none'}")
+                
+                response = {
+                    "status": "success",
+                    "message": "File scrubbed successfully",
+                    "original_file": file_item.filename,
+                    "scrubbed_file": scrubbed_filename,
+                    "original_metadata": original_report.render_text() if original_report else "Error extracting metadata",
+                    "original_report": original_report.to_dict() if original_report else None,
+                    "scrubbed_metadata": verification.render_text(),
+                    "verification": verification.to_dict(),
+                    "metadata_diff": metadata_diff.to_dict()
+                }
                     
+            except StegDetected as e:
+                add_log(str(e), "WARNING")
+                response = {
+                    "status": "quarantined",
+                    "message": f"Possible hidden data: {e.result.summary()}",
+                    "original_file": file_item.filename,
+                    "steganalysis": e.result.to_dict()
+                }
             except Exception as e:
                 add_log(f"Scrubbing failed: {str(e)}", "ERROR")
                 response = {
@@ -168,6 +235,11 @@ class MetadataScrubberHandler(SimpleHTTPRequestHandler):
 
             self.send_json_response(response)
 
+            # Warm the analysis cache in the background, so the UI's follow-up
+            # /metadata/<scrubbed file> request is served from memory
+            if response["status"] == "success":
+                threading.Thread(target=warm_analysis_cache, args=(scrubbed_path,), daemon=True).start()
+
         except Exception as e:
             add_log(f"Upload handling error: {str(e)}", "ERROR")
             self.send_error(500, f"Server error: {str(e)}")
@@ -211,11 +283,35 @@ class MetadataScrubberHandler(SimpleHTTPRequestHandler):
 
     def send_json_response(self, data):
         """Send JSON response"""
+        body = json.dumps(data).encode()
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
+
+    def send_search_results(self, query_string):
+        """Search the metadata inventory: /search?q=<words>&limit=<n>&min_risk=<score>"""
+        params = parse_qs(query_string)
+        query = params.get('q', [''])[0]
+        if not query.strip():
+            self.send_error(400, "No search query provided")
+            return
+        try:
+            limit = min(int(params.get('limit', ['50'])[0]), 1000)
+            min_risk = int(params.get('min_risk', ['0'])[0])
+        except ValueError:
+            self.send_error(400, "limit and min_risk must be integers")
+            return
+        
+        try:
+            results = get_inventory().search(query, limit, min_risk)
+        except Exception as e:
+            add_log(f"Inventory search failed: {str(e)}", "ERROR")
+            self.send_error(500, f"Search failed: {str(e)}")
+            return
+        self.send_json_response({"query": query, "count": len(results), "results": results})
 
     def send_logs(self):
         """Send the logs as JSON"""
@@ -289,12 +385,12 @@ class MetadataScrubberHandler(SimpleHTTPRequestHandler):
             return
 
         try:
-            metadata = get_file_metadata(file_path)
-            self.send_json_response({"metadata": metadata})
-            
+            report = analysis_cache.get_or_analyze(file_path)
         except Exception as e:
             add_log(f"Metadata extraction error: {str(e)}", "ERROR")
             self.send_error(500, "Metadata extraction failed")
+            return
+        self.send_json_response({"metadata": report.render_text(), "report": report.to_dict()})
 
     def log_message(self, format, *args):
         """Override to use our logging system"""
@@ -309,7 +405,8 @@ def run_server(port=8000):
     clean_folder.mkdir(exist_ok=True)
     
     server_address = ('', port)
-    httpd = HTTPServer(server_address, MetadataScrubberHandler)
+    # Requests are served on their own threads; scrubbing is capped by the shared service
+    httpd = ThreadingHTTPServer(server_address, MetadataScrubberHandler)
     
     add_log(f"Starting metadata scrubber server on port {port}")
     add_log("Access the application at: http://localhost:8000")
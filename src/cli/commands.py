@@ -1,10 +1,16 @@
 import argparse
+import json
 from pathlib import Path
 import sys
 from typing import List
 
 from ..core.scrubber import UniversalScrubber
 from ..core.folder_watcher import FolderWatcher
+from ..core.service import get_scrub_service
+from ..core.inventory import MetadataInventory, DEFAULT_INVENTORY_PATH
+from ..core.audit import run_audit
+from ..core.audio_analyzer import AudioAnalyzer
+from ..utils.config import Config
 from ..utils.logger import SecureLogger
 
 class CLI:
@@ -19,6 +25,7 @@ class CLI:
         )
         
         subparsers = parser.add_subparsers(dest='command', help='Available commands')
+        inventory_db = Config().get("inventory_db") or DEFAULT_INVENTORY_PATH
         
         # Scrub command
         scrub_parser = subparsers.add_parser('scrub', help='Scrub files or folders')
@@ -40,6 +47,34 @@ class CLI:
         report_parser.add_argument('-d', '--days', type=int, default=7, 
                                  help='Report period in days')
         
+        # Index command
+        index_parser = subparsers.add_parser('index', help='Index file metadata for search')
+        index_parser.add_argument('paths', nargs='+', help='Files or folders to index')
+        index_parser.add_argument('-j', '--jobs', type=int, default=0,
+                                help='Worker processes (default: CPU count)')
+        index_parser.add_argument('--db', default=inventory_db,
+                                help='Inventory database (default: inventory_db setting, %(default)s)')
+        
+        # Search command
+        search_parser = subparsers.add_parser('search', help='Search the metadata inventory')
+        search_parser.add_argument('query', help='Words to find in field names or values')
+        search_parser.add_argument('-n', '--limit', type=int, default=50, help='Maximum results')
+        search_parser.add_argument('--min-risk', type=int, default=0, help='Minimum file risk score')
+        search_parser.add_argument('--db', default=inventory_db,
+                                 help='Inventory database (default: inventory_db setting, %(default)s)')
+        
+        # Audit command
+        audit_parser = subparsers.add_parser('audit', help='Quickly find files that carry metadata')
+        audit_parser.add_argument('paths', nargs='+', help='Files or folders to audit')
+        audit_parser.add_argument('--csv', help='Write one row per file to this CSV')
+        audit_parser.add_argument('-j', '--jobs', type=int, default=0,
+                                help='Directory scanning threads (default: 4 per CPU, max 32)')
+        
+        # Audio command
+        audio_parser = subparsers.add_parser('audio', help='Look for covert channels in WAV/FLAC audio')
+        audio_parser.add_argument('paths', nargs='+', help='Audio files to analyse')
+        audio_parser.add_argument('--json', action='store_true', help='Print one JSON object per file')
+        
         return parser
     
     def handle_scrub(self, args):
@@ -60,7 +95,7 @@ class CLI:
         
         if path.is_file():
             print(f"Scrubbing file: {path.name}")
-            success = self.scrubber.scrub_file(path, Path(args.output) if args.output else None)
+            success = get_scrub_service().submit(path, Path(args.output) if args.output else None).result()
             if success:
                 print(f"✓ Successfully scrubbed: {path.name}")
             else:
@@ -68,7 +103,7 @@ class CLI:
         
         elif path.is_dir():
             print(f"Scrubbing folder: {path}")
-            results = self.scrubber.scrub_folder(path, Path(args.output) if args.output else None)
+            results = get_scrub_service().scrub_folder(path, Path(args.output) if args.output else None)
             self.print_folder_results(results)
     
     def handle_watch(self, args):
@@ -132,6 +167,57 @@ class CLI:
         if report['failed'] > 0:
             print(f"\n⚠  {report['failed']} operations failed. Check logs for details.")
     
+    def handle_index(self, args):
+        """Handle index command"""
+        inventory = MetadataInventory(args.db)
+        print(f"Indexing metadata into {args.db}...")
+        stats = inventory.index(args.paths, jobs=args.jobs or None)
+        print(f"  Indexed: {stats['indexed']}")
+        print(f"  Unchanged: {stats['unchanged']}")
+        print(f"  Failed: {stats['failed']}")
+        print(f"  Removed: {stats['removed']}")
+    
+    def handle_search(self, args):
+        """Handle search command"""
+        if not Path(args.db).exists():
+            print(f"Error: Inventory not found: {args.db} (run 'index' first)")
+            return
+        
+        results = MetadataInventory(args.db).search(args.query, args.limit, args.min_risk)
+        if not results:
+            print(f"No files match: {args.query}")
+            return
+        
+        for result in results:
+            print(f"[risk {result['risk_score']:3}] {result['path']}")
+            print(f"    {result['field']}: {result['value'][:100]}")
+        print(f"\n{len(results)} match(es)")
+    
+    def handle_audit(self, args):
+        """Handle audit command"""
+        missing = [path for path in args.paths if not Path(path).exists()]
+        if missing:
+            print(f"Error: Path not found: {', '.join(missing)}")
+            return
+        
+        summary = run_audit(args.paths, args.csv, args.jobs or None)
+        print("Comms Shield - Metadata Audit")
+        print("=" * 50)
+        print(summary.render_table())
+        if args.csv:
+            print(f"\nPer-file results written to {args.csv}")
+    
+    def handle_audio(self, args):
+        """Handle audio command"""
+        analyzer = AudioAnalyzer()
+        flagged = 0
+        for path in args.paths:
+            report = analyzer.analyze(path)
+            flagged += report.flagged
+            print(json.dumps(report.to_dict()) if args.json else report.render_text())
+        if not args.json:
+            print(f"\n{flagged} of {len(args.paths)} file(s) show a covert-channel signature")
+    
     def print_folder_results(self, results):
         """Print folder scrubbing results"""
         print(f"\nScrubbing Results:")
@@ -163,5 +249,13 @@ class CLI:
             self.handle_status(parsed_args)
         elif parsed_args.command == 'report':
             self.handle_report(parsed_args)
+        elif parsed_args.command == 'index':
+            self.handle_index(parsed_args)
+        elif parsed_args.command == 'search':
+            self.handle_search(parsed_args)
+        elif parsed_args.command == 'audit':
+            self.handle_audit(parsed_args)
+        elif parsed_args.command == 'audio':
+            self.handle_audio(parsed_args)
         else:
             self.parser.print_help()
\ No newline at end of file
@@ -3,10 +3,26 @@ Core functionality for Comms Shield
 Metadata scrubbing, analysis, and folder monitoring
 """
 
-from .scrubber import UniversalScrubber
+from .scrubber import UniversalScrubber, ScrubFailed
+from .archive_scrubber import ArchiveScrubber
+from .email_scrubber import EmailScrubber
+from .result_cache import ScrubCache
+from .processed_index import ProcessedIndex
+from .analysis_cache import AnalysisCache
+from .isolation import IsolatedExecutor, WorkerError, JobTimeout, WorkerCrashed
+from .probes import probe
+from .verifier import verify_scrubbed, VerificationResult
+from .metadata_diff import MetadataDiff, diff_fields, diff_reports
+from .sensitivity import SensitivityEngine, SensitivityReport, score_fields
+from .inventory import MetadataInventory
+from .audit import run_audit, audit_file, AuditSummary
+from .preflight import preflight, PreflightBudget, PreflightReport, PreflightRejected
+from .steganalysis import StegStage, StegResult, StegDetected
+from .audio_analyzer import AudioAnalyzer, AudioReport, analyze_audio
+from .service import ScrubService, ServiceBusy, get_scrub_service, set_scrub_service
 
 # Import metadata functions instead of class
-from .metadata_analyzer import show_comprehensive_metadata
+from .metadata_analyzer import show_comprehensive_metadata, analyze, analyze_bytes, MetadataReport
 
 # Conditional imports for folder watcher
 try:
@@ -26,7 +42,47 @@ except ImportError as e:
 
 __all__ = [
     'UniversalScrubber', 
+    'ScrubFailed',
+    'ArchiveScrubber',
+    'EmailScrubber',
+    'ScrubCache',
+    'ProcessedIndex',
+    'AnalysisCache',
+    'IsolatedExecutor',
+    'WorkerError',
+    'JobTimeout',
+    'WorkerCrashed',
+    'probe',
+    'verify_scrubbed',
+    'VerificationResult',
+    'MetadataDiff',
+    'diff_fields',
+    'diff_reports',
+    'SensitivityEngine',
+    'SensitivityReport',
+    'score_fields',
+    'MetadataInventory',
+    'run_audit',
+    'audit_file',
+    'AuditSummary',
+    'preflight',
+    'PreflightBudget',
+    'PreflightReport',
+    'PreflightRejected',
+    'StegStage',
+    'StegResult',
+    'StegDetected',
+    'AudioAnalyzer',
+    'AudioReport',
+    'analyze_audio',
+    'ScrubService',
+    'ServiceBusy',
+    'get_scrub_service',
+    'set_scrub_service',
     'show_comprehensive_metadata',
+    'analyze',
+    'analyze_bytes',
+    'MetadataReport',
     'FolderWatcher', 
     'AutoScrubFolderHandler',
     'FOLDER_WATCHER_AVAILABLE'
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .metadata_analyzer import DEFAULT_DEPTH, MetadataReport, analyze
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# The optional SQLite store keeps this many times the in-memory entry count
+DB_ENTRY_FACTOR = 10
+
+
+class AnalysisCache:
+    """LRU of metadata reports keyed on (path, size, mtime_ns).
+
+    A changed file gets a new key, so stale reports are never served. The
+    in-memory LRU is bounded by entry count and by the JSON size of the
+    reports it holds. With db_path set, reports are also written through to
+    SQLite so they survive restarts.
+
+    Concurrent requests for the same uncached file run the analyzer once;
+    the others wait for its result. Every report is produced at one analysis
+    depth.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 db_path=None, depth: str = DEFAULT_DEPTH):
+        self.depth = depth
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.db_path = Path(db_path) if db_path else None
+        self._entries: "OrderedDict[Tuple, Tuple[MetadataReport, int]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[Tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.init_database()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a cache from the analysis_cache_* settings of a Config"""
+        return cls(
+            max_entries=config.get("analysis_cache_entries", DEFAULT_MAX_ENTRIES),
+            max_bytes=int(config.get("analysis_cache_max_mb", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+            db_path=config.get("analysis_cache_db") or None,
+            depth=config.get("analysis_depth", DEFAULT_DEPTH)
+        )
+
+    def init_database(self):
+        """Initialize the SQLite report store"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_reports (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                report TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reports_access ON analysis_reports(last_access)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def key(file_path, stat_result=None) -> Tuple[str, int, int]:
+        stat_result = stat_result or os.stat(file_path)
+        return os.path.abspath(file_path), stat_result.st_size, stat_result.st_mtime_ns
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def get(self, file_path, stat_result=None) -> Optional[MetadataReport]:
+        """Return the cached report for the file's current version, or None"""
+        key = self.key(file_path, stat_result)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        report = self._db_get(key)
+        if report is not None:
+            self._remember(key, report)
+            with self._lock:
+                self.hits += 1
+        return report
+
+    def get_or_analyze(self, file_path) -> MetadataReport:
+        """Return the cached report, running the analyzer on a miss"""
+        file_path = Path(file_path)
+        while True:
+            stat_result = os.stat(file_path)
+            report = self.get(file_path, stat_result)
+            if report is not None:
+                return report
+
+            key = self.key(file_path, stat_result)
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+
+            if not owner:
+                # Another thread is analysing this version; use its result
+                event.wait()
+                continue
+
+            try:
+                with self._lock:
+                    self.misses += 1
+                report = analyze(file_path, self.depth)
+                self.put(file_path, report, stat_result)
+                return report
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    # ------------------------------------------------------------------
+    # Store
+    # ------------------------------------------------------------------
+    def put(self, file_path, report: MetadataReport, stat_result=None):
+        """Cache a report for the file's current version"""
+        key = self.key(file_path, stat_result)
+        payload = json.dumps(report.to_dict())
+        self._remember(key, report, len(payload))
+        self._db_put(key, payload)
+
+    def _remember(self, key: Tuple, report: MetadataReport, size: Optional[int] = None):
+        if size is None:
+            size = len(json.dumps(report.to_dict()))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # Drop reports for older versions of the same path
+            for old_key in [k for k in self._entries if k[0] == key[0]]:
+                self._bytes -= self._entries.pop(old_key)[1]
+            self._entries[key] = (report, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, file_path):
+        """Forget every cached version of a file"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for old_key in [k for k in self._entries if k[0] == path]:
+                self._bytes -= self._entries.pop(old_key)[1]
+        if self.db_path:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('DELETE FROM analysis_reports WHERE path = ?', (path,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def clear(self):
+        """Remove every cached report"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.db_path:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('DELETE FROM analysis_reports')
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get_stats(self) -> Dict:
+        """Get entry counts, memory use and hit rate"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'persistent': self.db_path is not None,
+                'depth': self.depth
+            }
+
+    # ------------------------------------------------------------------
+    # SQLite store
+    # ------------------------------------------------------------------
+    def _db_get(self, key: Tuple) -> Optional[MetadataReport]:
+        if not self.db_path:
+            return None
+        path, size, mtime_ns = key
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('''
+                SELECT report FROM analysis_reports WHERE path = ? AND size = ? AND mtime_ns = ?
+            ''', (path, size, mtime_ns)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE analysis_reports SET last_access = ? WHERE path = ?', (time.time(), path))
+            conn.commit()
+        finally:
+            conn.close()
+        try:
+            report = MetadataReport.from_dict(json.loads(row[0]))
+        except (ValueError, KeyError, TypeError):
+            return None
+        # The store may hold a report made at another depth
+        return report if report.depth == self.depth else None
+
+    def _db_put(self, key: Tuple, payload: str):
+        if not self.db_path:
+            return
+        path, size, mtime_ns = key
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO analysis_reports (path, size, mtime_ns, report, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (path, size, mtime_ns, payload, time.time()))
+            conn.execute('''
+                DELETE FROM analysis_reports WHERE path IN (
+                    SELECT path FROM analysis_reports ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries * DB_ENTRY_FACTOR,))
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,328 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+try:
+    import py7zr
+    PY7ZR_AVAILABLE = True
+except ImportError:
+    PY7ZR_AVAILABLE = False
+
+# Compound suffixes first, so 'a.tar.gz' is not mistaken for a bare '.gz'
+ARCHIVE_SUFFIXES = (
+    '.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tbz2', '.txz', '.tar', '.zip', '.7z'
+)
+
+ZIP_MAGIC = (b'PK\x03\x04', b'PK\x05\x06')
+SEVEN_ZIP_MAGIC = b"7z\xbc\xaf'\x1c"
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+TAR_MAGIC_OFFSET = 257
+
+# Earliest timestamp a zip entry can carry
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Members are buffered in memory up to this size before spilling to disk
+MEMBER_SPOOL_BYTES = 16 * 1024 * 1024
+
+DEFAULT_MAX_DEPTH = 3
+
+
+def archive_suffix(name: str) -> Optional[str]:
+    """Return the archive suffix of a filename or bare suffix, or None"""
+    name = (name or '').lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return suffix
+    return None
+
+
+def sniff_archive(stream: BinaryIO) -> Optional[str]:
+    """Identify a seekable archive from its magic bytes without moving the stream"""
+    start = stream.tell()
+    head = stream.read(TAR_MAGIC_OFFSET + 8)
+    stream.seek(start)
+
+    if head.startswith(ZIP_MAGIC):
+        return 'zip'
+    if head.startswith(SEVEN_ZIP_MAGIC):
+        return '7z'
+    if head.startswith(GZIP_MAGIC):
+        return 'gz'
+    if head.startswith(BZIP2_MAGIC):
+        return 'bz2'
+    if head.startswith(XZ_MAGIC):
+        return 'xz'
+    if head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + 5] == b'ustar':
+        return 'tar'
+    return None
+
+
+def _spool(src: BinaryIO) -> BinaryIO:
+    spool = tempfile.SpooledTemporaryFile(max_size=MEMBER_SPOOL_BYTES)
+    shutil.copyfileobj(src, spool)
+    spool.seek(0)
+    return spool
+
+
+def _spool_size(spool: BinaryIO) -> int:
+    spool.seek(0, os.SEEK_END)
+    size = spool.tell()
+    spool.seek(0)
+    return size
+
+
+class _TempFileFactory:
+    """py7zr writer factory keeping each extracted member in a temporary file.
+
+    py7zr calls close() on the writer once a member is complete, so the
+    writer itself is a thin wrapper that leaves the file open for reading.
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def create(self, filename: str):
+        self.files[filename] = tempfile.TemporaryFile()
+        return _TempFileWriter(self.files[filename])
+
+
+class _TempFileWriter:
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    def write(self, data: bytes) -> int:
+        return self.file.write(data)
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        return self.file.read(-1 if size is None else size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def flush(self):
+        self.file.flush()
+
+    def size(self) -> int:
+        return os.fstat(self.file.fileno()).st_size
+
+    def close(self):
+        pass
+
+
+class ArchiveScrubber:
+    """Scrubs zip, tar (plain, gzip, bzip2, xz) and 7z archives member by member.
+
+    Each member is read into a spool, handed to the owning UniversalScrubber's
+    stream handler for its type and written straight to the output archive;
+    nothing is extracted to disk. Nested archives are rewritten the same way
+    up to max_depth levels.
+
+    Any failure (a member that cannot be scrubbed, deeper nesting, or
+    expanding past max_total_bytes) fails the whole archive: no member is
+    ever passed through unscrubbed.
+
+    Archive-level metadata is normalised: zip entries get the 1980 epoch and
+    no extra fields or comments, tar entries get mtime 0, uid/gid 0 and no
+    user/group names, and gzip headers carry no name or timestamp.
+
+    Members of the outermost archive are scrubbed on max_workers threads; at
+    most twice that many are in flight, and they are written back in their
+    original order so the output is deterministic.
+    """
+
+    def __init__(self, scrubber, max_depth: int = DEFAULT_MAX_DEPTH,
+                 max_workers: Optional[int] = None, max_total_bytes: Optional[int] = None):
+        self.scrubber = scrubber
+        self.max_depth = max_depth
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        # Declared uncompressed size allowed across all members, nested included
+        self.max_total_bytes = max_total_bytes or scrubber.budget.max_zip_uncompressed
+
+    @property
+    def logger(self):
+        return self.scrubber.logger
+
+    def scrub_stream(self, src: BinaryIO, dst: BinaryIO, depth: int = 0):
+        """Rewrite the archive in seekable src into dst"""
+        self._rewrite(src, dst, depth, [self.max_total_bytes])
+
+    def _rewrite(self, src: BinaryIO, dst: BinaryIO, depth: int, budget):
+        kind = sniff_archive(src)
+        if kind is None:
+            raise ValueError("Unrecognised archive format")
+        if kind == 'zip':
+            self._scrub_zip(src, dst, depth, budget)
+        elif kind == '7z':
+            self._scrub_7z(src, dst, depth, budget)
+        else:
+            self._scrub_tar(src, dst, kind, depth, budget)
+
+    # ------------------------------------------------------------------
+    # Members
+    # ------------------------------------------------------------------
+    def _charge(self, budget, size: int, name: str):
+        budget[0] -= size
+        if budget[0] < 0:
+            raise ValueError(f"Archive expands beyond {self.max_total_bytes:,} bytes at {name}")
+
+    def _scrub_member(self, name: str, data: BinaryIO, depth: int, budget) -> BinaryIO:
+        """Scrub one member spool, returning a rewound spool of the result"""
+        out = tempfile.SpooledTemporaryFile(max_size=MEMBER_SPOOL_BYTES)
+        try:
+            if archive_suffix(name) and sniff_archive(data):
+                if depth + 1 > self.max_depth:
+                    raise ValueError(f"Archive nesting deeper than {self.max_depth} levels at {name}")
+                self._rewrite(data, out, depth + 1, budget)
+                self.logger.info(f"Scrubbed nested archive: {name}")
+            else:
+                self.scrubber.scrub_stream(data, out, name, fail_closed=True)
+        except Exception as e:
+            out.close()
+            raise ValueError(f"Failed to scrub archive member {name}: {e}") from e
+        finally:
+            data.close()
+        out.seek(0)
+        return out
+
+    def _ordered(self, jobs: Iterable, depth: int, budget) -> Iterator:
+        """Scrub (entry, name, spool) jobs, yielding (entry, result) in input order.
+
+        Only the outermost archive fans out to threads, so nested archives
+        never wait on a pool their parent is occupying.
+        """
+        if depth > 0 or self.max_workers < 2:
+            for entry, name, data in jobs:
+                yield entry, (self._scrub_member(name, data, depth, budget) if data is not None else None)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="archive") as pool:
+            pending = deque()
+            for entry, name, data in jobs:
+                if len(pending) >= self.max_workers * 2:
+                    done_entry, future = pending.popleft()
+                    yield done_entry, future.result() if future is not None else None
+                future = None
+                if data is not None:
+                    future = pool.submit(self._scrub_member, name, data, depth, budget)
+                pending.append((entry, future))
+            while pending:
+                done_entry, future = pending.popleft()
+                yield done_entry, future.result() if future is not None else None
+
+    # ------------------------------------------------------------------
+    # Formats
+    # ------------------------------------------------------------------
+    def _scrub_zip(self, src: BinaryIO, dst: BinaryIO, depth: int, budget):
+        with zipfile.ZipFile(src, 'r') as zin, zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED) as zout:
+            def jobs():
+                for info in zin.infolist():
+                    if info.is_dir():
+                        yield info, info.filename, None
+                        continue
+                    self._charge(budget, info.file_size, info.filename)
+                    with zin.open(info) as member:
+                        yield info, info.filename, _spool(member)
+
+            for info, result in self._ordered(jobs(), depth, budget):
+                # A fresh ZipInfo drops timestamps, comments and extra fields
+                # (extended times, unix uid/gid) from the original entry
+                clean_info = zipfile.ZipInfo(info.filename, date_time=ZIP_EPOCH)
+                clean_info.external_attr = info.external_attr
+                if result is None:
+                    zout.writestr(clean_info, b'')
+                    continue
+                clean_info.compress_type = zipfile.ZIP_DEFLATED
+                with result:
+                    size = _spool_size(result)
+                    with zout.open(clean_info, 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as out:
+                        shutil.copyfileobj(result, out)
+
+    def _scrub_tar(self, src: BinaryIO, dst: BinaryIO, kind: str, depth: int, budget):
+        if kind == 'gz':
+            # GzipFile would otherwise record the current time and a filename
+            wrapper = gzip.GzipFile(filename='', mode='wb', fileobj=dst, mtime=0)
+        elif kind == 'bz2':
+            wrapper = bz2.BZ2File(dst, 'wb')
+        elif kind == 'xz':
+            wrapper = lzma.LZMAFile(dst, 'wb')
+        else:
+            wrapper = None
+
+        try:
+            with tarfile.open(fileobj=src, mode='r|*') as tin, \
+                    tarfile.open(fileobj=wrapper or dst, mode='w|', format=tarfile.PAX_FORMAT) as tout:
+                def jobs():
+                    for member in tin:
+                        if not member.isfile():
+                            yield member, member.name, None
+                            continue
+                        self._charge(budget, member.size, member.name)
+                        yield member, member.name, _spool(tin.extractfile(member))
+
+                for member, result in self._ordered(jobs(), depth, budget):
+                    # Rebuilding the header drops pax records (atime, xattrs) as well
+                    clean = tarfile.TarInfo(member.name)
+                    clean.type = member.type
+                    clean.mode = member.mode
+                    clean.linkname = member.linkname
+                    clean.devmajor = member.devmajor
+                    clean.devminor = member.devminor
+                    clean.mtime = 0
+                    clean.uid = clean.gid = 0
+                    clean.uname = clean.gname = ''
+                    if result is None:
+                        tout.addfile(clean)
+                        continue
+                    with result:
+                        clean.size = _spool_size(result)
+                        tout.addfile(clean, result)
+        finally:
+            if wrapper is not None:
+                wrapper.close()
+
+    def _scrub_7z(self, src: BinaryIO, dst: BinaryIO, depth: int, budget):
+        """7z has no streaming member API in py7zr, so members are extracted
+        up front, each into its own temporary file rather than memory"""
+        if not PY7ZR_AVAILABLE:
+            raise ValueError("py7zr not installed. Run: pip install py7zr")
+
+        factory = _TempFileFactory()
+        try:
+            with py7zr.SevenZipFile(src, 'r') as zin:
+                names = []
+                for info in zin.list():
+                    if not info.is_directory:
+                        self._charge(budget, info.uncompressed, info.filename)
+                        names.append(info.filename)
+                zin.extractall(factory=factory)
+
+            def jobs():
+                for name in sorted(names):
+                    # Empty members are never handed to the factory
+                    data = factory.files.pop(name, None) or tempfile.TemporaryFile()
+                    data.seek(0)
+                    yield name, name, data
+
+            with py7zr.SevenZipFile(dst, 'w') as zout:
+                for name, result in self._ordered(jobs(), depth, budget):
+                    with result:
+                        zout.writestr(result.read(), name)
+        finally:
+            for data in factory.files.values():
+                data.close()
+
+    def supported_suffixes(self) -> list:
+        suffixes = [s for s in ARCHIVE_SUFFIXES if s != '.7z']
+        if PY7ZR_AVAILABLE:
+            suffixes.append('.7z')
+        return suffixes
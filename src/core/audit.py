@@ -0,0 +1,475 @@
+import csv
+import os
+import re
+import struct
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, asdict
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Only this much of the start and end of a file is read, except where a
+# format is walked by seeking from header to header (PNG, RIFF, ZIP, TIFF)
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 8 * 1024
+
+# Bytes read to identify a file with an unknown suffix
+MAGIC_BYTES = 16
+
+# Header-to-header walks stop after this many chunks
+MAX_CHUNKS = 4096
+
+FORMAT_SUFFIXES = {
+    'jpeg': ('.jpg', '.jpeg'),
+    'png': ('.png',),
+    'tiff': ('.tif', '.tiff'),
+    'pdf': ('.pdf',),
+    'office': ('.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp'),
+    'mp3': ('.mp3',),
+    'flac': ('.flac',),
+    'mp4': ('.mp4', '.m4a', '.mov'),
+    'wav': ('.wav',),
+    'ogg': ('.ogg',),
+    'email': ('.eml',),
+}
+SUFFIX_FORMATS = {suffix: fmt for fmt, suffixes in FORMAT_SUFFIXES.items() for suffix in suffixes}
+
+MAGIC_FORMATS = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'%PDF', 'pdf'),
+    (b'ID3', 'mp3'),
+    (b'fLaC', 'flac'),
+    (b'OggS', 'ogg'),
+)
+
+# TIFF/EXIF IFD0 tags and the kind of metadata they reveal
+TIFF_TAG_KINDS = {
+    0x8825: 'gps',
+    0x013B: 'author',
+    0x8298: 'author',
+    0x010F: 'device',
+    0x0110: 'device',
+    0x0131: 'software',
+    0x0132: 'timestamp',
+}
+
+OFFICE_PARTS = {
+    'docProps/core.xml': 'document_properties',
+    'docProps/app.xml': 'application',
+    'docProps/custom.xml': 'custom_properties',
+    'meta.xml': 'document_properties',
+}
+
+PDF_INFO_REF_RE = re.compile(rb'/Info\s+(\d+)\s+0\s+R')
+
+PNG_CHUNK_KINDS = {b'tEXt': 'text', b'iTXt': 'text', b'zTXt': 'text', b'eXIf': 'exif', b'tIME': 'timestamp'}
+RIFF_CHUNK_KINDS = {b'LIST': 'info', b'bext': 'broadcast', b'id3 ': 'id3', b'ID3 ': 'id3', b'iXML': 'xml'}
+EMAIL_HEADER_KINDS = {b'received:': 'routing', b'x-originating-ip:': 'routing',
+                      b'x-mailer:': 'client', b'user-agent:': 'client'}
+
+
+@dataclass
+class AuditResult:
+    """Whether one file carries metadata, and of which kinds.
+
+    has_metadata is None when the format has no header check.
+    """
+    path: str
+    format: str
+    size: int
+    has_metadata: Optional[bool] = None
+    kinds: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class _Sample:
+    """The head and tail of an open file, plus the handle for seeking walks"""
+
+    def __init__(self, f: BinaryIO, size: int):
+        self.file = f
+        self.size = size
+        self.head = f.read(HEAD_BYTES)
+        if size > HEAD_BYTES:
+            f.seek(max(HEAD_BYTES, size - TAIL_BYTES))
+            self.tail = f.read()
+        else:
+            self.tail = b''
+
+
+def _tiff_order(data: bytes) -> Optional[str]:
+    """struct byte order of a TIFF header, or None if data is not one"""
+    if data[:4] == b'II*\x00':
+        return '<'
+    if data[:4] == b'MM\x00*':
+        return '>'
+    return None
+
+
+def _ifd_kinds(order: str, ifd: bytes) -> List[str]:
+    """Kinds revealed by an IFD, given from its entry count onwards"""
+    (count,) = struct.unpack(order + 'H', ifd[:2])
+    kinds = {'exif'} if count else set()
+    for index in range(count):
+        start = 2 + index * 12
+        if start + 2 > len(ifd):
+            break
+        (tag,) = struct.unpack(order + 'H', ifd[start:start + 2])
+        if tag in TIFF_TAG_KINDS:
+            kinds.add(TIFF_TAG_KINDS[tag])
+    return sorted(kinds)
+
+
+def _tiff_kinds(data: bytes) -> Optional[List[str]]:
+    """Kinds revealed by IFD0 of a TIFF structure; None if IFD0 is not in data"""
+    order = _tiff_order(data)
+    if order is None:
+        return None
+    (ifd_offset,) = struct.unpack(order + 'I', data[4:8])
+    if ifd_offset + 2 > len(data):
+        return None
+    return _ifd_kinds(order, data[ifd_offset:])
+
+
+def check_jpeg(sample: _Sample) -> List[str]:
+    kinds = set()
+    data = sample.head
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker in (0xDA, 0xD9):  # start of scan / end of image
+            break
+        (length,) = struct.unpack('>H', data[pos + 2:pos + 4])
+        payload = data[pos + 4:pos + 2 + length]
+        if marker == 0xE1 and payload.startswith(b'Exif\x00\x00'):
+            kinds.update(_tiff_kinds(payload[6:]) or ['exif'])
+        elif marker == 0xE1 and payload.startswith(b'http://ns.adobe.com/xap/'):
+            kinds.add('xmp')
+        elif marker == 0xED:
+            kinds.add('iptc')
+        elif marker == 0xFE:
+            kinds.add('comment')
+        pos += 2 + length
+    return sorted(kinds)
+
+
+def check_png(sample: _Sample) -> List[str]:
+    kinds = set()
+    f = sample.file
+    pos = 8
+    for _ in range(MAX_CHUNKS):
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in PNG_CHUNK_KINDS:
+            kinds.add(PNG_CHUNK_KINDS[chunk_type])
+        if chunk_type == b'IEND':
+            break
+        pos += 12 + length
+    return sorted(kinds)
+
+
+def check_tiff(sample: _Sample) -> Optional[List[str]]:
+    # Many writers put IFD0 after the image data, so seek to it rather than
+    # relying on the head. None (unchecked) when the header is not TIFF.
+    order = _tiff_order(sample.head)
+    if order is None or len(sample.head) < 8:
+        return None
+    (ifd_offset,) = struct.unpack(order + 'I', sample.head[4:8])
+    f = sample.file
+    f.seek(ifd_offset)
+    header = f.read(2)
+    if len(header) < 2:
+        return None
+    (count,) = struct.unpack(order + 'H', header)
+    return _ifd_kinds(order, header + f.read(count * 12))
+
+
+def _pdf_info_empty(sample: _Sample, data: bytes) -> bool:
+    """True when the /Info dictionary is visibly empty, as scrubbers leave it"""
+    match = PDF_INFO_REF_RE.search(data)
+    if not match:
+        return False
+    object_re = re.compile(rb'(?<!\d)' + match.group(1) + rb'\s+0\s+obj\s*<<\s*>>')
+    return any(object_re.search(chunk) for chunk in (sample.head, sample.tail))
+
+
+def check_pdf(sample: _Sample) -> List[str]:
+    # The trailer (and /Info) is at the end, or in the head for linearized files
+    kinds = set()
+    for data in (sample.head, sample.tail):
+        if b'/Info' in data and not _pdf_info_empty(sample, data):
+            kinds.add('document_info')
+        if b'/Metadata' in data:
+            kinds.add('xmp')
+        if b'/EmbeddedFiles' in data:
+            kinds.add('embedded_files')
+    return sorted(kinds)
+
+
+def check_office(sample: _Sample) -> List[str]:
+    # zipfile reads only the central directory at the end of the archive
+    sample.file.seek(0)
+    with zipfile.ZipFile(sample.file) as zf:
+        names = zf.namelist()
+    kinds = {OFFICE_PARTS[name] for name in names if name in OFFICE_PARTS}
+    if any('/media/' in name for name in names):
+        kinds.add('embedded_media')
+    return sorted(kinds)
+
+
+def check_mp3(sample: _Sample) -> List[str]:
+    kinds = []
+    if sample.head.startswith(b'ID3'):
+        kinds.append('id3v2')
+    end = sample.tail or sample.head
+    if len(end) >= 128 and end[-128:-125] == b'TAG':
+        kinds.append('id3v1')
+    return kinds
+
+
+def check_flac(sample: _Sample) -> List[str]:
+    kinds = set()
+    data = sample.head
+    pos = 4
+    while pos + 4 <= len(data):
+        block_type = data[pos] & 0x7F
+        (length,) = struct.unpack('>I', b'\x00' + data[pos + 1:pos + 4])
+        if block_type == 4:
+            kinds.add('vorbis_comment')
+        elif block_type == 6:
+            kinds.add('picture')
+        if data[pos] & 0x80:  # last metadata block
+            break
+        pos += 4 + length
+    return sorted(kinds)
+
+
+def check_mp4(sample: _Sample) -> List[str]:
+    # moov sits at the start or the end of the file
+    kinds = set()
+    for data in (sample.head, sample.tail):
+        if b'udta' in data:
+            kinds.add('user_data')
+        if b'ilst' in data:
+            kinds.add('tags')
+        if b'\xa9xyz' in data:
+            kinds.add('gps')
+    return sorted(kinds)
+
+
+def check_wav(sample: _Sample) -> List[str]:
+    kinds = set()
+    f = sample.file
+    pos = 12
+    for _ in range(MAX_CHUNKS):
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, length = struct.unpack('<4sI', header)
+        if chunk_id in RIFF_CHUNK_KINDS:
+            kinds.add(RIFF_CHUNK_KINDS[chunk_id])
+        pos += 8 + length + (length & 1)
+    return sorted(kinds)
+
+
+def check_ogg(sample: _Sample) -> List[str]:
+    start = sample.head.find(b'\x03vorbis')
+    if start < 0:
+        return []
+    pos = start + 7
+    (vendor_length,) = struct.unpack('<I', sample.head[pos:pos + 4])
+    pos += 4 + vendor_length
+    count = struct.unpack('<I', sample.head[pos:pos + 4])[0] if pos + 4 <= len(sample.head) else 0
+    return ['vorbis_comment'] if count else []
+
+
+def check_email(sample: _Sample) -> List[str]:
+    header_end = sample.head.find(b'\n\n')
+    headers = sample.head[:header_end if header_end >= 0 else len(sample.head)].lower()
+    kinds = set()
+    for line in headers.splitlines():
+        for name, kind in EMAIL_HEADER_KINDS.items():
+            if line.startswith(name):
+                kinds.add(kind)
+    return sorted(kinds)
+
+
+CHECKS: Dict[str, Callable[[_Sample], List[str]]] = {
+    'jpeg': check_jpeg,
+    'png': check_png,
+    'tiff': check_tiff,
+    'pdf': check_pdf,
+    'office': check_office,
+    'mp3': check_mp3,
+    'flac': check_flac,
+    'mp4': check_mp4,
+    'wav': check_wav,
+    'ogg': check_ogg,
+    'email': check_email,
+}
+
+
+def _sniff_format(magic: bytes) -> str:
+    for prefix, fmt in MAGIC_FORMATS:
+        if magic.startswith(prefix):
+            return fmt
+    if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+        return 'wav'
+    return 'other'
+
+
+def audit_file(path: str, size: Optional[int] = None) -> AuditResult:
+    """Check one file's headers for metadata without parsing the whole file"""
+    fmt = SUFFIX_FORMATS.get(os.path.splitext(path)[1].lower(), 'other')
+    try:
+        with open(path, 'rb') as f:
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+            if fmt == 'other':
+                # Unknown suffixes cost one small read unless the magic matches
+                fmt = _sniff_format(f.read(MAGIC_BYTES))
+                if fmt == 'other':
+                    return AuditResult(path, fmt, size)
+                f.seek(0)
+            kinds = CHECKS[fmt](_Sample(f, size))
+            if kinds is None:
+                # The header could not be located, so the file is unchecked
+                return AuditResult(path, fmt, size)
+            return AuditResult(path, fmt, size, has_metadata=bool(kinds), kinds=kinds)
+    except Exception as e:
+        return AuditResult(path, fmt, size or 0, error=f"{type(e).__name__}: {e}")
+
+
+@dataclass
+class FormatCounts:
+    files: int = 0
+    bytes: int = 0
+    with_metadata: int = 0
+    clean: int = 0
+    unchecked: int = 0
+    errors: int = 0
+    kinds: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+@dataclass
+class AuditSummary:
+    """Per-format counters for an audit run"""
+    formats: Dict[str, FormatCounts] = field(default_factory=lambda: defaultdict(FormatCounts))
+    elapsed_s: float = 0.0
+
+    def add(self, result: AuditResult):
+        counts = self.formats[result.format]
+        counts.files += 1
+        counts.bytes += result.size
+        if result.error:
+            counts.errors += 1
+        elif result.has_metadata is None:
+            counts.unchecked += 1
+        elif result.has_metadata:
+            counts.with_metadata += 1
+            for kind in result.kinds:
+                counts.kinds[kind] += 1
+        else:
+            counts.clean += 1
+
+    @property
+    def total_files(self) -> int:
+        return sum(counts.files for counts in self.formats.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            'formats': {fmt: {**asdict(counts), 'kinds': dict(counts.kinds)}
+                        for fmt, counts in self.formats.items()},
+            'total_files': self.total_files,
+            'elapsed_s': self.elapsed_s
+        }
+
+    def render_table(self) -> str:
+        header = f"{'Format':<8} {'Files':>8} {'Metadata':>9} {'Clean':>7} {'Unchecked':>9} {'Errors':>7}  Kinds"
+        lines = [header, "-" * len(header)]
+        for fmt, counts in sorted(self.formats.items(), key=lambda item: -item[1].files):
+            kinds = ", ".join(f"{kind} {n}" for kind, n in sorted(counts.kinds.items(), key=lambda kv: -kv[1]))
+            lines.append(f"{fmt:<8} {counts.files:>8} {counts.with_metadata:>9} {counts.clean:>7} "
+                         f"{counts.unchecked:>9} {counts.errors:>7}  {kinds}")
+        rate = self.total_files / self.elapsed_s if self.elapsed_s else 0
+        lines.append("-" * len(header))
+        lines.append(f"{self.total_files} files in {self.elapsed_s:.2f}s ({rate:.0f} files/s)")
+        return "\n".join(lines)
+
+
+CSV_COLUMNS = ('path', 'format', 'size', 'has_metadata', 'kinds', 'error')
+
+
+def _scan_directory(directory: str) -> Tuple[List[AuditResult], List[str]]:
+    results, subdirs = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        results.append(audit_file(entry.path, entry.stat().st_size))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return results, subdirs
+
+
+def run_audit(roots: Iterable, csv_path=None, workers: Optional[int] = None,
+              on_result: Optional[Callable[[AuditResult], None]] = None) -> AuditSummary:
+    """Audit every file under roots, walking directories in parallel.
+
+    Each directory is scanned, and its files checked, by one task on a
+    thread pool; subdirectories become new tasks. Rows are written to
+    csv_path as directories complete.
+    """
+    start = time.perf_counter()
+    summary = AuditSummary()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    csv_file = open(csv_path, 'w', newline='', encoding='utf-8') if csv_path else None
+    writer = csv.writer(csv_file) if csv_file else None
+    if writer:
+        writer.writerow(CSV_COLUMNS)
+
+    # Results are recorded on the calling thread only
+    def record(results: List[AuditResult]):
+        for result in results:
+            summary.add(result)
+            if writer:
+                writer.writerow([result.path, result.format, result.size,
+                                 '' if result.has_metadata is None else int(result.has_metadata),
+                                 ';'.join(result.kinds), result.error or ''])
+            if on_result:
+                on_result(result)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audit") as pool:
+            pending = set()
+            for root in roots:
+                root = os.fspath(root)
+                if os.path.isdir(root):
+                    pending.add(pool.submit(_scan_directory, root))
+                else:
+                    record([audit_file(root)])
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results, subdirs = future.result()
+                    record(results)
+                    pending.update(pool.submit(_scan_directory, subdir) for subdir in subdirs)
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    summary.elapsed_s = time.perf_counter() - start
+    return summary
@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, TextIO, Tuple
+
+from .isolation import IsolatedExecutor
+from .metadata_analyzer import DEFAULT_DEPTH, analyze
+
+# Files queued per worker; bounds memory when walking very large trees
+QUEUE_FACTOR = 4
+
+
+def iter_files(paths: Iterable) -> Iterator[str]:
+    """Yield every regular file under the given files and directories.
+
+    Directories are walked with os.scandir, depth first, without following
+    symlinked directories. Unreadable directories are skipped.
+    """
+    for path in paths:
+        path = os.fspath(path)
+        if not os.path.isdir(path):
+            yield path
+            continue
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    subdirs = []
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif entry.is_file():
+                                yield entry.path
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            stack.extend(reversed(sorted(subdirs)))
+
+
+def analyze_record(path: str, depth: str = DEFAULT_DEPTH) -> Tuple[bool, str]:
+    """Analyse one file in a worker; returns (succeeded, NDJSON record)"""
+    start = time.perf_counter()
+    record: Dict = {'path': path}
+    try:
+        record['report'] = analyze(Path(path), depth).to_dict()
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return 'report' in record, json.dumps(record, default=str)
+
+
+def completed_paths(output_path) -> Set[str]:
+    """Paths with a successful record in a previous, possibly partial, output.
+
+    Failed records and a torn final line are ignored, so those files are
+    analysed again.
+    """
+    done = set()
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'report' in record:
+                    done.add(record.get('path'))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _open_output(output_path, resume: bool) -> TextIO:
+    if not resume:
+        return open(output_path, 'w', encoding='utf-8')
+    torn = False
+    try:
+        with open(output_path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+    except FileNotFoundError:
+        pass
+    out = open(output_path, 'a', encoding='utf-8')
+    # Terminate a torn last line so the next record starts cleanly
+    if torn:
+        out.write('\n')
+    return out
+
+
+def run_bulk(paths: Iterable, output_path=None, jobs: Optional[int] = None,
+             depth: str = DEFAULT_DEPTH, resume: bool = False) -> Dict[str, int]:
+    """Analyse every file under paths on a process pool, streaming NDJSON.
+
+    One record is written per file as soon as it finishes, so output order
+    follows completion, not input. With resume, files that already have a
+    successful record in output_path are skipped and new records appended.
+    Workers are IsolatedExecutor processes, so a parser that crashes its
+    worker fails only that file.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    skip = completed_paths(output_path) if resume and output_path else set()
+    out = _open_output(output_path, resume) if output_path else sys.stdout
+    stats = {'analysed': 0, 'failed': 0, 'skipped': 0}
+
+    try:
+        # No resource caps: only crash recovery is wanted here
+        with IsolatedExecutor(max_workers=jobs, timeout=None, memory_limit_mb=None, cpu_limit=None) as pool:
+            pending = {}
+
+            def drain():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        succeeded, line = future.result()
+                    except Exception as e:
+                        # The worker died (e.g. a parser crash) and was replaced; record it and go on
+                        succeeded = False
+                        line = json.dumps({'path': path, 'error': f"{type(e).__name__}: {e}"})
+                    out.write(line + '\n')
+                    out.flush()
+                    stats['analysed' if succeeded else 'failed'] += 1
+
+            for path in iter_files(paths):
+                if path in skip:
+                    stats['skipped'] += 1
+                    continue
+                pending[pool.submit(analyze_record, path, depth)] = path
+                if len(pending) >= jobs * QUEUE_FACTOR:
+                    drain()
+            while pending:
+                drain()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return stats
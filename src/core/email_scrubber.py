@@ -0,0 +1,160 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from email import encoders
+from email.feedparser import BytesFeedParser
+from email.generator import BytesGenerator
+from email.message import Message
+from email.policy import compat32
+from typing import BinaryIO, List, Optional
+
+# Headers that record the sender's network path, client and machine
+STRIPPED_HEADERS = ('Received', 'X-Received', 'X-Originating-IP', 'User-Agent', 'X-Mailer')
+
+# Content headers of an attachment that is replaced by a removal notice
+REPLACED_PART_HEADERS = ('Content-Type', 'Content-Disposition', 'Content-Transfer-Encoding',
+                         'Content-Description', 'Content-ID')
+
+# RFC 2183 disposition parameters that carry file timestamps
+STRIPPED_DISPOSITION_PARAMS = ('creation-date', 'modification-date', 'read-date')
+
+# Message-ID keeps its unique local part, so threading still works, but the
+# host part (often the sender's machine name) is replaced
+MESSAGE_ID_HOST = 'localhost'
+MESSAGE_ID_RE = re.compile(r'<([^@<>]+)@[^<>]*>')
+
+# mbox envelope lines carry the sender address and delivery time
+MBOX_FROM_LINE = b'From MAILER-DAEMON Thu Jan  1 00:00:00 1970\n'
+
+
+class EmailScrubber:
+    """Sanitises RFC 822 messages (.eml) and mbox mailboxes.
+
+    Identifying headers are removed, the Message-ID host is replaced and
+    every attachment is decoded, scrubbed by the owning UniversalScrubber's
+    handler for its type and re-encoded as base64. Attachments of one
+    message are scrubbed in parallel on max_workers threads. An attachment
+    that cannot be scrubbed (including one rejected by preflight or the
+    steganalysis stage) is replaced by a short text notice; the rest of
+    the message is still sanitised.
+
+    mbox files are read line by line and only one message is held in memory
+    at a time, so mailbox size does not affect memory use.
+    """
+
+    def __init__(self, scrubber, max_workers: Optional[int] = None):
+        self.scrubber = scrubber
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+
+    @property
+    def logger(self):
+        return self.scrubber.logger
+
+    # ------------------------------------------------------------------
+    # Messages
+    # ------------------------------------------------------------------
+    def sanitise_headers(self, part: Message):
+        for header in STRIPPED_HEADERS:
+            del part[header]
+
+        message_id = part.get('Message-ID')
+        if message_id:
+            part.replace_header('Message-ID', MESSAGE_ID_RE.sub(rf'<\1@{MESSAGE_ID_HOST}>', str(message_id)))
+
+    def _attachments(self, msg: Message) -> List[Message]:
+        attachments = []
+        for part in msg.walk():
+            # walk() also visits attached messages, whose headers leak the same way
+            self.sanitise_headers(part)
+            if part.is_multipart() or part.get_content_maintype() == 'message':
+                continue
+            if part.get_filename() or part.get_content_disposition() == 'attachment':
+                attachments.append(part)
+        return attachments
+
+    def _scrub_attachment(self, part: Message) -> Optional[bytes]:
+        """Scrubbed attachment bytes, or None when the attachment must be dropped"""
+        name = part.get_filename() or ''
+        try:
+            data = part.get_payload(decode=True) or b''
+            # A failed handler must not pass the original through with its metadata
+            return self.scrubber.scrub_bytes(data, name, fail_closed=True)
+        except Exception as e:
+            self.logger.warning(f"Removed email attachment {name or '(unnamed)'}: {e}")
+            return None
+
+    @staticmethod
+    def _replace_attachment(part: Message):
+        name = part.get_filename() or 'attachment'
+        for header in REPLACED_PART_HEADERS:
+            del part[header]
+        part.set_payload(f"[{name} was removed because it could not be scrubbed]\n", 'us-ascii')
+
+    def scrub_message(self, msg: Message) -> Message:
+        """Sanitise a parsed message in place and return it"""
+        attachments = self._attachments(msg)
+        if len(attachments) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="email") as pool:
+                scrubbed = list(pool.map(self._scrub_attachment, attachments))
+        else:
+            scrubbed = [self._scrub_attachment(part) for part in attachments]
+
+        for part, data in zip(attachments, scrubbed):
+            if data is None:
+                self._replace_attachment(part)
+                continue
+            for param in STRIPPED_DISPOSITION_PARAMS:
+                if part.get_param(param, header='Content-Disposition') is not None:
+                    part.del_param(param, header='Content-Disposition')
+            del part['Content-Transfer-Encoding']
+            part.set_payload(data)
+            encoders.encode_base64(part)
+            self.logger.info(f"Scrubbed email attachment: {part.get_filename()}")
+        return msg
+
+    @staticmethod
+    def _parse(lines) -> Message:
+        parser = BytesFeedParser(policy=compat32)
+        for line in lines:
+            parser.feed(line)
+        return parser.close()
+
+    # ------------------------------------------------------------------
+    # Streams
+    # ------------------------------------------------------------------
+    def scrub_eml_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Sanitise a single message"""
+        msg = self.scrub_message(self._parse(src))
+        BytesGenerator(dst, mangle_from_=False, policy=compat32).flatten(msg)
+
+    def scrub_mbox_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Sanitise an mbox mailbox one message at a time"""
+        generator = BytesGenerator(dst, mangle_from_=True, policy=compat32)
+        count = 0
+        lines = []
+        previous_blank = True
+
+        def flush():
+            nonlocal count
+            # The blank line before the next From line is a separator, not body
+            if lines and lines[-1] in (b'\n', b'\r\n'):
+                lines.pop()
+            if not lines:
+                return
+            msg = self.scrub_message(self._parse(lines))
+            if count:
+                dst.write(b'\n')
+            dst.write(MBOX_FROM_LINE)
+            generator.flatten(msg)
+            count += 1
+            lines.clear()
+
+        for line in src:
+            if line.startswith(b'From ') and previous_blank:
+                flush()
+            else:
+                lines.append(line)
+            previous_blank = line in (b'\n', b'\r\n')
+        flush()
+
+        self.logger.info(f"Scrubbed {count} mbox messages")
@@ -3,7 +3,7 @@ import threading
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from .scrubber import UniversalScrubber
+from .service import get_scrub_service
 from ..utils.logger import SecureLogger
 
 class AutoScrubFolderHandler(FileSystemEventHandler):
@@ -12,7 +12,7 @@ class AutoScrubFolderHandler(FileSystemEventHandler):
         self.output_folder = output_folder or self.watch_folder / "scrubbed"
         self.output_folder.mkdir(exist_ok=True)
         self.logger = logger or SecureLogger()
-        self.scrubber = UniversalScrubber()
+        self.service = get_scrub_service()
         
         # Process existing files
         self.process_existing_files()
@@ -40,19 +40,29 @@ class AutoScrubFolderHandler(FileSystemEventHandler):
                 
             self.logger.info(f"Processing new file: {file_path.name}")
             
-            # Scrub the file
+            # Scrub the file on the shared engine; the result is logged when it lands
             output_path = self.output_folder / f"scrubbed_{file_path.name}"
-            success = self.scrubber.scrub_file(file_path, output_path)
-            
-            if success:
-                self.logger.info(f"Successfully scrubbed: {file_path.name}")
-                # Optional: Remove original file for security
-                # file_path.unlink()
-            else:
-                self.logger.error(f"Failed to scrub: {file_path.name}")
+            future = self.service.submit(file_path, output_path)
+            future.add_done_callback(lambda f: self.on_scrubbed(file_path, f))
                 
         except Exception as e:
             self.logger.error(f"Error processing {file_path.name}: {str(e)}")
+    
+    def on_scrubbed(self, file_path, future):
+        """Log the outcome of a queued scrub"""
+        if future.cancelled():
+            self.logger.warning(f"Scrub cancelled: {file_path.name}")
+            return
+        
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"Error processing {file_path.name}: {str(error)}")
+        elif future.result():
+            self.logger.info(f"Successfully scrubbed: {file_path.name}")
+            # Optional: Remove original file for security
+            # file_path.unlink()
+        else:
+            self.logger.error(f"Failed to scrub: {file_path.name}")
 
 class FolderWatcher:
     def __init__(self, watch_folder, output_folder=None):
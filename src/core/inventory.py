@@ -0,0 +1,284 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .bulk_analysis import iter_files
+from .isolation import _default_context
+from .metadata_analyzer import DEPTH_QUICK, analyze
+from .metadata_diff import flatten_report
+from .sensitivity import score_fields
+
+DEFAULT_INVENTORY_PATH = "logs/metadata_inventory.db"
+
+# Report sections that describe the file rather than metadata it carries
+SKIPPED_SECTIONS = ('signature', 'filesystem')
+
+# Longer values are truncated before indexing
+MAX_INDEXED_VALUE_CHARS = 1024
+
+# Rows written per transaction, and files queued per worker
+WRITE_BATCH_SIZE = 200
+QUEUE_FACTOR = 4
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+LOOKUP_BATCH_SIZE = 500
+
+
+def index_record(path: str) -> Tuple:
+    """Analyse one file for the inventory (runs in a worker process).
+
+    Returns (path, size, mtime_ns, file_type, risk_score, fields, error).
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError as e:
+        return path, None, None, None, 0, {}, str(e)
+    try:
+        report = analyze(Path(path), DEPTH_QUICK)
+        fields = {
+            key: value[:MAX_INDEXED_VALUE_CHARS]
+            for key, value in flatten_report(report).items()
+            if key.split(':', 1)[0] not in SKIPPED_SECTIONS
+        }
+        return (path, stat_result.st_size, stat_result.st_mtime_ns, report.file_type,
+                score_fields(fields).score, fields, None)
+    except Exception as e:
+        return (path, stat_result.st_size, stat_result.st_mtime_ns, Path(path).suffix.lower(),
+                0, {}, f"{type(e).__name__}: {e}")
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class MetadataInventory:
+    """Searchable SQLite index of the metadata carried by files on a share.
+
+    Each file's quick-depth analyzer report is flattened into
+    ('section:Field', value) rows. With FTS5 available those rows are also
+    in a full-text index, so searches are index lookups; without it, search
+    falls back to a LIKE scan. Re-indexing only analyses files whose size
+    or mtime changed, and drops files that disappeared.
+    """
+
+    def __init__(self, db_path=DEFAULT_INVENTORY_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fts = False
+        self.init_database()
+
+    @classmethod
+    def from_config(cls, config):
+        """Open the inventory named by the inventory_db setting of a Config"""
+        return cls(config.get("inventory_db") or DEFAULT_INVENTORY_PATH)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def init_database(self):
+        """Initialize the inventory tables, and the FTS5 index where supported"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        # WAL lets the proxy search while an index run is writing
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER,
+                mtime_ns INTEGER,
+                file_type TEXT,
+                risk_score INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                indexed_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fields (
+                id INTEGER PRIMARY KEY,
+                file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+                name TEXT NOT NULL,
+                value TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fields_file ON fields(file_id)')
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS fields_fts
+                USING fts5(name, value, content='fields', content_rowid='id')
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS fields_ai AFTER INSERT ON fields BEGIN
+                    INSERT INTO fields_fts(rowid, name, value) VALUES (new.id, new.name, new.value);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS fields_ad AFTER DELETE ON fields BEGIN
+                    INSERT INTO fields_fts(fields_fts, rowid, name, value)
+                    VALUES ('delete', old.id, old.name, old.value);
+                END
+            ''')
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+    def _known(self, conn, paths: List[str]) -> Dict[str, Tuple[int, int]]:
+        known = {}
+        for start in range(0, len(paths), LOOKUP_BATCH_SIZE):
+            batch = paths[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            for path, size, mtime_ns in conn.execute(
+                    f'SELECT path, size, mtime_ns FROM files WHERE path IN ({placeholders})', batch):
+                known[path] = (size, mtime_ns)
+        return known
+
+    def _write(self, conn, records: List[Tuple]):
+        now = time.time()
+        for path, size, mtime_ns, file_type, risk_score, fields, error in records:
+            conn.execute('DELETE FROM files WHERE path = ?', (path,))
+            if size is None:
+                continue
+            cursor = conn.execute('''
+                INSERT INTO files (path, size, mtime_ns, file_type, risk_score, error, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (path, size, mtime_ns, file_type, risk_score, error, now))
+            conn.executemany('INSERT INTO fields (file_id, name, value) VALUES (?, ?, ?)',
+                             [(cursor.lastrowid, name, value) for name, value in fields.items()])
+        conn.commit()
+
+    def index(self, roots: Iterable, jobs: Optional[int] = None, prune: bool = True) -> Dict[str, int]:
+        """Bring the inventory up to date for every file under roots.
+
+        Unchanged files (same size and mtime_ns) are skipped without being
+        opened. Changed and new files are analysed on a process pool. With
+        prune, files under the roots that no longer exist are removed.
+        """
+        roots = [os.path.abspath(root) for root in roots]
+        jobs = jobs or os.cpu_count() or 1
+        stats = {'indexed': 0, 'unchanged': 0, 'failed': 0, 'removed': 0}
+        seen = set()
+
+        conn = self._connect()
+        try:
+            def changed(paths: List[str]) -> List[str]:
+                known = self._known(conn, paths)
+                stale = []
+                for path in paths:
+                    try:
+                        stat_result = os.stat(path)
+                    except OSError:
+                        continue
+                    if known.get(path) == (stat_result.st_size, stat_result.st_mtime_ns):
+                        stats['unchanged'] += 1
+                    else:
+                        stale.append(path)
+                return stale
+
+            with ProcessPoolExecutor(max_workers=jobs, mp_context=_default_context()) as pool:
+                pending = set()
+                finished = []
+
+                def drain():
+                    nonlocal pending
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record = future.result()
+                        stats['failed' if record[6] else 'indexed'] += 1
+                        finished.append(record)
+                    if len(finished) >= WRITE_BATCH_SIZE:
+                        self._write(conn, finished)
+                        finished.clear()
+
+                batch = []
+                for path in iter_files(roots):
+                    seen.add(path)
+                    batch.append(path)
+                    if len(batch) < LOOKUP_BATCH_SIZE:
+                        continue
+                    for stale in changed(batch):
+                        pending.add(pool.submit(index_record, stale))
+                        if len(pending) >= jobs * QUEUE_FACTOR:
+                            drain()
+                    batch = []
+                for stale in changed(batch):
+                    pending.add(pool.submit(index_record, stale))
+                while pending:
+                    drain()
+                self._write(conn, finished)
+
+            if prune:
+                stats['removed'] = self._prune(conn, roots, seen)
+        finally:
+            conn.close()
+        return stats
+
+    def _prune(self, conn, roots: List[str], seen: set) -> int:
+        removed = 0
+        for root in roots:
+            prefix = root.rstrip(os.sep) + os.sep
+            rows = conn.execute('SELECT path FROM files WHERE path = ? OR substr(path, 1, ?) = ?',
+                                (root, len(prefix), prefix)).fetchall()
+            gone = [(path,) for (path,) in rows if path not in seen]
+            conn.executemany('DELETE FROM files WHERE path = ?', gone)
+            removed += len(gone)
+        conn.commit()
+        return removed
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def search(self, query: str, limit: int = 100, min_risk: int = 0) -> List[Dict]:
+        """Find indexed fields whose name or value matches every word of query.
+
+        Words match as prefixes ('GPS' finds GPSInfo, 'canon' finds Canon).
+        Returns one dict per matching field, best matches first.
+        """
+        if not query.strip():
+            return []
+        conn = self._connect()
+        try:
+            if self.fts:
+                rows = conn.execute('''
+                    SELECT files.path, fields.name, fields.value, files.risk_score
+                    FROM fields_fts
+                    JOIN fields ON fields.id = fields_fts.rowid
+                    JOIN files ON files.id = fields.file_id
+                    WHERE fields_fts MATCH ? AND files.risk_score >= ?
+                    ORDER BY fields_fts.rank
+                    LIMIT ?
+                ''', (_fts_query(query), min_risk, limit)).fetchall()
+            else:
+                where = " AND ".join(["(fields.name || ' ' || fields.value) LIKE ?"] * len(query.split()))
+                rows = conn.execute(f'''
+                    SELECT files.path, fields.name, fields.value, files.risk_score
+                    FROM fields JOIN files ON files.id = fields.file_id
+                    WHERE {where} AND files.risk_score >= ?
+                    LIMIT ?
+                ''', [f"%{term}%" for term in query.split()] + [min_risk, limit]).fetchall()
+        finally:
+            conn.close()
+        return [{'path': path, 'field': name, 'value': value, 'risk_score': risk_score}
+                for path, name, value, risk_score in rows]
+
+    def get_stats(self) -> Dict:
+        """Get file and field counts"""
+        conn = self._connect()
+        try:
+            files, failed = conn.execute(
+                'SELECT COUNT(*), COUNT(error) FROM files').fetchone()
+            fields = conn.execute('SELECT COUNT(*) FROM fields').fetchone()[0]
+        finally:
+            conn.close()
+        return {'files': files, 'failed': failed, 'fields': fields, 'full_text': self.fts}
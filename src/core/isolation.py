@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Optional
+
+try:
+    import resource
+    RESOURCE_LIMITS_AVAILABLE = True
+except ImportError:
+    RESOURCE_LIMITS_AVAILABLE = False
+
+# Defaults follow the SCRUB_TIMEOUT / SCRUB_MEMORY_LIMIT_MB settings in setup.md
+DEFAULT_TIMEOUT = float(os.environ.get("SCRUB_TIMEOUT", 60))
+DEFAULT_MEMORY_LIMIT_MB = int(os.environ.get("SCRUB_MEMORY_LIMIT_MB", 1024))
+DEFAULT_CPU_LIMIT = int(os.environ.get("SCRUB_CPU_LIMIT", 60))
+DEFAULT_MAX_JOBS_PER_WORKER = 200
+
+
+def _default_context():
+    """Workers are started from a clean forkserver where available: forking
+    the multi-threaded parent directly can copy a lock (e.g. a module import
+    lock) held by another thread and deadlock the child."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+
+class WorkerError(RuntimeError):
+    """A job could not complete because its worker process failed"""
+
+
+class JobTimeout(WorkerError):
+    """A job exceeded its wall-clock budget and its worker was killed"""
+
+
+class WorkerCrashed(WorkerError):
+    """A worker died mid-job (CPU limit, out of memory, segfault)"""
+
+
+def _apply_memory_limit(memory_limit_mb: Optional[int]):
+    if not RESOURCE_LIMITS_AVAILABLE or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _apply_cpu_limit(cpu_limit: Optional[int]):
+    """Give the next job cpu_limit more seconds of CPU.
+
+    RLIMIT_CPU counts the whole process lifetime, so the soft limit is moved
+    forward before every job. Only the soft limit is touched: lowering the
+    hard limit is irreversible for an unprivileged process.
+    """
+    if not RESOURCE_LIMITS_AVAILABLE or not cpu_limit:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_limit
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, initializer, initargs, memory_limit_mb, cpu_limit):
+    """Body of a worker process: apply limits, then serve jobs until told to stop"""
+    _apply_memory_limit(memory_limit_mb)
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+
+        fn, args, kwargs = job
+        _apply_cpu_limit(cpu_limit)
+        try:
+            result = ('ok', fn(*args, **kwargs))
+        except MemoryError:
+            # The heap may be fragmented near the cap; ask to be recycled
+            result = ('recycle', MemoryError("Job exceeded the worker memory limit"))
+        except BaseException as e:
+            result = ('error', e)
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # Unpicklable result or exception
+            conn.send(('error', WorkerError(f"Could not return job result: {e}")))
+
+
+class _Worker:
+    """One reusable worker process and the parent's end of its pipe"""
+
+    def __init__(self, context, initializer, initargs, memory_limit_mb, cpu_limit):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, initializer, initargs, memory_limit_mb, cpu_limit),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class IsolatedExecutor(Executor):
+    """Executor that runs every job in a resource-capped worker process.
+
+    Workers are reused across jobs. A worker is killed and replaced when a
+    job overruns its wall-clock timeout, dies (RLIMIT_CPU raises SIGXCPU,
+    RLIMIT_AS can end in MemoryError or a crash) or has served
+    max_jobs_per_worker jobs. The failing job's future gets a WorkerError;
+    the other jobs are unaffected.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+                 cpu_limit: Optional[int] = DEFAULT_CPU_LIMIT,
+                 max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+                 initializer: Optional[Callable] = None, initargs=(), mp_context=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit = cpu_limit
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.initializer = initializer
+        self.initargs = initargs
+        self._context = mp_context or _default_context()
+        self._jobs = queue.Queue()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self.recycled = 0
+
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch_loop, name=f"isolated-dispatch-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new jobs after shutdown")
+            future = Future()
+            self._jobs.put((future, fn, args, kwargs))
+            return future
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.initializer, self.initargs,
+                       self.memory_limit_mb, self.cpu_limit)
+
+    def _dispatch_loop(self):
+        worker = None
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                if worker is None:
+                    worker = self._spawn()
+                worker = self._run_job(worker, future, fn, args, kwargs)
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    def _run_job(self, worker: _Worker, future: Future, fn, args, kwargs) -> Optional[_Worker]:
+        """Run one job on worker. Returns the worker to use next (None to respawn lazily)."""
+        try:
+            worker.conn.send((fn, args, kwargs))
+        except Exception as e:
+            # Most likely an unpicklable job; the worker itself is fine
+            future.set_exception(WorkerError(f"Could not send job to worker: {e}"))
+            return worker
+
+        if not worker.conn.poll(self.timeout):
+            worker.kill()
+            self.recycled += 1
+            future.set_exception(JobTimeout(f"Job exceeded {self.timeout}s wall-clock limit"))
+            return None
+
+        try:
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            exitcode = worker.process.exitcode
+            worker.kill()
+            self.recycled += 1
+            future.set_exception(WorkerCrashed(f"Worker died while running job (exit code {exitcode})"))
+            return None
+
+        if status == 'ok':
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+        worker.jobs += 1
+        if status == 'recycle' or worker.jobs >= self.max_jobs_per_worker:
+            worker.stop()
+            self.recycled += 1
+            return None
+        return worker
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._shutdown_lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        job[0].cancel()
+            for _ in self._dispatchers:
+                self._jobs.put(None)
+        if wait:
+            for dispatcher in self._dispatchers:
+                dispatcher.join()
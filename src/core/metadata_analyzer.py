@@ -2,7 +2,16 @@
 # metadata_analyzer.py - Comprehensive metadata analysis like exiftool
 
 import argparse
+import io
+import json
+import mmap
+import numbers
+import os
+import sys
+import threading
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
 from PIL import Image, ExifTags
 from hachoir.parser import createParser
 from hachoir.metadata import extractMetadata
@@ -12,207 +21,474 @@ import zipfile
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
-def show_file_signature(file_path: Path):
-    """Show file signature/headers."""
+IMAGE_SUFFIXES = ['.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.gif', '.webp']
+PDF_SUFFIXES = ['.pdf']
+OFFICE_SUFFIXES = ['.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp']
+MEDIA_SUFFIXES = ['.mp3', '.flac', '.mp4', '.m4a', '.wav', '.ogg', '.avi', '.mkv']
+
+# Long media tag values are clipped for readability
+MAX_MEDIA_VALUE_CHARS = 100
+
+# Analysis depth: quick never runs hachoir, standard runs it only when no
+# type-specific extractor recognised the file, deep always runs it
+DEPTH_QUICK = 'quick'
+DEPTH_STANDARD = 'standard'
+DEPTH_DEEP = 'deep'
+DEPTHS = (DEPTH_QUICK, DEPTH_STANDARD, DEPTH_DEEP)
+DEFAULT_DEPTH = DEPTH_STANDARD
+
+# Hachoir only sees this much of a file, and is abandoned after this long
+HACHOIR_MAX_BYTES = 32 * 1024 * 1024
+HACHOIR_TIMEOUT_S = 5.0
+
+
+@dataclass
+class MetadataSection:
+    """One titled group of metadata fields"""
+    title: str
+    fields: Dict[str, Any] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class MetadataReport:
+    """Everything the analyzer found in one file, JSON-serialisable"""
+    name: str
+    file_type: str
+    sections: Dict[str, MetadataSection] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+    depth: str = DEFAULT_DEPTH
+
+    def add(self, key: str, title: str, fields: Dict[str, Any] = None, notes: List[str] = None) -> MetadataSection:
+        section = MetadataSection(title, {k: to_plain(v) for k, v in (fields or {}).items()}, notes or [])
+        self.sections[key] = section
+        return section
+
+    def warn(self, message: str):
+        self.warnings.append(message)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetadataReport':
+        return cls(
+            name=data['name'],
+            file_type=data['file_type'],
+            sections={key: MetadataSection(**section) for key, section in data.get('sections', {}).items()},
+            warnings=list(data.get('warnings', [])),
+            depth=data.get('depth', DEFAULT_DEPTH)
+        )
+
+    def render_text(self) -> str:
+        return render_text(self)
+
+
+def to_plain(value) -> Any:
+    """Convert a library value (IFDRational, pikepdf objects, bytes) to plain JSON types"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, numbers.Real):
+        try:
+            return float(value)
+        except (TypeError, ValueError, ZeroDivisionError):
+            return str(value)
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): to_plain(v) for k, v in value.items()}
+    return str(value)
+
+
+# ----------------------------------------------------------------------
+# Shared input
+# ----------------------------------------------------------------------
+class BufferReader(io.RawIOBase):
+    """Read-only file object with its own cursor over a shared buffer.
+
+    Slicing an mmap copies only the requested range and exports no buffer,
+    so the mapping can be closed as soon as the extractors are done.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], name: str, limit: Optional[int] = None):
+        super().__init__()
+        self._data = data
+        # A limit makes the reader look like a file truncated to that size
+        self._size = len(data) if limit is None else min(len(data), limit)
+        self._pos = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), self._size - self._pos))
+        b[:n] = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if self._pos < 0:
+            raise ValueError("Negative seek position")
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+@dataclass
+class AnalysisSource:
+    """One file's bytes, read once and shared by every extractor"""
+    name: str
+    data: Union[bytes, mmap.mmap]
+    stat: Optional[os.stat_result] = None
+
+    def open(self, limit: Optional[int] = None) -> BufferReader:
+        return BufferReader(self.data, self.name, limit)
+
+
+# ----------------------------------------------------------------------
+# Extractors
+# ----------------------------------------------------------------------
+def extract_file_signature(source: AnalysisSource, report: MetadataReport):
+    """File signature/headers."""
+    try:
+        header = bytes(source.data[:16])
+        report.add('signature', "File Signature (Hex)", {
+            'Hex': ' '.join(f'{byte:02x}' for byte in header),
+            'ASCII': ''.join(chr(byte) if 32 <= byte <= 126 else '.' for byte in header)
+        })
+    except Exception as e:
+        report.warn(f"File signature reading failed: {e}")
+
+
+def extract_filesystem_metadata(source: AnalysisSource, report: MetadataReport):
+    """Size and timestamps from the file system."""
     try:
-        with open(file_path, 'rb') as f:
-            header = f.read(16)
-            print("\n--- File Signature (Hex) ---")
-            hex_str = ' '.join(f'{byte:02x}' for byte in header)
-            print(f"Hex: {hex_str}")
-            ascii_str = ''.join(chr(byte) if 32 <= byte <= 126 else '.' for byte in header)
-            print(f"ASCII: {ascii_str}")
+        stat = source.stat
+        if stat is None:
+            # In-memory input: only the size is known
+            report.add('filesystem', "File System Metadata", {'Size': f"{len(source.data):,} bytes"})
+            return
+        report.add('filesystem', "File System Metadata", {
+            'Size': f"{stat.st_size:,} bytes",
+            'Created': datetime.fromtimestamp(stat.st_ctime).isoformat(sep=' '),
+            'Modified': datetime.fromtimestamp(stat.st_mtime).isoformat(sep=' '),
+            'Accessed': datetime.fromtimestamp(stat.st_atime).isoformat(sep=' ')
+        })
     except Exception as e:
-        print(f"[WARN] File signature reading failed: {e}")
+        report.warn(f"File system metadata failed: {e}")
+
 
-def show_image_metadata(file_path: Path):
-    """Show detailed image metadata."""
+def extract_image_metadata(source: AnalysisSource, report: MetadataReport):
+    """Detailed image metadata."""
     try:
-        with Image.open(file_path) as img:
-            print("\n--- PIL Image Metadata ---")
-            print(f"Format: {img.format}")
-            print(f"Size: {img.size}")
-            print(f"Mode: {img.mode}")
-            
+        with Image.open(source.open()) as img:
+            report.add('image', "PIL Image Metadata", {
+                'Format': img.format,
+                'Size': img.size,
+                'Mode': img.mode
+            })
+
             # EXIF data
-            if hasattr(img, '_getexif') and img._getexif():
-                print("\n--- EXIF Data ---")
-                exif = img._getexif()
+            exif = img._getexif() if hasattr(img, '_getexif') else None
+            if exif:
+                fields = {}
                 for tag_id, value in exif.items():
                     tag_name = ExifTags.TAGS.get(tag_id, tag_id)
-                    
                     if tag_name == 'MakerNote' and isinstance(value, bytes):
                         continue
-                   
-                    print(f"{tag_name}: {value}")
+                    fields[str(tag_name)] = value
+                report.add('exif', "EXIF Data", fields)
             else:
-                print("No EXIF data found")
-             
+                report.add('exif', "EXIF Data", notes=["No EXIF data found"])
+
     except Exception as e:
-        print(f"[WARN] Image metadata extraction failed: {e}")
+        report.warn(f"Image metadata extraction failed: {e}")
+
 
-def show_pdf_metadata(file_path: Path):
-    """Show detailed PDF metadata."""
+def extract_pdf_metadata(source: AnalysisSource, report: MetadataReport):
+    """Detailed PDF metadata."""
     try:
-        with pikepdf.open(file_path) as pdf:
-            print("\n--- PDF Metadata ---")
-            
+        with pikepdf.open(source.open()) as pdf:
             # Document info
-            if hasattr(pdf, 'docinfo') and pdf.docinfo:
-                print("\n--- PDF Document Info ---")
-                for key, value in pdf.docinfo.items():
-                    print(f"{key}: {value}")
-            
+            if pdf.docinfo:
+                report.add('pdf_info', "PDF Document Info",
+                           {str(key): value for key, value in pdf.docinfo.items()})
+
             # XMP metadata
             if '/Metadata' in pdf.Root:
-                print("\n--- XMP Metadata ---")
-                print("XMP metadata stream present")
-            
+                report.add('pdf_xmp', "XMP Metadata", notes=["XMP metadata stream present"])
+
             # PDF structure info
-            print(f"\n--- PDF Structure ---")
-            print(f"PDF version: {pdf.pdf_version}")
-            print(f"Number of pages: {len(pdf.pages)}")
-            print(f"Encrypted: {pdf.is_encrypted}")
-            
+            structure = report.add('pdf_structure', "PDF Structure", {
+                'PDF version': pdf.pdf_version,
+                'Number of pages': len(pdf.pages),
+                'Encrypted': pdf.is_encrypted
+            })
+
             # Check for embedded files
             if '/Names' in pdf.Root and '/EmbeddedFiles' in pdf.Root.Names:
-                print("Embedded files present")
-                
+                structure.notes.append("Embedded files present")
+
     except Exception as e:
-        print(f"[WARN] PDF metadata extraction failed: {e}")
+        report.warn(f"PDF metadata extraction failed: {e}")
+
 
-def show_office_metadata(file_path: Path):
-    """Show Office document metadata."""
+def extract_office_metadata(source: AnalysisSource, report: MetadataReport):
+    """Office document metadata."""
     try:
-        with zipfile.ZipFile(file_path, 'r') as zf:
+        with zipfile.ZipFile(source.open(), 'r') as zf:
+            names = zf.namelist()
+
             # Core metadata
-            if 'docProps/core.xml' in zf.namelist():
+            if 'docProps/core.xml' in names:
                 with zf.open('docProps/core.xml') as core_file:
-                    tree = ET.parse(core_file)
-                    root = tree.getroot()
-                    print("\n--- Office Core Metadata ---")
-                    ns = {'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties'}
-                    for elem_name in ['creator', 'lastModifiedBy', 'created', 'modified', 'title', 'subject']:
-                        elem = root.find(f'cp:{elem_name}', ns)
-                        if elem is not None and elem.text:
-                            print(f"{elem_name}: {elem.text}")
-            
+                    root = ET.parse(core_file).getroot()
+                ns = {'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties'}
+                fields = {}
+                for elem_name in ['creator', 'lastModifiedBy', 'created', 'modified', 'title', 'subject']:
+                    elem = root.find(f'cp:{elem_name}', ns)
+                    if elem is not None and elem.text:
+                        fields[elem_name] = elem.text
+                report.add('office_core', "Office Core Metadata", fields)
+
             # App metadata
-            if 'docProps/app.xml' in zf.namelist():
+            if 'docProps/app.xml' in names:
                 with zf.open('docProps/app.xml') as app_file:
-                    tree = ET.parse(app_file)
-                    root = tree.getroot()
-                    print("\n--- Office Application Metadata ---")
-                    for elem in root.iter():
-                        if elem.text and elem.text.strip() and not elem.tag.endswith('}Pages'):
-                            tag = elem.tag.split('}')[-1]
-                            print(f"{tag}: {elem.text}")
-            
+                    root = ET.parse(app_file).getroot()
+                fields = {}
+                for elem in root.iter():
+                    if elem.text and elem.text.strip() and not elem.tag.endswith('}Pages'):
+                        fields[elem.tag.split('}')[-1]] = elem.text
+                report.add('office_app', "Office Application Metadata", fields)
+
             # Document structure
-            print(f"\n--- Office Document Structure ---")
-            files = [name for name in zf.namelist() if not name.endswith('/')]
-            print(f"Total files in package: {len(files)}")
+            files = [name for name in names if not name.endswith('/')]
+            structure = {'Total files in package': len(files)}
             for component in ['word/', 'xl/', 'ppt/', 'docProps/']:
                 comp_files = [name for name in files if name.startswith(component)]
                 if comp_files:
-                    print(f"  {component}: {len(comp_files)} files")
-                        
+                    structure[component] = f"{len(comp_files)} files"
+            report.add('office_structure', "Office Document Structure", structure)
+
     except Exception as e:
-        print(f"[WARN] Office metadata extraction failed: {e}")
+        report.warn(f"Office metadata extraction failed: {e}")
+
 
-def show_media_metadata(file_path: Path):
-    """Show audio/video metadata."""
+def extract_media_metadata(source: AnalysisSource, report: MetadataReport):
+    """Audio/video metadata."""
     try:
-        media = MutagenFile(file_path)
+        with source.open() as reader:
+            media = MutagenFile(reader)
         if media is not None:
-            print("\n--- Media Metadata ---")
+            fields = {}
             for key, value in media.items():
-                # Limit long values for readability
                 value_str = str(value)
-                if len(value_str) > 100:
-                    value_str = value_str[:100] + "..."
-                print(f"{key}: {value_str}")
-            
+                if len(value_str) > MAX_MEDIA_VALUE_CHARS:
+                    value_str = value_str[:MAX_MEDIA_VALUE_CHARS] + "..."
+                fields[str(key)] = value_str
+            report.add('media', "Media Metadata", fields)
+
             # Media info
             if hasattr(media, 'info'):
-                print(f"\n--- Media Info ---")
                 info = media.info
+                fields = {}
                 if hasattr(info, 'length'):
-                    print(f"Length: {info.length:.2f} seconds")
+                    fields['Length'] = f"{info.length:.2f} seconds"
                 if hasattr(info, 'bitrate'):
-                    print(f"Bitrate: {info.bitrate} kbps")
+                    fields['Bitrate'] = f"{info.bitrate} kbps"
                 if hasattr(info, 'sample_rate'):
-                    print(f"Sample rate: {info.sample_rate} Hz")
-                    
+                    fields['Sample rate'] = f"{info.sample_rate} Hz"
+                report.add('media_info', "Media Info", fields)
+
     except Exception as e:
-        print(f"[WARN] Media metadata extraction failed: {e}")
+        report.warn(f"Media metadata extraction failed: {e}")
+
+
+def _hachoir_fields(reader: BufferReader) -> Optional[Dict[str, Any]]:
+    # createParser takes a named file object; closing the parser closes it
+    parser = createParser(reader)
+    if not parser:
+        return None
+    with parser:
+        metadata = extractMetadata(parser)
+    if not metadata:
+        return None
+    fields = {}
+    for line in metadata.exportPlaintext():
+        if not line.startswith('- ') or ': ' not in line:
+            continue
+        key, value = line[2:].split(': ', 1)
+        if key in fields:
+            existing = fields[key]
+            fields[key] = (existing if isinstance(existing, list) else [existing]) + [value]
+        else:
+            fields[key] = value
+    return fields
+
+
+def extract_hachoir_metadata(source: AnalysisSource, report: MetadataReport,
+                             max_bytes: int = HACHOIR_MAX_BYTES, timeout: float = HACHOIR_TIMEOUT_S):
+    """Hachoir as universal fallback, limited to max_bytes of input and timeout seconds.
+
+    Hachoir runs on a daemon thread that is abandoned on timeout. Once the
+    caller closes the file mapping its next read fails, so it stops soon after.
+    """
+    outcome = {}
+
+    def run():
+        try:
+            outcome['fields'] = _hachoir_fields(source.open(limit=max_bytes))
+        except Exception as e:
+            outcome['error'] = e
+
+    worker = threading.Thread(target=run, name="hachoir", daemon=True)
+    worker.start()
+    worker.join(timeout)
+
+    if worker.is_alive():
+        report.warn(f"Hachoir parsing timed out after {timeout:g}s")
+    elif 'error' in outcome:
+        report.warn(f"Hachoir parsing failed: {outcome['error']}")
+    elif outcome.get('fields'):
+        if len(source.data) > max_bytes:
+            report.warn(f"Hachoir parsed only the first {max_bytes:,} bytes")
+        report.add('hachoir', "Hachoir Universal Metadata", outcome['fields'])
+
+
+def analyze_source(source: AnalysisSource, depth: str = DEFAULT_DEPTH) -> MetadataReport:
+    """Run the extractors that depth calls for over one shared source."""
+    if depth not in DEPTHS:
+        raise ValueError(f"Unknown analysis depth: {depth}")
+    suffix = Path(source.name).suffix.lower()
+    report = MetadataReport(name=source.name, file_type=suffix or 'Unknown', depth=depth)
 
-def show_comprehensive_metadata(file_path: Path):
-    """Main function to show comprehensive metadata analysis."""
-    print(f"\n{'='*60}")
-    print(f"COMPREHENSIVE METADATA ANALYSIS: {file_path.name}")
-    print(f"{'='*60}")
-    
     # File basics
-    show_file_signature(file_path)
-    
-    # File system metadata
-    try:
-        stat = file_path.stat()
-        print("\n--- File System Metadata ---")
-        print(f"Size: {stat.st_size:,} bytes")
-        print(f"Created: {datetime.fromtimestamp(stat.st_ctime)}")
-        print(f"Modified: {datetime.fromtimestamp(stat.st_mtime)}")
-        print(f"Accessed: {datetime.fromtimestamp(stat.st_atime)}")
-    except Exception as e:
-        print(f"[WARN] File system metadata failed: {e}")
+    extract_file_signature(source, report)
+    extract_filesystem_metadata(source, report)
+    basic_sections = len(report.sections)
 
     # Type-specific detailed metadata
-    suffix = file_path.suffix.lower()
-    
-    if suffix in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.gif', '.webp']:
-        show_image_metadata(file_path)
-    elif suffix == '.pdf':
-        show_pdf_metadata(file_path)
-    elif suffix in ['.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp']:
-        show_office_metadata(file_path)
-    elif suffix in ['.mp3', '.flac', '.mp4', '.m4a', '.wav', '.ogg', '.avi', '.mkv']:
-        show_media_metadata(file_path)
-    else:
-        print("\n--- Generic File Analysis ---")
-        print(f"File type: {suffix or 'Unknown'}")
-    
-    # Hachoir as universal fallback
-    try:
-        parser = createParser(str(file_path))
-        if parser:
-            with parser:
-                metadata = extractMetadata(parser)
-                if metadata:
-                    print("\n--- Hachoir Universal Metadata ---")
-                    for line in metadata.exportPlaintext():
-                        print(line)
-    except Exception as e:
-        print(f"[WARN] Hachoir parsing failed: {e}")
-    
-    print(f"\n{'='*60}")
-    print(f"END OF METADATA ANALYSIS")
-    print(f"{'='*60}")
+    if suffix in IMAGE_SUFFIXES:
+        extract_image_metadata(source, report)
+    elif suffix in PDF_SUFFIXES:
+        extract_pdf_metadata(source, report)
+    elif suffix in OFFICE_SUFFIXES:
+        extract_office_metadata(source, report)
+    elif suffix in MEDIA_SUFFIXES:
+        extract_media_metadata(source, report)
+    recognised = len(report.sections) > basic_sections
+    if not recognised:
+        report.add('generic', "Generic File Analysis", {'File type': report.file_type})
+
+    if depth == DEPTH_DEEP or (depth == DEPTH_STANDARD and not recognised):
+        extract_hachoir_metadata(source, report)
+    return report
+
+
+def analyze(file_path: Path, depth: str = DEFAULT_DEPTH) -> MetadataReport:
+    """Collect comprehensive metadata for one file into a structured report.
+
+    The file is opened and mapped once; every extractor reads that mapping.
+    """
+    file_path = Path(file_path)
+    with open(file_path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return analyze_source(AnalysisSource(file_path.name, b'', stat), depth)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return analyze_source(AnalysisSource(file_path.name, mapped, stat), depth)
+
+
+def analyze_bytes(data: bytes, name: str, depth: str = DEFAULT_DEPTH) -> MetadataReport:
+    """Collect metadata for an in-memory file; name selects the extractors."""
+    return analyze_source(AnalysisSource(Path(name).name, data), depth)
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+def render_text(report: MetadataReport) -> str:
+    """Render a report in the analyzer's classic plain-text layout."""
+    lines = [
+        f"\n{'='*60}",
+        f"COMPREHENSIVE METADATA ANALYSIS: {report.name}",
+        f"{'='*60}"
+    ]
+    for section_key, section in report.sections.items():
+        lines.append(f"\n--- {section.title} ---")
+        for key, value in section.fields.items():
+            # Hachoir repeats keys (one per stream); show them as separate lines
+            if isinstance(value, list) and section_key == 'hachoir':
+                lines.extend(f"{key}: {item}" for item in value)
+            else:
+                lines.append(f"{key}: {value}")
+        lines.extend(section.notes)
+    for warning in report.warnings:
+        lines.append(f"[WARN] {warning}")
+    lines.extend([
+        f"\n{'='*60}",
+        "END OF METADATA ANALYSIS",
+        f"{'='*60}"
+    ])
+    return "\n".join(lines)
+
+
+def show_comprehensive_metadata(file_path: Path, depth: str = DEFAULT_DEPTH):
+    """Main function to show comprehensive metadata analysis."""
+    print(render_text(analyze(file_path, depth)))
+
 
 def main():
     """Standalone CLI for metadata analysis."""
     parser = argparse.ArgumentParser(description="Comprehensive metadata analyzer")
     parser.add_argument("files", nargs="+", help="Path(s) to file(s)")
-    
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON")
+    parser.add_argument("--depth", choices=DEPTHS, default=DEFAULT_DEPTH,
+                        help="quick: no hachoir; standard: hachoir for unrecognised files; deep: always hachoir")
+
+    bulk = parser.add_argument_group("bulk mode")
+    bulk.add_argument("--ndjson", action="store_true",
+                      help="Walk files and directories recursively on a process pool, one JSON record per file")
+    bulk.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: CPU count)")
+    bulk.add_argument("--output", "-o", help="Write records to this file instead of stdout")
+    bulk.add_argument("--resume", action="store_true", help="Skip files already recorded in --output and append")
+
     args = parser.parse_args()
-    
+
+    if args.ndjson or args.resume:
+        from .bulk_analysis import run_bulk
+        if args.resume and not args.output:
+            parser.error("--resume requires --output")
+        stats = run_bulk(args.files, args.output, args.jobs or None, args.depth, args.resume)
+        print(f"[INFO] Analysed {stats['analysed']}, failed {stats['failed']}, "
+              f"skipped {stats['skipped']}", file=sys.stderr)
+        return
+
     for file in args.files:
         path = Path(file)
         if not path.exists():
             print(f"[ERROR] File not found: {file}")
             continue
-        
-        show_comprehensive_metadata(path)
+
+        if args.json:
+            print(json.dumps(analyze(path, args.depth).to_dict(), indent=2))
+        else:
+            show_comprehensive_metadata(path, args.depth)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
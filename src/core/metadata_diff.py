@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+
+@dataclass
+class MetadataDiff:
+    """Which metadata fields a scrub removed, changed, kept or introduced.
+
+    Field names are the 'Group:Field' keys produced by the probes (or by
+    flatten_report for full analyzer reports). changed maps a field to its
+    before and after values.
+    """
+    name: str
+    checked: bool = True
+    removed: Dict[str, str] = field(default_factory=dict)
+    changed: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    kept: Dict[str, str] = field(default_factory=dict)
+    added: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def clean(self) -> bool:
+        """True when nothing was kept and nothing new was introduced"""
+        return not self.kept and not self.added
+
+    def removed_fields(self) -> List[str]:
+        """Fields whose original value is gone: removed outright or rewritten"""
+        return sorted(set(self.removed) | set(self.changed))
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['clean'] = self.clean
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetadataDiff':
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+    def render_text(self) -> str:
+        if not self.checked:
+            return f"{self.name}: no metadata probe for this format"
+        lines = [f"{self.name}: {len(self.removed)} removed, {len(self.changed)} changed, "
+                 f"{len(self.kept)} kept, {len(self.added)} added"]
+        lines.extend(f"  - {key}: {value}" for key, value in self.removed.items())
+        lines.extend(f"  ~ {key}: {values['before']} -> {values['after']}"
+                     for key, values in self.changed.items())
+        lines.extend(f"  = {key}: {value}" for key, value in self.kept.items())
+        lines.extend(f"  + {key}: {value}" for key, value in self.added.items())
+        return "\n".join(lines)
+
+
+def diff_fields(before: Optional[Dict[str, str]], after: Optional[Dict[str, str]],
+                name: str = '') -> MetadataDiff:
+    """Compare two flat field maps, e.g. probe() output before and after a scrub.
+
+    A None side means the format has no probe, and the diff is unchecked.
+    """
+    if before is None or after is None:
+        return MetadataDiff(name=name, checked=False)
+    diff = MetadataDiff(name=name)
+    for key, value in before.items():
+        if key not in after:
+            diff.removed[key] = value
+        elif after[key] != value:
+            diff.changed[key] = {'before': value, 'after': after[key]}
+        else:
+            diff.kept[key] = value
+    for key, value in after.items():
+        if key not in before:
+            diff.added[key] = value
+    return diff
+
+
+def flatten_report(report) -> Dict[str, str]:
+    """Flatten an analyzer MetadataReport into 'Section:Field' string values"""
+    fields = {}
+    for key, section in report.to_dict()['sections'].items():
+        for name, value in section['fields'].items():
+            fields[f"{key}:{name}"] = str(value)
+    return fields
+
+
+def diff_reports(before, after) -> MetadataDiff:
+    """Compare two full analyzer reports of the same file"""
+    return diff_fields(flatten_report(before), flatten_report(after), before.name)
@@ -0,0 +1,263 @@
+import io
+import os
+import re
+import tarfile
+import warnings
+import zipfile
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from PIL import Image
+
+from .archive_scrubber import PY7ZR_AVAILABLE, archive_suffix
+from .probes import IMAGE_SUFFIXES, OFFICE_SUFFIXES, PDF_SUFFIXES
+
+if PY7ZR_AVAILABLE:
+    import py7zr
+
+ZIP_SUFFIXES = OFFICE_SUFFIXES | {'.zip'}
+TAR_SUFFIXES = {'.tar', '.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tbz2', '.txz'}
+SEVEN_ZIP_SUFFIXES = {'.7z'}
+
+# Archives expanding past this are held to the compression ratio cap
+RATIO_MIN_BYTES = 1024 * 1024
+
+# Only the tail of a PDF is read to find the trailer's /Size entry
+PDF_TAIL_BYTES = 64 * 1024
+PDF_SIZE_RE = re.compile(rb'/Size\s+(\d+)')
+
+VERDICT_OK = 'ok'
+VERDICT_CONSTRAINED = 'constrained'
+VERDICT_REJECT = 'reject'
+
+
+class PreflightRejected(ValueError):
+    """Raised when a file declares more work than the preflight budget allows"""
+
+    def __init__(self, report: 'PreflightReport'):
+        self.report = report
+        super().__init__(f"Preflight rejected {report.name}: {'; '.join(report.reasons)}")
+
+    def __reduce__(self):
+        # Raised in worker processes; rebuild from the report, not the message
+        return PreflightRejected, (self.report,)
+
+
+@dataclass
+class PreflightBudget:
+    """Hard caps on declared work. Anything above constrained_fraction of a
+    cap is still accepted, but routed to the constrained lane."""
+    max_file_bytes: int = 2 * 1024 * 1024 * 1024
+    max_pixels: int = 150_000_000
+    max_zip_members: int = 20_000
+    max_zip_uncompressed: int = 2 * 1024 * 1024 * 1024
+    max_zip_ratio: float = 200.0
+    max_pdf_objects: int = 1_000_000
+    constrained_fraction: float = 0.25
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a budget from the preflight_* settings of a Config"""
+        budget = cls()
+        for name in asdict(budget):
+            value = config.get(f"preflight_{name}")
+            if value:
+                setattr(budget, name, value)
+        return budget
+
+
+@dataclass
+class PreflightReport:
+    """What a file's headers declare, and what that means for scheduling"""
+    name: str
+    format: str
+    verdict: str = VERDICT_OK
+    reasons: List[str] = field(default_factory=list)
+    declared: Dict[str, Union[int, float]] = field(default_factory=dict)
+    # Scheduling hints for the worker pool
+    estimated_memory_bytes: int = 0
+    cost: float = 0.0
+
+    @property
+    def rejected(self) -> bool:
+        return self.verdict == VERDICT_REJECT
+
+    @property
+    def constrained(self) -> bool:
+        return self.verdict == VERDICT_CONSTRAINED
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _check(report: PreflightReport, budget: PreflightBudget, label: str, value, limit):
+    """Escalate the verdict if value is over limit (reject) or near it (constrained)"""
+    if value > limit:
+        report.verdict = VERDICT_REJECT
+        report.reasons.append(f"{label} {value:,} exceeds limit {limit:,}")
+    elif value > limit * budget.constrained_fraction and report.verdict == VERDICT_OK:
+        report.verdict = VERDICT_CONSTRAINED
+        report.reasons.append(f"{label} {value:,} is above the constrained threshold")
+
+
+def _probe_image(stream: BinaryIO, report: PreflightReport, budget: PreflightBudget):
+    """Read only the image header: PIL's open() is lazy and decodes nothing"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+        try:
+            img = Image.open(stream)
+        except Image.DecompressionBombError as e:
+            report.verdict = VERDICT_REJECT
+            report.reasons.append(str(e))
+            return
+    with img:
+        width, height = img.size
+        bands = len(img.getbands())
+    pixels = width * height
+    report.declared.update({'width': width, 'height': height, 'pixels': pixels, 'bands': bands})
+    # Decoded source plus the clean copy built by the scrubber
+    report.estimated_memory_bytes = pixels * bands * 2
+    report.cost = pixels / 1_000_000
+    _check(report, budget, "Image pixels", pixels, budget.max_pixels)
+
+
+def _probe_zip(stream: BinaryIO, report: PreflightReport, budget: PreflightBudget):
+    """Read only the central directory"""
+    with zipfile.ZipFile(stream) as zf:
+        infos = zf.infolist()
+    members = len(infos)
+    uncompressed = sum(info.file_size for info in infos)
+    compressed = sum(info.compress_size for info in infos)
+    largest = max((info.file_size for info in infos), default=0)
+    worst_ratio = max(
+        (info.file_size / max(info.compress_size, 1) for info in infos if info.file_size > 1024 * 1024),
+        default=0.0
+    )
+    report.declared.update({
+        'zip_members': members,
+        'zip_uncompressed': uncompressed,
+        'zip_compressed': compressed,
+        'zip_largest_member': largest,
+        'zip_worst_ratio': round(worst_ratio, 1)
+    })
+    # Members are processed one at a time; images are held whole in memory
+    report.estimated_memory_bytes = largest * 2
+    report.cost = uncompressed / (64 * 1024 * 1024)
+    _check(report, budget, "Zip members", members, budget.max_zip_members)
+    _check(report, budget, "Zip uncompressed bytes", uncompressed, budget.max_zip_uncompressed)
+    if worst_ratio > budget.max_zip_ratio:
+        report.verdict = VERDICT_REJECT
+        report.reasons.append(f"Zip member compression ratio {worst_ratio:.0f}:1 exceeds limit {budget.max_zip_ratio:.0f}:1")
+
+
+def _check_archive(report: PreflightReport, budget: PreflightBudget, label: str,
+                   members: int, uncompressed: int, largest: int, size: int):
+    """Apply the zip caps to a tar or 7z listing, using the whole-archive ratio"""
+    ratio = uncompressed / max(size, 1) if uncompressed > RATIO_MIN_BYTES else 0.0
+    report.declared.update({
+        'archive_members': members,
+        'archive_uncompressed': uncompressed,
+        'archive_largest_member': largest,
+        'archive_ratio': round(ratio, 1)
+    })
+    report.estimated_memory_bytes = largest * 2
+    report.cost = uncompressed / (64 * 1024 * 1024)
+    _check(report, budget, f"{label} members", members, budget.max_zip_members)
+    _check(report, budget, f"{label} uncompressed bytes", uncompressed, budget.max_zip_uncompressed)
+    if ratio > budget.max_zip_ratio:
+        report.verdict = VERDICT_REJECT
+        report.reasons.append(f"{label} compression ratio {ratio:.0f}:1 exceeds limit {budget.max_zip_ratio:.0f}:1")
+
+
+def _probe_tar(stream: BinaryIO, report: PreflightReport, budget: PreflightBudget, size: int):
+    """Walk the member headers, skipping the data between them.
+
+    A compressed tar has to be decompressed to reach its headers, so the
+    walk stops as soon as the totals so far break a cap: it never expands
+    more than the budget allows.
+    """
+    members = uncompressed = largest = 0
+    with tarfile.open(fileobj=stream, mode='r:*') as tf:
+        for info in iter(tf.next, None):
+            if info.isfile():
+                members += 1
+                uncompressed += info.size
+                largest = max(largest, info.size)
+            if (members > budget.max_zip_members
+                    or uncompressed > budget.max_zip_uncompressed
+                    or (uncompressed > RATIO_MIN_BYTES and uncompressed / max(size, 1) > budget.max_zip_ratio)):
+                break
+    _check_archive(report, budget, "Tar", members, uncompressed, largest, size)
+
+
+def _probe_7z(stream: BinaryIO, report: PreflightReport, budget: PreflightBudget, size: int):
+    """Read the file list from the archive header; no member is decompressed"""
+    if not PY7ZR_AVAILABLE:
+        return
+    with py7zr.SevenZipFile(stream, 'r') as zf:
+        sizes = [info.uncompressed for info in zf.list() if not info.is_directory]
+    _check_archive(report, budget, "7z", len(sizes), sum(sizes), max(sizes, default=0), size)
+
+
+def _probe_pdf(stream: BinaryIO, report: PreflightReport, budget: PreflightBudget, start: int, size: int):
+    """Read the trailer's declared object count from the tail of the file"""
+    stream.seek(start + max(0, size - PDF_TAIL_BYTES))
+    tail = stream.read(PDF_TAIL_BYTES)
+    matches = PDF_SIZE_RE.findall(tail)
+    if not matches:
+        return
+    objects = int(matches[-1])
+    report.declared['pdf_objects'] = objects
+    report.estimated_memory_bytes = max(size * 3, objects * 1024)
+    report.cost = objects / 10_000
+    _check(report, budget, "PDF objects", objects, budget.max_pdf_objects)
+
+
+def preflight(source: Union[Path, str, BinaryIO], hint: Optional[str] = None,
+              budget: Optional[PreflightBudget] = None) -> PreflightReport:
+    """Check a file's declared work against a budget using headers only.
+
+    source is a path or a seekable binary stream (whose position is restored).
+    hint names the file when source is a stream.
+    """
+    budget = budget or PreflightBudget()
+
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        with open(path, 'rb') as stream:
+            return preflight(stream, hint or path.name, budget)
+
+    name = hint or getattr(source, 'name', '') or ''
+    name = os.path.basename(str(name))
+    suffix = archive_suffix(name) or (Path(name).suffix.lower() if not name.startswith('.') else name.lower())
+
+    start = source.tell()
+    source.seek(0, io.SEEK_END)
+    size = source.tell() - start
+    source.seek(start)
+
+    report = PreflightReport(name=name, format=suffix.lstrip('.') or 'unknown')
+    report.declared['file_size'] = size
+    report.estimated_memory_bytes = size
+    report.cost = size / (64 * 1024 * 1024)
+    _check(report, budget, "File size", size, budget.max_file_bytes)
+
+    try:
+        if suffix in IMAGE_SUFFIXES:
+            _probe_image(source, report, budget)
+        elif suffix in ZIP_SUFFIXES:
+            _probe_zip(source, report, budget)
+        elif suffix in PDF_SUFFIXES:
+            _probe_pdf(source, report, budget, start, size)
+        elif suffix in TAR_SUFFIXES:
+            _probe_tar(source, report, budget, size)
+        elif suffix in SEVEN_ZIP_SUFFIXES:
+            _probe_7z(source, report, budget, size)
+    except Exception as e:
+        # A header we cannot read is the scrubber's problem, not a budget breach
+        report.reasons.append(f"Header probe failed: {e}")
+    finally:
+        source.seek(start)
+
+    return report
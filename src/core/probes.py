@@ -0,0 +1,172 @@
+import io
+import zipfile
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+from PIL import Image, ExifTags
+
+try:
+    from mutagen import File as MutagenFile
+    MUTAGEN_AVAILABLE = True
+except ImportError:
+    MUTAGEN_AVAILABLE = False
+
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp', '.gif', '.webp'}
+PDF_SUFFIXES = {'.pdf'}
+OFFICE_SUFFIXES = {'.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp'}
+MEDIA_SUFFIXES = {'.mp3', '.flac', '.mp4', '.m4a', '.wav', '.ogg'}
+EMAIL_SUFFIXES = {'.eml'}
+
+# Image info entries that carry metadata rather than decoding parameters
+IMAGE_INFO_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop', 'iptc')
+GPS_IFD = 0x8825
+EXIF_IFD = 0x8769
+
+# Package parts holding document properties (OOXML docProps, ODF meta.xml);
+# the scrubber drops them and the probe reports them
+OFFICE_METADATA_PARTS = ('docProps/core.xml', 'docProps/app.xml', 'docProps/custom.xml', 'meta.xml')
+OFFICE_IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.gif'}
+
+EMAIL_HEADERS = ('Received', 'X-Received', 'X-Originating-IP', 'User-Agent', 'X-Mailer')
+
+# Values are clipped so a probe never holds a whole thumbnail or XMP packet
+MAX_VALUE_CHARS = 200
+
+
+def _clip(value) -> str:
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS] + "..."
+
+
+def probe_image(stream: BinaryIO) -> Dict[str, str]:
+    """EXIF (including GPS and Exif sub-IFDs), XMP, comments and PNG text chunks"""
+    fields = {}
+    with Image.open(stream) as img:
+        exif = img.getexif()
+        for tag_id, value in exif.items():
+            if tag_id in (GPS_IFD, EXIF_IFD):
+                continue
+            fields[f"EXIF:{ExifTags.TAGS.get(tag_id, tag_id)}"] = _clip(value)
+        for tag_id, value in exif.get_ifd(EXIF_IFD).items():
+            fields[f"EXIF:{ExifTags.TAGS.get(tag_id, tag_id)}"] = _clip(value)
+        for tag_id, value in exif.get_ifd(GPS_IFD).items():
+            fields[f"GPS:{ExifTags.GPSTAGS.get(tag_id, tag_id)}"] = _clip(value)
+
+        for key in IMAGE_INFO_KEYS:
+            if key in img.info and key != 'exif':
+                fields[f"Image:{key}"] = _clip(img.info[key])
+        for key, value in getattr(img, 'text', {}).items():
+            fields[f"PNG:{key}"] = _clip(value)
+    return fields
+
+
+def probe_pdf(stream: BinaryIO) -> Dict[str, str]:
+    """Document info, XMP, embedded files and image XObject metadata"""
+    fields = {}
+    if not PIKEPDF_AVAILABLE:
+        return fields
+    with pikepdf.open(stream) as pdf:
+        for key, value in pdf.docinfo.items():
+            fields[f"PDF:{str(key).lstrip('/')}"] = _clip(value)
+        if '/Metadata' in pdf.Root:
+            fields["PDF:XMP"] = "present"
+        if '/Names' in pdf.Root and '/EmbeddedFiles' in pdf.Root.Names:
+            fields["PDF:EmbeddedFiles"] = "present"
+        for number, page in enumerate(pdf.pages, 1):
+            if '/Resources' in page and '/XObject' in page.Resources:
+                for name, xobj in page.Resources.XObject.items():
+                    if xobj.get('/Subtype') == '/Image' and '/Metadata' in xobj:
+                        fields[f"PDF:Page{number}{name}:XMP"] = "present"
+    return fields
+
+
+def probe_office(stream: BinaryIO) -> Dict[str, str]:
+    """Document property parts and EXIF in embedded media"""
+    fields = {}
+    with zipfile.ZipFile(stream) as zf:
+        names = set(zf.namelist())
+        for part in OFFICE_METADATA_PARTS:
+            if part in names:
+                fields[f"Office:{part}"] = "present"
+        for name in sorted(names):
+            if '/media/' in name and Path(name).suffix.lower() in OFFICE_IMAGE_SUFFIXES:
+                try:
+                    with zf.open(name) as member:
+                        image_fields = probe_image(io.BytesIO(member.read()))
+                except Exception:
+                    continue
+                for key, value in image_fields.items():
+                    fields[f"{name}:{key}"] = value
+    return fields
+
+
+def probe_media(stream: BinaryIO) -> Dict[str, str]:
+    """Audio/video tags"""
+    fields = {}
+    if not MUTAGEN_AVAILABLE:
+        return fields
+    media = MutagenFile(stream)
+    if media is not None and media.tags:
+        for key, value in media.tags.items():
+            fields[f"Tag:{key}"] = _clip(value)
+    return fields
+
+
+def probe_email(stream: BinaryIO) -> Dict[str, str]:
+    """Routing and client headers; only the header block is parsed"""
+    fields = {}
+    headers = BytesHeaderParser().parse(stream)
+    for name in EMAIL_HEADERS:
+        values = headers.get_all(name) or []
+        for index, value in enumerate(values):
+            fields[f"Header:{name}" + (f"[{index}]" if len(values) > 1 else "")] = _clip(value)
+    return fields
+
+
+def get_probe(suffix: str) -> Optional[Callable[[BinaryIO], Dict[str, str]]]:
+    """Return the probe for a file suffix, or None if the format has none"""
+    suffix = suffix.lower()
+    if suffix in IMAGE_SUFFIXES:
+        return probe_image
+    if suffix in PDF_SUFFIXES:
+        return probe_pdf
+    if suffix in OFFICE_SUFFIXES:
+        return probe_office
+    if suffix in MEDIA_SUFFIXES:
+        return probe_media
+    if suffix in EMAIL_SUFFIXES:
+        return probe_email
+    return None
+
+
+def probe(source: Union[Path, str, BinaryIO], hint: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Collect the metadata fields a file carries, keyed 'Group:Field'.
+
+    source is a path or a seekable binary stream; hint names the file when
+    source is a stream. Returns None for formats without a probe.
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        probe_fn = get_probe(Path(hint or path.name).suffix)
+        if probe_fn is None:
+            return None
+        with open(path, 'rb') as stream:
+            return probe_fn(stream)
+
+    probe_fn = get_probe(Path(hint or getattr(source, 'name', '') or '').suffix)
+    if probe_fn is None:
+        return None
+    start = source.tell()
+    try:
+        return probe_fn(source)
+    finally:
+        source.seek(start)
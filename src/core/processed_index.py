@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..utils.hashing import hash_file
+
+DEFAULT_INDEX_PATH = "logs/processed_files.db"
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+LOOKUP_BATCH_SIZE = 500
+
+
+class ProcessedIndex:
+    """Persistent record of which input files have already been scrubbed.
+
+    Each input path maps to the (inode, size, mtime_ns, content hash) it had
+    when it was last processed, plus the output it produced and the outcome.
+    A file is only skipped when its stat signature still matches, or when the
+    signature moved but the content hash did not (e.g. a bare touch).
+    """
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the SQLite index table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS processed_files (
+                path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT,
+                output_path TEXT,
+                status TEXT NOT NULL,
+                processed_at TEXT NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def key(file_path) -> str:
+        return os.path.abspath(file_path)
+
+    def lookup(self, file_path) -> Optional[Dict]:
+        """Get the index row for one file, or None if it was never processed"""
+        return self.lookup_many([file_path]).get(self.key(file_path))
+
+    def lookup_many(self, file_paths: Iterable) -> Dict[str, Dict]:
+        """Get index rows for many files, keyed by absolute path"""
+        keys = [self.key(p) for p in file_paths]
+        rows = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(f'''
+                    SELECT path, inode, size, mtime_ns, content_hash, output_path, status
+                    FROM processed_files WHERE path IN ({placeholders})
+                ''', batch)
+                for path, inode, size, mtime_ns, content_hash, output_path, status in cursor:
+                    rows[path] = {
+                        'inode': inode,
+                        'size': size,
+                        'mtime_ns': mtime_ns,
+                        'content_hash': content_hash,
+                        'output_path': output_path,
+                        'status': status
+                    }
+        finally:
+            conn.close()
+        return rows
+
+    def is_current(self, file_path, stat_result, row: Optional[Dict]) -> Tuple[bool, Optional[str]]:
+        """Decide whether a file still matches its index row.
+
+        Returns (current, content_hash). The content hash is only computed
+        when the stat signature alone cannot settle the question, and is
+        handed back so the caller can record it without hashing twice.
+        """
+        if row is None or row['status'] != 'success':
+            return False, None
+
+        if (row['inode'] == stat_result.st_ino and row['size'] == stat_result.st_size
+                and row['mtime_ns'] == stat_result.st_mtime_ns):
+            return True, row['content_hash']
+
+        if row['size'] != stat_result.st_size or not row['content_hash']:
+            return False, None
+
+        content_hash = hash_file(Path(file_path))
+        if content_hash != row['content_hash']:
+            return False, content_hash
+
+        # A recreated input whose output was cleaned away needs a fresh run
+        if not row['output_path'] or not Path(row['output_path']).exists():
+            return False, content_hash
+
+        # Same bytes under a new signature: refresh the row and skip
+        self.record(file_path, stat_result, content_hash, row['output_path'], row['status'])
+        return True, content_hash
+
+    def record(self, file_path, stat_result, content_hash: Optional[str],
+               output_path, status: str):
+        """Store the outcome of processing a file"""
+        if content_hash is None and status == 'success':
+            content_hash = hash_file(Path(file_path))
+
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO processed_files
+                    (path, inode, size, mtime_ns, content_hash, output_path, status, processed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    self.key(file_path),
+                    stat_result.st_ino,
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    content_hash,
+                    str(output_path) if output_path else None,
+                    status,
+                    datetime.now().isoformat()
+                ))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def forget(self, file_path):
+        """Drop a file from the index so it is processed again"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('DELETE FROM processed_files WHERE path = ?', (self.key(file_path),))
+                conn.commit()
+            finally:
+                conn.close()
@@ -0,0 +1,308 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.hashing import hash_file, hash_bytes
+
+# Bump when the set of fields the scrubbers remove changes, so cached
+# outputs produced under the old policy are never served again.
+SCRUB_POLICY_VERSION = "1"
+
+CACHE_DIR_ENV = "SCRUB_CACHE_DIR"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """$SCRUB_CACHE_DIR, else comms-shield/scrub under the user cache directory"""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "comms-shield" / "scrub"
+
+
+class ScrubCache:
+    """Content-addressed store of scrubbed outputs with LRU eviction.
+
+    Entries are keyed on a hash of the input bytes, the input suffix (which
+    selects the scrubber), the scrubber version and the scrub policy version.
+    Identical outputs are stored once and handed out as hardlinks when the
+    cache and the destination share a filesystem. Each entry can carry the
+    metadata diff of the scrub that produced it, so a hit can still report
+    which fields were removed.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 policy_version: str = SCRUB_POLICY_VERSION):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "index.db"
+        self.max_bytes = max_bytes
+        self.policy_version = policy_version
+        self._lock = threading.Lock()
+        self.init_database()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a cache from the scrub_cache_* settings of a Config"""
+        return cls(
+            cache_dir=config.get("scrub_cache_dir") or None,
+            max_bytes=int(config.get("scrub_cache_max_mb", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+        )
+
+    def __getstate__(self):
+        # Sent to worker processes as an initializer argument; locks do not pickle
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def init_database(self):
+        """Initialize the SQLite index of cache entries"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS objects (
+                name TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                object TEXT NOT NULL,
+                diff TEXT
+            )
+        ''')
+        # Indexes created before entries carried a diff
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(entries)')}
+        if 'diff' not in columns:
+            cursor.execute('ALTER TABLE entries ADD COLUMN diff TEXT')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_object ON entries(object)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_objects_access ON objects(last_access)')
+        conn.commit()
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    def make_key(self, digest: str, suffix: str, scrubber_version: str) -> str:
+        """Combine an input digest with everything that affects the output"""
+        material = f"{digest}|{suffix.lower()}|{scrubber_version}|{self.policy_version}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def key_for_file(self, input_path: Path, scrubber_version: str, suffix: Optional[str] = None) -> str:
+        return self.make_key(hash_file(input_path), suffix or input_path.suffix, scrubber_version)
+
+    def key_for_bytes(self, data: bytes, suffix: str, scrubber_version: str) -> str:
+        return self.make_key(hash_bytes(data), suffix, scrubber_version)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def _lookup(self, key: str) -> Optional[Path]:
+        """Return the object backing a key, refreshing its LRU position"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute('''
+                    SELECT o.name, o.size FROM entries e
+                    JOIN objects o ON o.name = e.object
+                    WHERE e.key = ?
+                ''', (key,)).fetchone()
+                if not row:
+                    return None
+
+                name, size = row
+                object_path = self.objects_dir / name[:2] / name
+                try:
+                    intact = object_path.stat().st_size == size
+                except OSError:
+                    intact = False
+
+                if not intact:
+                    # The object vanished or was modified through a hardlink
+                    self._drop_object(conn, name)
+                    conn.commit()
+                    return None
+
+                conn.execute('UPDATE objects SET last_access = ? WHERE name = ?', (time.time(), name))
+                conn.commit()
+                return object_path
+            finally:
+                conn.close()
+
+    def fetch(self, key: str, output_path: Path) -> bool:
+        """Materialise a cached output at output_path. Returns False on a miss."""
+        object_path = self._lookup(key)
+        if object_path is None:
+            return False
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_path.exists() or output_path.is_symlink():
+            output_path.unlink()
+        try:
+            os.link(object_path, output_path)
+        except OSError:
+            shutil.copyfile(object_path, output_path)
+        return True
+
+    @staticmethod
+    def detach(output_path: Path, input_path: Optional[Path] = None):
+        """Unlink output_path if it is a hardlink, so rewriting it in place
+        cannot corrupt a cached object it was served from."""
+        output_path = Path(output_path)
+        try:
+            if output_path.stat().st_nlink < 2:
+                return
+            if input_path is not None and os.path.samefile(output_path, input_path):
+                return
+            output_path.unlink()
+        except OSError:
+            pass
+
+    def entry_diff(self, key: str) -> Optional[Dict]:
+        """The metadata diff stored with key, or None if none was recorded"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute('SELECT diff FROM entries WHERE key = ?', (key,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def read_bytes(self, key: str) -> Optional[bytes]:
+        """Return a cached output as bytes, or None on a miss"""
+        object_path = self._lookup(key)
+        if object_path is None:
+            return None
+        return object_path.read_bytes()
+
+    # ------------------------------------------------------------------
+    # Store
+    # ------------------------------------------------------------------
+    def store(self, key: str, output_path: Path, scrubber_version: Optional[str] = None,
+              diff: Optional[Dict] = None):
+        """Record output_path as the scrubbed result for key.
+
+        When scrubber_version is given the output is also registered under its
+        own key, so scrubbing an already scrubbed file is a cache hit instead of
+        a second pass. diff is the scrub's metadata diff (MetadataDiff.to_dict).
+        """
+        output_path = Path(output_path)
+        digest = hash_file(output_path)
+        name = f"{digest}{output_path.suffix.lower()}"
+        object_path = self.objects_dir / name[:2] / name
+
+        if not object_path.exists():
+            object_path.parent.mkdir(exist_ok=True)
+            try:
+                os.link(output_path, object_path)
+            except OSError:
+                tmp_path = object_path.with_name(f".tmp_{os.getpid()}_{threading.get_ident()}_{name}")
+                shutil.copyfile(output_path, tmp_path)
+                os.replace(tmp_path, object_path)
+
+        self._record(name, object_path.stat().st_size,
+                     self._entries(key, diff, digest, output_path.suffix, scrubber_version))
+
+    def store_bytes(self, key: str, data: bytes, suffix: str, scrubber_version: Optional[str] = None,
+                    diff: Optional[Dict] = None):
+        """Record an in-memory scrubbed output for key"""
+        digest = hash_bytes(data)
+        name = f"{digest}{suffix.lower()}"
+        object_path = self.objects_dir / name[:2] / name
+
+        if not object_path.exists():
+            object_path.parent.mkdir(exist_ok=True)
+            tmp_path = object_path.with_name(f".tmp_{os.getpid()}_{threading.get_ident()}_{name}")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, object_path)
+
+        self._record(name, len(data), self._entries(key, diff, digest, suffix, scrubber_version))
+
+    def _entries(self, key: str, diff: Optional[Dict], digest: str, suffix: str,
+                 scrubber_version: Optional[str]) -> Dict[str, Optional[str]]:
+        """Map each key to record to its serialised diff"""
+        entries = {}
+        if scrubber_version:
+            # Re-scrubbing the output removes nothing, so its own key has no diff
+            entries[self.make_key(digest, suffix, scrubber_version)] = None
+        entries[key] = json.dumps(diff) if diff is not None else None
+        return entries
+
+    def _record(self, name: str, size: int, entries: Dict[str, Optional[str]]):
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO objects (name, size, last_access) VALUES (?, ?, ?)
+                ''', (name, size, time.time()))
+                conn.executemany('''
+                    INSERT OR REPLACE INTO entries (key, object, diff) VALUES (?, ?, ?)
+                ''', [(k, name, diff) for k, diff in entries.items()])
+                self._evict(conn)
+                conn.commit()
+            finally:
+                conn.close()
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+    def _drop_object(self, conn, name: str):
+        conn.execute('DELETE FROM entries WHERE object = ?', (name,))
+        conn.execute('DELETE FROM objects WHERE name = ?', (name,))
+        object_path = self.objects_dir / name[:2] / name
+        try:
+            object_path.unlink()
+        except OSError:
+            pass
+
+    def _evict(self, conn):
+        """Drop least recently used objects until the disk budget is met"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM objects').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for name, size in conn.execute('SELECT name, size FROM objects ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._drop_object(conn, name)
+            total -= size
+
+    def clear(self):
+        """Remove every cached output"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                for (name,) in conn.execute('SELECT name FROM objects').fetchall():
+                    self._drop_object(conn, name)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def get_stats(self) -> Dict:
+        """Get entry counts and disk usage"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            objects, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects').fetchone()
+            entries = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'entries': entries,
+            'objects': objects,
+            'total_bytes': total,
+            'max_bytes': self.max_bytes
+        }
@@ -1,10 +1,12 @@
 import argparse
+import io
+import os
 import shutil
+import threading
 from pathlib import Path
 from PIL import Image
 import tempfile  
-import xml.etree.ElementTree as ET 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, BinaryIO, Tuple
 import zipfile
 
 try:
@@ -27,10 +29,76 @@ except ImportError:
     PIKEPDF_AVAILABLE = False
 
 from ..utils.logger import SecureLogger
+from .result_cache import ScrubCache
+from .preflight import preflight, PreflightBudget, PreflightRejected, PreflightReport
+from .archive_scrubber import ArchiveScrubber, archive_suffix
+from .email_scrubber import EmailScrubber
+from .probes import probe, OFFICE_IMAGE_SUFFIXES, OFFICE_METADATA_PARTS
+from .metadata_diff import MetadataDiff, diff_fields
+from .steganalysis import (
+    StegStage, StegResult, StegDetected, randomise_lsbs, POLICY_QUARANTINE, POLICY_SANITISE
+)
+
+# Non-seekable inputs are buffered in memory up to this size before spilling
+# to a temporary file
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+# Earliest timestamp a zip entry can carry
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class ScrubFailed(RuntimeError):
+    """Raised by a strict scrub_file that could not produce scrubbed output"""
+
+
+def stream_suffix(hint: str) -> str:
+    """Normalise a filename or bare suffix hint to a lowercase suffix"""
+    hint = hint or ''
+    if hint.startswith('.') and hint.count('.') == 1:
+        return hint.lower()
+    return Path(hint).suffix.lower()
+
+
+def format_suffix(hint: str) -> str:
+    """Like stream_suffix, but keeps compound archive suffixes such as .tar.gz"""
+    return archive_suffix(hint) or stream_suffix(hint)
+
+
+def is_seekable(stream) -> bool:
+    try:
+        return stream.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def ensure_seekable(stream) -> BinaryIO:
+    """Return stream itself if it supports random access, else a spooled copy"""
+    if is_seekable(stream):
+        return stream
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
 
 class UniversalScrubber:
-    def __init__(self, logger: Optional[SecureLogger] = None):
-        self.logger = logger or SecureLogger()
+    # Part of every result cache key; bump when scrubbing behaviour changes
+    SCRUBBER_VERSION = "universal-scrubber/4"
+
+    def __init__(self, logger: Optional[SecureLogger] = None, cache: Optional[ScrubCache] = None,
+                 use_cache: bool = True, budget: Optional[PreflightBudget] = None,
+                 steg_stage: Optional[StegStage] = None, cache_dir=None):
+        # The logger and cache are created on first use, so building a
+        # scrubber (e.g. for a CLI command that never scrubs) writes nothing
+        self._logger = logger
+        self._cache = cache
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self._lazy_lock = threading.RLock()
+        self.budget = budget or PreflightBudget()
+        self.steg_stage = steg_stage
+        self.archives = ArchiveScrubber(self)
+        self.emails = EmailScrubber(self)
         self.supported_formats = {
             '.jpg': self.scrub_image,
             '.jpeg': self.scrub_image,
@@ -48,27 +116,161 @@ class UniversalScrubber:
             '.m4a': self.scrub_audio_video,
             '.wav': self.scrub_audio_video,
             '.ogg': self.scrub_audio_video,
+            '.eml': self.scrub_email,
+            '.mbox': self.scrub_mbox,
+        }
+        self.supported_formats.update(
+            {suffix: self.scrub_archive for suffix in self.archives.supported_suffixes()}
+        )
+        self.stream_formats = {
+            '.jpg': self.scrub_image_stream,
+            '.jpeg': self.scrub_image_stream,
+            '.png': self.scrub_image_stream,
+            '.tiff': self.scrub_image_stream,
+            '.bmp': self.scrub_image_stream,
+            '.gif': self.scrub_image_stream,
+            '.pdf': self.scrub_pdf_stream,
+            '.docx': self.scrub_office_stream,
+            '.xlsx': self.scrub_office_stream,
+            '.pptx': self.scrub_office_stream,
+            '.mp3': self.scrub_audio_video_stream,
+            '.flac': self.scrub_audio_video_stream,
+            '.mp4': self.scrub_audio_video_stream,
+            '.m4a': self.scrub_audio_video_stream,
+            '.wav': self.scrub_audio_video_stream,
+            '.ogg': self.scrub_audio_video_stream,
+            '.eml': self.emails.scrub_eml_stream,
+            '.mbox': self.emails.scrub_mbox_stream,
         }
+        self.stream_formats.update(
+            {suffix: self.scrub_archive_stream for suffix in self.archives.supported_suffixes()}
+        )
+        # Formats whose failures must never fall back to a plain copy of the input
+        self.fail_closed_formats = set(self.archives.supported_suffixes()) | {'.eml', '.mbox'}
     
-    def scrub_file(self, input_path: Path, output_path: Optional[Path] = None) -> bool:
-        """Scrub metadata from a single file"""
+    @property
+    def logger(self) -> SecureLogger:
+        if self._logger is None:
+            with self._lazy_lock:
+                if self._logger is None:
+                    self._logger = SecureLogger()
+        return self._logger
+
+    @property
+    def cache(self) -> Optional[ScrubCache]:
+        """The result cache under cache_dir, or None when caching is off"""
+        if self._cache is None and self.use_cache:
+            with self._lazy_lock:
+                if self._cache is None and self.use_cache:
+                    try:
+                        self._cache = ScrubCache(self.cache_dir)
+                    except Exception as e:
+                        self.use_cache = False
+                        self.logger.warning(f"Scrub cache disabled: {e}")
+        return self._cache
+
+    def scrub_file(self, input_path: Path, output_path: Optional[Path] = None,
+                   report: Optional[PreflightReport] = None,
+                   fields: Optional[Dict[str, str]] = None, strict: bool = False,
+                   return_diff: bool = False):
+        """Scrub metadata from a single file. report and fields pass on a
+        preflight report or probe() output the caller already has for
+        input_path.
+
+        Returns False when the file was not scrubbed. With strict the
+        failure is raised instead, as scrub_bytes does: PreflightRejected,
+        StegDetected for a quarantined image, otherwise ScrubFailed. With
+        return_diff, returns (result, the scrub's MetadataDiff or None).
+        """
+        success, diff = self._scrub_file(input_path, output_path, report, fields, strict)
+        return (success, diff) if return_diff else success
+
+    def _scrub_file(self, input_path: Path, output_path: Optional[Path], report: Optional[PreflightReport],
+                    fields: Optional[Dict[str, str]], strict: bool) -> Tuple[bool, Optional[MetadataDiff]]:
         try:
             if not input_path.exists():
                 self.logger.error(f"Input file not found: {input_path}")
-                return False
+                if strict:
+                    raise ScrubFailed(f"Input file not found: {input_path.name}")
+                return False, None
             
             output_path = output_path or input_path.parent / f"scrubbed_{input_path.name}"
             
             # Get file extension
-            ext = input_path.suffix.lower()
+            ext = format_suffix(input_path.name)
+            
+            # Refuse files whose headers declare more work than the budget allows
+            report = report or preflight(input_path, budget=self.budget)
+            if report.rejected:
+                op_data = {
+                    'operation': 'scrub_file',
+                    'filename': input_path.name,
+                    'file_type': ext,
+                    'original_size': input_path.stat().st_size,
+                    'status': 'error',
+                    'error_message': '; '.join(report.reasons)
+                }
+                self.logger.error(f"Preflight rejected {input_path.name}", op_data)
+                if strict:
+                    raise PreflightRejected(report)
+                return False, None
+            
+            # Steganalysis runs before the cache lookup, so a cached scrub of
+            # the same bytes can never let a flagged input through
+            steg = self.steg_check(input_path)
+            if steg is not None and steg.flagged and steg.action == POLICY_QUARANTINE:
+                self.steg_stage.quarantine(input_path, steg)
+                op_data = {
+                    'operation': 'scrub_file',
+                    'filename': input_path.name,
+                    'file_type': ext,
+                    'original_size': input_path.stat().st_size,
+                    'status': 'quarantined',
+                    'error_message': steg.summary()
+                }
+                self.logger.warning(f"Quarantined {input_path.name}: {steg.summary()}", op_data)
+                if strict:
+                    raise StegDetected(steg)
+                return False, None
+            sanitise = steg is not None and steg.flagged and steg.action == POLICY_SANITISE
             
-            # Scrub based on file type
-            if ext in self.supported_formats:
+            # Repeat inputs cost one hash pass instead of a full scrub
+            cache_key, hit = (None, False) if sanitise else self.cache_lookup(input_path, output_path)
+            if hit:
+                diff = self.cached_diff(cache_key)
+                op_data = {
+                    'operation': 'scrub_file',
+                    'filename': input_path.name,
+                    'file_type': ext,
+                    'original_size': input_path.stat().st_size,
+                    'scrubbed_size': output_path.stat().st_size,
+                    'metadata_removed': diff.removed_fields() if diff else [],
+                    'status': 'success'
+                }
+                self.logger.info(f"Reused cached scrub result: {input_path.name}", op_data)
+                return True, diff
+            
+            # Probe before scrubbing; with the probe of the output this gives
+            # the removed-field list without a full metadata analysis
+            before = fields if fields is not None else self.probe_fields(input_path)
+            
+            # Scrub based on file type; a flagged image is never copied through
+            if sanitise:
+                success = self._scrub_path(input_path, output_path, self.sanitise_image_stream, "image",
+                                           fail_closed=True)
+            elif ext in self.supported_formats:
                 success = self.supported_formats[ext](input_path, output_path)
             else:
                 # For unsupported formats, make a clean copy
                 success = self.scrub_generic(input_path, output_path)
             
+            diff = None
+            if success and before is not None:
+                diff = diff_fields(before, self.probe_fields(output_path), input_path.name)
+            
+            if success and cache_key:
+                self.cache_store(cache_key, output_path, diff)
+            
             # Log operation
             op_data = {
                 'operation': 'scrub_file',
@@ -76,6 +278,7 @@ class UniversalScrubber:
                 'file_type': ext,
                 'original_size': input_path.stat().st_size,
                 'scrubbed_size': output_path.stat().st_size if success and output_path.exists() else 0,
+                'metadata_removed': diff.removed_fields() if diff else [],
                 'status': 'success' if success else 'error'
             }
             
@@ -83,10 +286,14 @@ class UniversalScrubber:
                 self.logger.info(f"Successfully scrubbed: {input_path.name}", op_data)
             else:
                 self.logger.error(f"Failed to scrub: {input_path.name}", op_data)
+                if strict:
+                    raise ScrubFailed(f"Failed to scrub {input_path.name}")
             
-            return success
+            return success, diff
             
         except Exception as e:
+            if strict and isinstance(e, (PreflightRejected, StegDetected, ScrubFailed)):
+                raise
             op_data = {
                 'operation': 'scrub_file',
                 'filename': input_path.name,
@@ -94,7 +301,73 @@ class UniversalScrubber:
                 'error_message': str(e)
             }
             self.logger.error(f"Error scrubbing {input_path.name}: {str(e)}", op_data)
-            return False
+            if strict:
+                raise
+            return False, None
+    
+    def probe_fields(self, file_path: Path, hint: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Probe a file's metadata fields; None when there is no probe or it fails"""
+        try:
+            return probe(file_path, hint)
+        except Exception as e:
+            self.logger.warning(f"Metadata probe failed for {Path(hint or file_path).name}: {e}")
+            return None
+    
+    def steg_check(self, source, hint: Optional[str] = None) -> Optional[StegResult]:
+        """Run the steganalysis stage on an image, if one is configured.
+
+        Returns None when there is no stage or it skips the format. An image
+        the stage cannot analyse comes back unanalysed, and flagged unless
+        the policy is pass, so it is never scrubbed as if it were clean.
+        """
+        if self.steg_stage is None:
+            return None
+        name = Path(hint or getattr(source, 'name', '') or str(source)).name
+        if not self.steg_stage.applies(name):
+            return None
+        result = self.steg_stage.inspect(source, name)
+        if result is not None:
+            message = f"Steganalysis {name}: {result.summary()}"
+            if result.flagged:
+                self.logger.warning(f"{message}; policy {result.action}")
+            else:
+                self.logger.info(message)
+        return result
+    
+    def cache_lookup(self, input_path: Path, output_path: Path):
+        """Serve output_path from the result cache.
+
+        Returns (key, hit). key is None when caching is disabled or
+        unavailable; on a miss it is the key to store the result under.
+        """
+        if self.cache is None:
+            return None, False
+        try:
+            key = self.cache.key_for_file(input_path, self.SCRUBBER_VERSION, format_suffix(input_path.name))
+            if self.cache.fetch(key, output_path):
+                return key, True
+            self.cache.detach(output_path, input_path)
+            return key, False
+        except Exception as e:
+            self.logger.warning(f"Scrub cache lookup failed for {input_path.name}: {e}")
+            return None, False
+
+    def cached_diff(self, cache_key: str) -> Optional[MetadataDiff]:
+        """The metadata diff recorded with a cache entry, if any"""
+        try:
+            data = self.cache.entry_diff(cache_key)
+        except Exception as e:
+            self.logger.warning(f"Scrub cache diff lookup failed: {e}")
+            return None
+        return MetadataDiff.from_dict(data) if data else None
+    
+    def cache_store(self, cache_key: str, output_path: Path, diff: Optional[MetadataDiff] = None):
+        """Record a fresh scrub result, and its metadata diff, in the result cache"""
+        try:
+            self.cache.store(cache_key, output_path, self.SCRUBBER_VERSION,
+                             diff.to_dict() if diff else None)
+        except Exception as e:
+            self.logger.warning(f"Scrub cache store failed for {output_path.name}: {e}")
     
     def scrub_folder(self, folder_path: Path, output_folder: Optional[Path] = None) -> Dict:
         """Scrub all files in a folder"""
@@ -121,158 +394,296 @@ class UniversalScrubber:
         
         return results
     
-    def scrub_image(self, input_path: Path, output_path: Path) -> bool:
-        """Remove EXIF metadata from images."""
+    # ------------------------------------------------------------------
+    # Stream API
+    # ------------------------------------------------------------------
+    def scrub_stream(self, src: BinaryIO, dst: BinaryIO, hint: str,
+                     steg_result: Optional[StegResult] = None,
+                     report: Optional[PreflightReport] = None, fail_closed: bool = False) -> bool:
+        """Scrub metadata from src into dst.
+
+        hint is a filename or suffix used to pick the format handler. Only
+        handlers that need random access get a seekable copy of src, spooled
+        in memory up to SPOOL_MAX_BYTES. Raises PreflightRejected when the
+        input's headers declare more work than the budget allows, and
+        StegDetected when the steganalysis stage quarantines it (including
+        images it could not analyse). steg_result
+        and report pass on a stage result or preflight report the caller
+        already has.
+
+        A failing handler normally falls back to a plain copy. With
+        fail_closed, for fail_closed_formats, or when sanitising a flagged
+        image, the error is raised instead and nothing is left in dst.
+        """
+        ext = format_suffix(hint)
+        handler = self.stream_formats.get(ext)
+        if handler is None:
+            return self.scrub_generic_stream(src, dst)
+
+        seekable_src = ensure_seekable(src)
+        out = dst if is_seekable(dst) else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            report = report or preflight(seekable_src, hint, self.budget)
+            if report.rejected:
+                raise PreflightRejected(report)
+
+            steg = steg_result or self.steg_check(seekable_src, hint)
+            if steg is not None and steg.flagged:
+                if steg.action == POLICY_QUARANTINE:
+                    self.steg_stage.quarantine(seekable_src, steg)
+                    raise StegDetected(steg)
+                if steg.action == POLICY_SANITISE:
+                    handler = self.sanitise_image_stream
+                    fail_closed = True
+
+            src_start = seekable_src.tell()
+            out_start = out.tell()
+            try:
+                handler(seekable_src, out)
+            except Exception as e:
+                self.logger.error(f"Error scrubbing {hint}: {str(e)}")
+                seekable_src.seek(src_start)
+                out.seek(out_start)
+                out.truncate()
+                if fail_closed or ext in self.fail_closed_formats:
+                    raise
+                if not self.scrub_generic_stream(seekable_src, out):
+                    return False
+
+            if out is not dst:
+                out.seek(0)
+                shutil.copyfileobj(out, dst)
+            return True
+        finally:
+            if seekable_src is not src:
+                seekable_src.close()
+            if out is not dst:
+                out.close()
+
+    def scrub_bytes(self, data: bytes, hint: str, report: Optional[PreflightReport] = None,
+                    fail_closed: bool = False, return_diff: bool = False):
+        """Scrub an in-memory file and return the scrubbed bytes.
+
+        With fail_closed a failing handler raises instead of falling back
+        to a copy of data (see scrub_stream). With return_diff, returns
+        (scrubbed bytes, the scrub's MetadataDiff or None).
+        """
+        ext = format_suffix(hint)
+        name = Path(hint).name
+        op_data = {
+            'operation': 'scrub_bytes',
+            'filename': name,
+            'file_type': ext,
+            'original_size': len(data)
+        }
+
+        # Checked ahead of the cache; flagged inputs are never cached
+        steg = self.steg_check(io.BytesIO(data), hint)
+        flagged = steg is not None and steg.flagged
+
+        cache_key = None
+        if self.cache is not None and not flagged:
+            try:
+                cache_key = self.cache.key_for_bytes(data, ext, self.SCRUBBER_VERSION)
+                cached = self.cache.read_bytes(cache_key)
+                if cached is not None:
+                    diff = self.cached_diff(cache_key)
+                    op_data.update(scrubbed_size=len(cached), status='success',
+                                   metadata_removed=diff.removed_fields() if diff else [])
+                    self.logger.info(f"Reused cached scrub result: {name}", op_data)
+                    return (cached, diff) if return_diff else cached
+            except Exception as e:
+                self.logger.warning(f"Scrub cache lookup failed for {hint}: {e}")
+                cache_key = None
+
+        before = self.probe_fields(io.BytesIO(data), hint)
+        dst = io.BytesIO()
         try:
-            with Image.open(input_path) as img:
-                data = list(img.getdata())
-                clean = Image.new(img.mode, img.size)
-                clean.putdata(data)
-                clean.save(output_path, format=img.format)
+            self.scrub_stream(io.BytesIO(data), dst, hint, steg_result=steg, report=report,
+                              fail_closed=fail_closed)
+        except StegDetected as e:
+            op_data.update(status='quarantined', error_message=e.result.summary())
+            self.logger.warning(f"Quarantined {name}: {e.result.summary()}", op_data)
+            raise
+        except Exception as e:
+            op_data.update(status='error', error_message=str(e))
+            self.logger.error(f"Error scrubbing {name}: {str(e)}", op_data)
+            raise
+        scrubbed = dst.getvalue()
+
+        diff = None
+        if before is not None:
+            diff = diff_fields(before, self.probe_fields(io.BytesIO(scrubbed), hint), name)
+
+        if cache_key:
+            try:
+                self.cache.store_bytes(cache_key, scrubbed, ext, self.SCRUBBER_VERSION,
+                                       diff.to_dict() if diff else None)
+            except Exception as e:
+                self.logger.warning(f"Scrub cache store failed for {hint}: {e}")
+
+        op_data.update(scrubbed_size=len(scrubbed), status='success',
+                       metadata_removed=diff.removed_fields() if diff else [])
+        self.logger.info(f"Successfully scrubbed: {name}", op_data)
+        return (scrubbed, diff) if return_diff else scrubbed
+
+    def _scrub_path(self, input_path: Path, output_path: Path, handler, kind: str,
+                    fail_closed: bool = False) -> bool:
+        """Run a stream handler between two paths.
+
+        Output goes to a temporary sibling first, so scrubbing a file in place
+        never truncates the input before it has been read. If the handler
+        fails the input is copied through, unless fail_closed is set.
+        """
+        tmp_path = output_path.with_name(f".tmp_scrub_{output_path.name}")
+        try:
+            with open(input_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                handler(src, dst)
+            os.replace(tmp_path, output_path)
             return True
         except Exception as e:
-            self.logger.error(f"Error scrubbing image {input_path.name}: {str(e)}")
+            self.logger.error(f"Error scrubbing {kind} {input_path.name}: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            if fail_closed:
+                return False
             return self.scrub_generic(input_path, output_path)
+
+    # ------------------------------------------------------------------
+    # Format handlers
+    # ------------------------------------------------------------------
+    def scrub_image(self, input_path: Path, output_path: Path) -> bool:
+        """Remove EXIF metadata from images."""
+        return self._scrub_path(input_path, output_path, self.scrub_image_stream, "image")
+
+    def scrub_image_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Re-encode only the pixel data, dropping EXIF, XMP and text chunks."""
+        with Image.open(src) as img:
+            clean = Image.new(img.mode, img.size)
+            clean.frombytes(img.tobytes())
+            if img.mode == 'P':
+                clean.putpalette(img.getpalette())
+            clean.save(dst, format=img.format)
+
+    def sanitise_image_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Re-encode the pixels with randomised LSBs, destroying an LSB payload."""
+        with Image.open(src) as img:
+            randomise_lsbs(img).save(dst, format=img.format)
     
     def scrub_audio_video(self, input_path: Path, output_path: Path) -> bool:
         """Remove metadata from audio/video (MP3, MP4, etc.)."""
+        return self._scrub_path(input_path, output_path, self.scrub_audio_video_stream, "audio/video")
+
+    def scrub_audio_video_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Strip tags from a working copy; mutagen rewrites files in place."""
         if not MUTAGEN_AVAILABLE:
-            self.logger.warning(f"Mutagen not available, using generic scrub for {input_path.name}")
-            return self.scrub_generic(input_path, output_path)
-            
-        try:
-            media = MutagenFile(input_path, easy=True)
+            self.logger.warning("Mutagen not available, using generic scrub")
+            self.scrub_generic_stream(src, dst)
+            return
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as work:
+            shutil.copyfileobj(src, work)
+            work.seek(0)
+            media = MutagenFile(work, easy=True)
             if media:
-                media.delete()  # remove tags
-                media.save()
-            shutil.copy(input_path, output_path)
-            return True
-        except Exception as e:
-            self.logger.error(f"Error scrubbing audio/video {input_path.name}: {str(e)}")
-            return self.scrub_generic(input_path, output_path)
+                work.seek(0)
+                media.delete(work)  # remove tags
+            work.seek(0)
+            shutil.copyfileobj(work, dst)
     
-    def scrub_docx_images(self, docx_path: Path, temp_dir: Path):
-        """Scrub metadata from images embedded in DOCX."""
-        try:
-            media_dir = temp_dir / 'word' / 'media'
-            if media_dir.exists():
-                for img_file in media_dir.glob('*.*'):
-                    if img_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.tiff', '.bmp']:
-                        try:
-                            self.scrub_image(img_file, img_file)
-                            self.logger.info(f"Scrubbed embedded image: {img_file.name}")
-                        except Exception as e:
-                            self.logger.warning(f"Failed to scrub embedded image {img_file}: {e}")
-            
-            # Also check for images in headers/footers
-            for rels_dir in temp_dir.glob('**/rels'):
-                for rels_file in rels_dir.glob('*.rels'):
-                    try:
-                        tree = ET.parse(rels_file)
-                        root = tree.getroot()
-                        # You could parse relationships to find embedded images here
-                        # This is a simplified version
-                    except:
-                        pass
-                        
-        except Exception as e:
-            self.logger.warning(f"DOCX image scrub failed: {e}")
-
-    def scrub_pdf_images(self, pdf_path: Path):
-        """Remove metadata from images embedded in PDF."""
-        if not PIKEPDF_AVAILABLE:
-            return None
-            
-        try:
-            with pikepdf.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    if '/Resources' in page and '/XObject' in page.Resources:
-                        xobjects = page.Resources.XObject
-                        for obj_name in xobjects:
-                            xobj = xobjects[obj_name]
-                            if xobj.Subtype == '/Image':
-                                # Remove image metadata by recompressing
-                                if '/Metadata' in xobj:
-                                    del xobj.Metadata
-                                # You can add more specific image metadata removal here
-                return pdf
-        except Exception as e:
-            self.logger.warning(f"PDF image scrub failed: {e}")
-            return None       
+    def scrub_pdf_images(self, pdf):
+        """Remove metadata from images embedded in an open PDF."""
+        for page in pdf.pages:
+            if '/Resources' in page and '/XObject' in page.Resources:
+                xobjects = page.Resources.XObject
+                for obj_name in list(xobjects.keys()):
+                    xobj = xobjects[obj_name]
+                    if xobj.Subtype == '/Image':
+                        # Remove image metadata by recompressing
+                        if '/Metadata' in xobj:
+                            del xobj.Metadata
+                        # You can add more specific image metadata removal here
     
     def scrub_pdf(self, input_path: Path, output_path: Path) -> bool:
         """Remove metadata from PDFs including embedded images."""
+        return self._scrub_path(input_path, output_path, self.scrub_pdf_stream, "PDF")
+
+    def scrub_pdf_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Remove document info, XMP, embedded files and image metadata in one pass."""
         if not PIKEPDF_AVAILABLE:
-            self.logger.warning(f"pikepdf not available, using generic scrub for {input_path.name}")
-            return self.scrub_generic(input_path, output_path)
+            self.logger.warning("pikepdf not available, using generic scrub")
+            self.scrub_generic_stream(src, dst)
+            return
+
+        with pikepdf.open(src) as pdf:
+            # Remove all metadata
+            if '/Metadata' in pdf.Root:
+                del pdf.Root.Metadata
             
-        try:
-            # First pass: remove PDF metadata
-            with pikepdf.open(input_path) as pdf:
-                # Remove all metadata
-                if '/Metadata' in pdf.Root:
-                    del pdf.Root.Metadata
-                
-                # Remove producer and creator info
-                if '/Producer' in pdf.docinfo:
-                    del pdf.docinfo.Producer
-                if '/Creator' in pdf.docinfo:
-                    del pdf.docinfo.Creator
-                if '/CreationDate' in pdf.docinfo:
-                    del pdf.docinfo.CreationDate
-                if '/ModDate' in pdf.docinfo:
-                    del pdf.docinfo.ModDate
-                
-                # Remove embedded files
-                if '/Names' in pdf.Root and '/EmbeddedFiles' in pdf.Root.Names:
-                    del pdf.Root.Names.EmbeddedFiles
-                
-                # Use this instead of minimize=True for older pikepdf versions
-                pdf.save(output_path, encryption=False, object_stream_mode=pikepdf.ObjectStreamMode.disable)
+            # Remove all docinfo entries
+            for key in list(pdf.docinfo.keys()):
+                del pdf.docinfo[key]
             
-            # Second pass: scrub embedded images
-            scrubbed_pdf = self.scrub_pdf_images(output_path)
-            if scrubbed_pdf:
-                scrubbed_pdf.save(output_path, encryption=False)
-                
-            return True
+            # Remove embedded files
+            if '/Names' in pdf.Root and '/EmbeddedFiles' in pdf.Root.Names:
+                del pdf.Root.Names.EmbeddedFiles
             
-        except Exception as e:
-            self.logger.error(f"PDF scrub failed: {e}")
-            return self.scrub_generic(input_path, output_path)
+            self.scrub_pdf_images(pdf)
+            
+            # Use this instead of minimize=True for older pikepdf versions
+            pdf.save(dst, encryption=False, object_stream_mode=pikepdf.ObjectStreamMode.disable)
     
     def scrub_office(self, input_path: Path, output_path: Path) -> bool:
         """Remove metadata from Office docs including embedded images."""
-        try:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                tmpdir_path = Path(tmpdir)
-                
-                # Extract DOCX
-                with zipfile.ZipFile(input_path, "r") as zin:
-                    zin.extractall(tmpdir)
+        return self._scrub_path(input_path, output_path, self.scrub_office_stream, "Office document")
 
+    def scrub_office_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Rewrite an Office package member by member, without extracting it."""
+        with zipfile.ZipFile(src, "r") as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
                 # Remove core metadata files
-                for meta_file in ["docProps/core.xml", "docProps/app.xml", "docProps/custom.xml"]:
-                    target = tmpdir_path / meta_file
-                    if target.exists():
-                        target.unlink()
-
-                # Scrub embedded images
-                self.scrub_docx_images(input_path, tmpdir_path)
-
-                # Create new DOCX
-                with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
-                    for file in tmpdir_path.rglob("*"):
-                        if file.is_file():
-                            arcname = file.relative_to(tmpdir_path)
-                            zout.write(file, arcname)
-                
-                return True
-                
-        except Exception as e:
-            self.logger.error(f"Office document scrub failed: {e}")
-            return self.scrub_generic(input_path, output_path)
+                if info.is_dir() or info.filename in OFFICE_METADATA_PARTS:
+                    continue
+
+                # Member timestamps record when the document was last saved
+                clean_info = zipfile.ZipInfo(info.filename, date_time=ZIP_EPOCH)
+                clean_info.compress_type = zipfile.ZIP_DEFLATED
+
+                suffix = Path(info.filename).suffix.lower()
+                if '/media/' in info.filename and suffix in OFFICE_IMAGE_SUFFIXES:
+                    # Scrub embedded images
+                    data = zin.read(info)
+                    try:
+                        cleaned = io.BytesIO()
+                        self.scrub_image_stream(io.BytesIO(data), cleaned)
+                        data = cleaned.getvalue()
+                        self.logger.info(f"Scrubbed embedded image: {info.filename}")
+                    except Exception as e:
+                        self.logger.warning(f"Failed to scrub embedded image {info.filename}: {e}")
+                    zout.writestr(clean_info, data)
+                else:
+                    with zin.open(info) as member, zout.open(clean_info, "w") as out:
+                        shutil.copyfileobj(member, out)
     
+    def scrub_archive(self, input_path: Path, output_path: Path) -> bool:
+        """Scrub every member of a zip, tar or 7z archive."""
+        return self._scrub_path(input_path, output_path, self.scrub_archive_stream, "archive",
+                                fail_closed=True)
+
+    def scrub_archive_stream(self, src: BinaryIO, dst: BinaryIO):
+        """Rewrite an archive member by member; see ArchiveScrubber."""
+        self.archives.scrub_stream(src, dst)
+
+    def scrub_email(self, input_path: Path, output_path: Path) -> bool:
+        """Sanitise email headers and scrub attachments."""
+        return self._scrub_path(input_path, output_path, self.emails.scrub_eml_stream, "email",
+                                fail_closed=True)
+
+    def scrub_mbox(self, input_path: Path, output_path: Path) -> bool:
+        """Sanitise every message in an mbox mailbox."""
+        return self._scrub_path(input_path, output_path, self.emails.scrub_mbox_stream, "mailbox",
+                                fail_closed=True)
+
     def scrub_generic(self, input_path: Path, output_path: Path) -> bool:
         """Fallback scrubber - just copies file."""
         try:
@@ -281,6 +692,15 @@ class UniversalScrubber:
         except Exception as e:
             self.logger.error(f"Generic scrub failed for {input_path.name}: {str(e)}")
             return False
+
+    def scrub_generic_stream(self, src: BinaryIO, dst: BinaryIO) -> bool:
+        """Fallback stream scrubber - just copies bytes."""
+        try:
+            shutil.copyfileobj(src, dst)
+            return True
+        except Exception as e:
+            self.logger.error(f"Generic stream scrub failed: {str(e)}")
+            return False
     
     def get_supported_formats(self) -> List[str]:
         """Get list of supported file formats"""
@@ -0,0 +1,185 @@
+import re
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .metadata_diff import flatten_report
+
+SEVERITY_WEIGHTS = {'high': 40, 'medium': 15, 'low': 5}
+
+# Score at or above which a file is rated high / medium risk
+HIGH_RISK_SCORE = 60
+MEDIUM_RISK_SCORE = 20
+MAX_SCORE = 100
+
+# Only the start of a value is scanned; thumbnails and XMP packets are long
+MAX_SCAN_CHARS = 4096
+
+# Values up to this length are memoised; short values ('1', 'Normal',
+# 'present', dates) repeat across almost every file
+MAX_CACHED_VALUE_CHARS = 128
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One sensitivity pattern, matched against field names or values"""
+    name: str
+    category: str
+    severity: str
+    pattern: str
+    target: str = 'value'  # 'name' or 'value'
+
+
+DEFAULT_RULES = (
+    # Location
+    Rule('gps', 'location', 'high', r'\bGPS|Latitude|Longitude|GPSPosition', 'name'),
+    Rule('coordinates', 'location', 'high',
+         r'[-+]?\d{1,2}\.\d{4,}\s*,\s*[-+]?\d{1,3}\.\d{4,}', 'value'),
+    # Device identity
+    Rule('serial_number', 'device', 'high', r'Serial|SerialNumber|IMEI|UniqueCameraModel|ImageUniqueID', 'name'),
+    Rule('device_model', 'device', 'low', r'(?:^|:)(?:Make|Model|LensModel|LensMake)$', 'name'),
+    # People
+    Rule('author', 'identity', 'medium',
+         r'Author|Artist|Creator(?!Tool)|LastModifiedBy|Owner|Copyright|lastModifiedBy|dc:creator', 'name'),
+    Rule('email_address', 'identity', 'medium', r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+', 'value'),
+    Rule('user_path', 'identity', 'high',
+         r'(?:/home/|/Users/|[A-Za-z]:\\(?:Users|Documents and Settings)\\)[^/\\\s]+', 'value'),
+    # Network
+    Rule('routing_header', 'network', 'high', r'Received|X-Originating-IP', 'name'),
+    Rule('ip_address', 'network', 'high', r'\b(?:\d{1,3}\.){3}\d{1,3}\b', 'value'),
+    Rule('internal_hostname', 'network', 'medium',
+         r'\b[\w-]+\.(?:local|lan|corp|internal|intranet|localdomain)\b', 'value'),
+    Rule('unc_path', 'network', 'medium', r'\\\\[\w.-]+\\', 'value'),
+    # Software
+    Rule('software', 'software', 'low',
+         r'Software|Producer|CreatorTool|Application|AppVersion|User-Agent|X-Mailer|Encoder', 'name'),
+    Rule('software_version', 'software', 'medium', r'\b\d+\.\d+(?:\.\d+)+\b', 'value'),
+    # Time
+    Rule('timestamp', 'time', 'low', r'DateTimeOriginal|DateTimeDigitized|CreateDate|CreationDate|ModDate', 'name'),
+)
+
+
+@dataclass
+class Finding:
+    """A rule that matched one metadata field"""
+    field: str
+    rule: str
+    category: str
+    severity: str
+    match: str
+
+
+@dataclass
+class SensitivityReport:
+    """Risk score (0-100) for one file's metadata, with the matching fields"""
+    name: str
+    score: int = 0
+    level: str = 'none'
+    findings: List[Finding] = field(default_factory=list)
+    fields_scanned: int = 0
+
+    @property
+    def high_risk_fields(self) -> List[str]:
+        return sorted({f.field for f in self.findings if f.severity == 'high'})
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['high_risk_fields'] = self.high_risk_fields
+        return data
+
+    def render_text(self) -> str:
+        lines = [f"{self.name}: risk {self.level.upper()} (score {self.score})"]
+        lines.extend(f"  [{f.severity}] {f.field}: {f.rule} ({f.match})" for f in self.findings)
+        return "\n".join(lines)
+
+
+def _combine(rules: Iterable[Tuple[int, Rule]]) -> Optional[Pattern]:
+    """Join rule patterns into one alternation with a named group per rule"""
+    parts = [f"(?P<r{index}>{rule.pattern})" for index, rule in rules]
+    return re.compile("|".join(parts)) if parts else None
+
+
+class SensitivityEngine:
+    """Scores metadata fields against a precompiled rule set.
+
+    All name rules are compiled into a single alternation, and so are all
+    value rules, so each field costs at most two regex scans however many
+    rules there are. Field names and short values repeat heavily across
+    files, so their matches are memoised.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = DEFAULT_RULES):
+        self.rules = tuple(rules)
+        indexed = list(enumerate(self.rules))
+        self._name_re = _combine((i, r) for i, r in indexed if r.target == 'name')
+        self._value_re = _combine((i, r) for i, r in indexed if r.target == 'value')
+        self._name_matches = lru_cache(maxsize=4096)(self._scan_name)
+        self._short_value_matches = lru_cache(maxsize=65536)(self._scan_value)
+
+    def _matches(self, pattern: Optional[Pattern], text: str) -> List[Tuple[int, str]]:
+        if pattern is None:
+            return []
+        found = {}
+        for match in pattern.finditer(text):
+            index = int(match.lastgroup[1:])
+            found.setdefault(index, match.group())
+        return list(found.items())
+
+    def _scan_name(self, name: str) -> Tuple[Tuple[int, str], ...]:
+        return tuple(self._matches(self._name_re, name))
+
+    def _scan_value(self, value: str) -> Tuple[Tuple[int, str], ...]:
+        return tuple(self._matches(self._value_re, value))
+
+    def _value_matches(self, value: str) -> Tuple[Tuple[int, str], ...]:
+        if len(value) <= MAX_CACHED_VALUE_CHARS:
+            return self._short_value_matches(value)
+        return self._scan_value(value[:MAX_SCAN_CHARS])
+
+    def scan_fields(self, fields: Optional[Dict[str, Any]], name: str = '') -> SensitivityReport:
+        """Score a flat {field: value} map, e.g. probe() output"""
+        report = SensitivityReport(name=name)
+        if not fields:
+            return report
+        matched_rules = set()
+        for key, value in fields.items():
+            key = str(key)
+            text = value if isinstance(value, str) else str(value)
+            hits = list(self._name_matches(key))
+            hits.extend(self._value_matches(text))
+            for index, matched in hits:
+                rule = self.rules[index]
+                matched_rules.add(index)
+                report.findings.append(Finding(key, rule.name, rule.category, rule.severity, matched[:80]))
+        report.fields_scanned = len(fields)
+
+        # Each rule counts once per file, so 40 EXIF date fields do not add up
+        score = sum(SEVERITY_WEIGHTS[self.rules[i].severity] for i in matched_rules)
+        report.score = min(score, MAX_SCORE)
+        if report.score >= HIGH_RISK_SCORE or any(f.severity == 'high' for f in report.findings):
+            report.level = 'high'
+        elif report.score >= MEDIUM_RISK_SCORE:
+            report.level = 'medium'
+        elif report.score > 0:
+            report.level = 'low'
+        return report
+
+    def scan_report(self, report) -> SensitivityReport:
+        """Score an analyzer MetadataReport"""
+        return self.scan_fields(flatten_report(report), report.name)
+
+
+_default_engine = None
+
+
+def get_sensitivity_engine() -> SensitivityEngine:
+    """Return the shared engine built from DEFAULT_RULES"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SensitivityEngine()
+    return _default_engine
+
+
+def score_fields(fields: Optional[Dict[str, Any]], name: str = '') -> SensitivityReport:
+    """Score a flat field map with the default rules"""
+    return get_sensitivity_engine().scan_fields(fields, name)
@@ -0,0 +1,347 @@
+import asyncio
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from .scrubber import UniversalScrubber
+from .isolation import (
+    IsolatedExecutor, DEFAULT_TIMEOUT, DEFAULT_MEMORY_LIMIT_MB, DEFAULT_CPU_LIMIT
+)
+from .preflight import preflight, PreflightBudget, PreflightRejected
+from .result_cache import ScrubCache
+from .steganalysis import StegStage
+from ..utils.config import Config
+
+# Jobs in the constrained lane run one (or a few) at a time, so they get a
+# longer wall-clock allowance than the interactive lane
+CONSTRAINED_TIMEOUT_FACTOR = 4
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the job queue is full and the caller chose not to wait"""
+
+
+# Each worker process builds its own scrubber once, instead of pickling one
+# (with its logger and cache handles) for every job.
+_process_scrubber = None
+
+
+def _init_process_scrubber(budget: Optional[PreflightBudget] = None, steg_stage: Optional[StegStage] = None,
+                           cache: Optional[ScrubCache] = None):
+    global _process_scrubber
+    _process_scrubber = UniversalScrubber(budget=budget, steg_stage=steg_stage, cache=cache)
+
+
+def _setting(config, key: str, env: str, cast, default):
+    """A Config value, overridden by its environment variable from setup.md"""
+    raw = os.environ.get(env)
+    if raw:
+        return cast(raw)
+    value = config.get(key)
+    return default if value is None else value
+
+
+def _process_scrub_file(input_path: Path, output_path: Optional[Path], report=None, fields=None,
+                        strict: bool = False, return_diff: bool = False):
+    return _process_scrubber.scrub_file(input_path, output_path, report, fields, strict, return_diff)
+
+
+def _process_scrub_bytes(data: bytes, hint: str, report=None, fail_closed: bool = False,
+                         return_diff: bool = False):
+    return _process_scrubber.scrub_bytes(data, hint, report, fail_closed, return_diff)
+
+
+class ScrubService:
+    """Capacity-controlled scrub engine shared by every front-end.
+
+    Jobs run on a thread, process or isolated worker pool of max_workers. At
+    most max_pending jobs may be queued or running at once; submit() blocks
+    (or raises ServiceBusy) beyond that, which pushes back on bursty
+    producers instead of oversubscribing the CPU.
+
+    With isolated=True every job runs in a reusable worker process capped by
+    timeout (wall clock), memory_limit_mb (RLIMIT_AS) and cpu_limit
+    (RLIMIT_CPU); see IsolatedExecutor.
+
+    Every job is preflighted first. Files whose headers exceed the budget
+    are rejected without using a slot, and files that declare heavy work
+    go to a separate constrained lane of constrained_workers, so they
+    cannot crowd out small interactive jobs.
+
+    With a steg_stage, images are screened for hidden data before they
+    are scrubbed; see StegStage.
+    """
+
+    def __init__(self, scrubber: Optional[UniversalScrubber] = None, max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, use_processes: bool = False,
+                 isolated: bool = False, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+                 cpu_limit: Optional[int] = DEFAULT_CPU_LIMIT,
+                 budget: Optional[PreflightBudget] = None, constrained_workers: int = 1,
+                 steg_stage: Optional[StegStage] = None, cache: Optional[ScrubCache] = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self.use_processes = use_processes
+        self.isolated = isolated
+        self.budget = budget or PreflightBudget()
+        self.constrained_workers = constrained_workers
+        # Isolated workers die past memory_limit_mb; refuse to decode images
+        # that could not fit rather than lose the worker mid-analysis
+        if steg_stage is not None and isolated and memory_limit_mb:
+            steg_stage = steg_stage.within_memory(memory_limit_mb)
+        self.steg_stage = steg_stage
+        self.cache = cache
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._futures = set()
+        self._futures_lock = threading.Lock()
+        self._closed = False
+
+        if isolated or use_processes:
+            self.scrubber = None
+            self._scrub_file = _process_scrub_file
+            self._scrub_bytes = _process_scrub_bytes
+        else:
+            self.scrubber = scrubber or UniversalScrubber(budget=self.budget, steg_stage=steg_stage, cache=cache)
+            self._scrub_file = self.scrubber.scrub_file
+            self._scrub_bytes = self.scrubber.scrub_bytes
+
+        limits = {'memory_limit_mb': memory_limit_mb, 'cpu_limit': cpu_limit}
+        self._executor = self._make_executor(self.max_workers, timeout, limits)
+        self._constrained_executor = self._make_executor(
+            constrained_workers,
+            timeout * CONSTRAINED_TIMEOUT_FACTOR if timeout else timeout,
+            {'memory_limit_mb': memory_limit_mb,
+             'cpu_limit': cpu_limit * CONSTRAINED_TIMEOUT_FACTOR if cpu_limit else cpu_limit}
+        )
+
+    def _make_executor(self, workers: int, timeout: Optional[float], limits: Dict):
+        if self.isolated:
+            return IsolatedExecutor(
+                max_workers=workers, timeout=timeout, initializer=_init_process_scrubber,
+                initargs=(self.budget, self.steg_stage, self.cache), **limits
+            )
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=workers, initializer=_init_process_scrubber,
+                                       initargs=(self.budget, self.steg_stage, self.cache))
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrub")
+
+    @classmethod
+    def from_config(cls, config, scrubber: Optional[UniversalScrubber] = None):
+        """Build a service from the scrub_*, preflight_* and steg_* settings of
+        a Config. SCRUB_TIMEOUT, SCRUB_MEMORY_LIMIT_MB, SCRUB_CPU_LIMIT and
+        STEG_STAGE override the matching keys when set."""
+        return cls(
+            scrubber=scrubber,
+            max_workers=config.get("scrub_workers"),
+            max_pending=config.get("scrub_max_pending"),
+            use_processes=config.get("scrub_use_processes", False),
+            isolated=config.get("scrub_isolated", True),
+            timeout=_setting(config, "scrub_timeout_s", "SCRUB_TIMEOUT", float, DEFAULT_TIMEOUT),
+            memory_limit_mb=_setting(config, "scrub_memory_limit_mb", "SCRUB_MEMORY_LIMIT_MB",
+                                     int, DEFAULT_MEMORY_LIMIT_MB),
+            cpu_limit=_setting(config, "scrub_cpu_limit_s", "SCRUB_CPU_LIMIT", int, DEFAULT_CPU_LIMIT),
+            budget=PreflightBudget.from_config(config),
+            constrained_workers=config.get("scrub_constrained_workers", 1),
+            steg_stage=StegStage.from_env() or StegStage.from_config(config),
+            cache=ScrubCache.from_config(config)
+        )
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+    def _acquire_slot(self, block: bool, timeout: Optional[float]):
+        if self._closed:
+            raise RuntimeError("ScrubService has been shut down")
+        acquired = self._slots.acquire(timeout=timeout) if block else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise ServiceBusy(f"Scrub queue is full ({self.max_pending} pending jobs)")
+
+    def _preflight(self, source, hint: Optional[str] = None):
+        """Header-only budget check; None when the file cannot be read"""
+        try:
+            return preflight(source, hint, self.budget)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _rejected(report) -> Future:
+        future = Future()
+        future.preflight = report
+        future.set_exception(PreflightRejected(report))
+        return future
+
+    def _dispatch(self, report, fn, *args) -> Future:
+        executor = self._executor
+        if report is not None and report.constrained:
+            executor = self._constrained_executor
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        # Expose the declared-work numbers to callers as scheduling hints
+        future.preflight = report
+
+        with self._futures_lock:
+            self._futures.add(future)
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future: Future):
+        with self._futures_lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def submit(self, input_path, output_path=None, block: bool = True,
+               timeout: Optional[float] = None, fields: Optional[Dict[str, str]] = None,
+               strict: bool = False, return_diff: bool = False) -> Future:
+        """Queue a file for scrubbing. The future resolves to scrub_file's result.
+
+        fields passes on probe() output the caller already has for input_path.
+        With strict the future raises on failure instead of resolving to
+        False, like submit_bytes; with return_diff it resolves to (result,
+        MetadataDiff or None). See UniversalScrubber.scrub_file.
+        """
+        input_path = Path(input_path)
+        report = self._preflight(input_path)
+        if report is not None and report.rejected:
+            return self._rejected(report)
+
+        self._acquire_slot(block, timeout)
+        # The report travels with the job so the worker does not preflight again
+        return self._dispatch(
+            report, self._scrub_file, input_path, Path(output_path) if output_path else None, report, fields,
+            strict, return_diff
+        )
+
+    def submit_bytes(self, data: bytes, hint: str, block: bool = True,
+                     timeout: Optional[float] = None, return_diff: bool = False) -> Future:
+        """Queue an in-memory file. The future resolves to the scrubbed bytes,
+        or with return_diff to (bytes, MetadataDiff or None)."""
+        report = self._preflight(io.BytesIO(data), hint)
+        if report is not None and report.rejected:
+            return self._rejected(report)
+
+        self._acquire_slot(block, timeout)
+        return self._dispatch(report, self._scrub_bytes, data, hint, report, False, return_diff)
+
+    def map(self, input_paths: Iterable, output_paths: Optional[Iterable] = None,
+            timeout: Optional[float] = None) -> Iterator[bool]:
+        """Scrub many files, yielding results in input order.
+
+        Submission is lazy: no more than max_pending jobs from this call are
+        in flight, so arbitrarily long inputs never flood the queue.
+        """
+        outputs = iter(output_paths) if output_paths is not None else None
+        pending = deque()
+        for input_path in input_paths:
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result(timeout)
+            output_path = next(outputs) if outputs is not None else None
+            pending.append(self.submit(input_path, output_path))
+        while pending:
+            yield pending.popleft().result(timeout)
+
+    async def scrub(self, input_path, output_path=None) -> bool:
+        """asyncio-friendly scrub. Cancelling the awaiting task cancels the job
+        if it has not started yet."""
+        loop = asyncio.get_running_loop()
+        # submit() may block for backpressure, so keep it off the event loop
+        future = await loop.run_in_executor(None, self.submit, input_path, output_path)
+        return await asyncio.wrap_future(future)
+
+    async def scrub_bytes(self, data: bytes, hint: str) -> bytes:
+        """asyncio-friendly scrub of an in-memory file"""
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(None, self.submit_bytes, data, hint)
+        return await asyncio.wrap_future(future)
+
+    # ------------------------------------------------------------------
+    # Batch helpers
+    # ------------------------------------------------------------------
+    def scrub_folder(self, folder_path: Path, output_folder: Optional[Path] = None) -> Dict:
+        """Scrub all files in a folder across the pool"""
+        results = {
+            'total': 0,
+            'successful': 0,
+            'failed': 0,
+            'failed_files': []
+        }
+
+        output_folder = output_folder or folder_path / "scrubbed"
+        output_folder.mkdir(exist_ok=True)
+
+        files = [p for p in folder_path.glob('*') if p.is_file() and not p.name.startswith('scrubbed_')]
+        outputs = [output_folder / f"scrubbed_{p.name}" for p in files]
+
+        for file_path, success in zip(files, self.map(files, outputs)):
+            results['total'] += 1
+            if success:
+                results['successful'] += 1
+            else:
+                results['failed'] += 1
+                results['failed_files'].append(file_path.name)
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def cancel_pending(self) -> int:
+        """Cancel every job that has not started yet. Returns how many were cancelled."""
+        with self._futures_lock:
+            futures = list(self._futures)
+        return sum(1 for future in futures if future.cancel())
+
+    def get_status(self) -> Dict:
+        """Get pool size and current load"""
+        with self._futures_lock:
+            in_flight = len(self._futures)
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'in_flight': in_flight,
+            'use_processes': self.use_processes,
+            'isolated': self.isolated,
+            'constrained_workers': self.constrained_workers,
+            'steg_policy': self.steg_stage.policy if self.steg_stage else None,
+            'closed': self._closed
+        }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting jobs and release the pool"""
+        self._closed = True
+        if cancel_pending:
+            self.cancel_pending()
+        self._executor.shutdown(wait=wait)
+        self._constrained_executor.shutdown(wait=wait)
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_scrub_service() -> ScrubService:
+    """Return the process-wide service, creating it on first use.
+
+    The default service is built from config.json (see ScrubService.from_config)
+    and by default isolates jobs in resource-capped worker processes, so a
+    pathological file cannot stall the HTTP server or the watcher.
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = ScrubService.from_config(Config())
+        return _default_service
+
+
+def set_scrub_service(service: ScrubService):
+    """Install a custom-configured service as the process-wide default"""
+    global _default_service
+    with _default_service_lock:
+        _default_service = service
@@ -0,0 +1,947 @@
+# Keep this module free of package-relative imports: stegscan.py loads it by
+# file path so batch workers do not import all of src.core
+import copy
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+# Rows per tile are chosen so one tile holds about this many bytes
+TILE_BYTES = 8 * 1024 * 1024
+
+# Images over a pixel budget are sampled as this many evenly spaced bands;
+# a band needs three rows for the WS predictor
+SAMPLE_BANDS = 16
+SAMPLE_MIN_ROWS = 3
+
+# analyze() reads images up to this size, past PIL's decompression-bomb
+# limit (about 179 megapixels); its statistics are accumulated in tiles
+ANALYZE_MAX_PIXELS = 400_000_000
+_open_lock = threading.Lock()
+
+
+# -----------------------------
+# Tiled image reading
+# -----------------------------
+def tile_rows_for(width, channels, tile_bytes=TILE_BYTES):
+    return max(1, tile_bytes // max(1, width * channels))
+
+
+def open_image(path, max_pixels=ANALYZE_MAX_PIXELS):
+    """Image.open with PIL's decompression-bomb limit replaced by max_pixels.
+
+    PIL checks its limit, a module global, only while opening, so the global
+    is raised (never disabled) just for that call and the cap is enforced
+    here instead.
+    """
+    with _open_lock:
+        saved = Image.MAX_IMAGE_PIXELS
+        if saved is not None:
+            Image.MAX_IMAGE_PIXELS = max(saved, max_pixels)
+        try:
+            img = Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = saved
+    pixels = img.width * img.height
+    if pixels > max_pixels:
+        img.close()
+        raise Image.DecompressionBombError(
+            f"Image size ({pixels} pixels) exceeds the {max_pixels} pixel analysis limit")
+    return img
+
+
+def iter_tiles(img, tile_rows=None):
+    """Yield the image as uint8 arrays of whole rows, top to bottom.
+
+    Each tile is cropped and converted on its own, so only one tile-sized
+    array exists at a time, whatever the image size.
+    """
+    target = img.mode if img.mode in ("RGB", "L") else "RGB"
+    width, height = img.size
+    tile_rows = tile_rows or tile_rows_for(width, 1 if target == "L" else 3)
+    for top in range(0, height, tile_rows):
+        tile = img.crop((0, top, width, min(height, top + tile_rows)))
+        if tile.mode != target:
+            tile = tile.convert(target)
+        yield np.asarray(tile, dtype=np.uint8)
+
+
+def iter_bands(img, max_pixels=None, tile_rows=None):
+    """Yield (top, tile) over at most max_pixels of the image.
+
+    Images within the budget are read whole, as by iter_tiles. Larger ones
+    are sampled as SAMPLE_BANDS evenly spaced bands of whole rows, so the
+    NumPy work of a pass is bounded whatever the image size. Memory is not:
+    PIL decodes the whole image on the first crop, so callers that need a
+    memory bound must refuse oversized images up front (see
+    StegStage.max_decode_pixels).
+    """
+    width, height = img.size
+    budget_rows = height if max_pixels is None else max(SAMPLE_MIN_ROWS, max_pixels // max(1, width))
+    if budget_rows >= height:
+        top = 0
+        for tile in iter_tiles(img, tile_rows):
+            yield top, tile
+            top += tile.shape[0]
+        return
+    target = img.mode if img.mode in ("RGB", "L") else "RGB"
+    band_rows = max(SAMPLE_MIN_ROWS, budget_rows // SAMPLE_BANDS)
+    bands = max(1, budget_rows // band_rows)
+    for top in sorted(set(np.linspace(0, height - band_rows, bands).astype(int).tolist())):
+        tile = img.crop((0, top, width, top + band_rows))
+        if tile.mode != target:
+            tile = tile.convert(target)
+        yield top, np.asarray(tile, dtype=np.uint8)
+
+
+# -----------------------------
+# Chi-square helpers
+# -----------------------------
+def lsb_counts(img_arr):
+    if img_arr.ndim == 2:  # grayscale
+        bits = img_arr & 1
+        return np.bincount(bits.ravel(), minlength=2).astype(int)
+    else:
+        counts = []
+        for c in range(img_arr.shape[2]):
+            bits = img_arr[..., c] & 1
+            counts.append(np.bincount(bits.ravel(), minlength=2).astype(int))
+        return counts
+
+
+def chi2_stat(counts):
+    total = counts.sum()
+    expected = np.array([total/2.0, total/2.0])
+    chi2v = float(((counts - expected)**2 / expected).sum())
+    # Survival function of chi-square with one degree of freedom
+    pval = math.erfc(math.sqrt(chi2v / 2))
+    return chi2v, pval
+
+
+class LSBCounter:
+    """Accumulates per-channel LSB counts over tiles"""
+
+    def __init__(self):
+        self.counts = None
+
+    def add(self, tile):
+        channels = tile.reshape(tile.shape[0] * tile.shape[1], -1)
+        ones = np.count_nonzero(channels & 1, axis=0)
+        tile_counts = np.stack([channels.shape[0] - ones, ones], axis=1).astype(int)
+        self.counts = tile_counts if self.counts is None else self.counts + tile_counts
+
+    def result(self, grayscale):
+        # Same shapes as lsb_counts: one pair for L, a list of pairs for RGB
+        if grayscale:
+            return self.counts[0]
+        return list(self.counts)
+
+
+# -----------------------------
+# RS Analysis (Fridrich, Goljan & Du)
+# -----------------------------
+# Pixels are split into groups of RS_GROUP_SIZE horizontal neighbours and
+# flipped with the mask [0, 1, 1, 0] and its negation
+RS_GROUP_SIZE = 4
+
+
+def _rs_counts(a, b, c, d):
+    """(R_M, S_M, R_-M, S_-M) for groups given as four int16 pixel columns.
+
+    The discrimination function is the total variation |b-a|+|c-b|+|d-c|.
+    With the mask [0, 1, 1, 0], F1 (0<->1, 2<->3, ...) and F-1 (-1<->0,
+    1<->2, ...) are applied to the middle two pixels only.
+    """
+    base = np.abs(b - a)
+    base += np.abs(c - b)
+    base += np.abs(d - c)
+
+    bp, cp = b ^ 1, c ^ 1
+    pos = np.abs(bp - a)
+    pos += np.abs(cp - bp)
+    pos += np.abs(d - cp)
+
+    bn, cn = ((b + 1) ^ 1) - 1, ((c + 1) ^ 1) - 1
+    neg = np.abs(bn - a)
+    neg += np.abs(cn - bn)
+    neg += np.abs(d - cn)
+
+    return np.array([
+        np.count_nonzero(pos > base), np.count_nonzero(pos < base),
+        np.count_nonzero(neg > base), np.count_nonzero(neg < base),
+    ], dtype=np.int64)
+
+
+def rs_payload(counts, groups):
+    """Fridrich RS payload estimate from accumulated counts.
+
+    counts holds (R_M, S_M, R_-M, S_-M) for the image followed by the same
+    four counts for the image with every LSB flipped. Returns the estimated
+    embedding rate in [0, 1], or None when it cannot be estimated.
+    """
+    if not groups:
+        return None
+    rm, sm, rnm, snm, rm1, sm1, rnm1, snm1 = np.asarray(counts, dtype=float) / groups
+    d0, d1 = rm - sm, rm1 - sm1
+    dn0, dn1 = rnm - snm, rnm1 - snm1
+    a = 2 * (d1 + d0)
+    b = dn0 - dn1 - d1 - 3 * d0
+    c = d0 - dn0
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return None
+        x = -c / b
+    else:
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            return None
+        roots = ((-b + disc ** 0.5) / (2 * a), (-b - disc ** 0.5) / (2 * a))
+        x = min(roots, key=abs)
+    if abs(x - 0.5) < 1e-12:
+        return None
+    return float(min(max(x / (x - 0.5), 0.0), 1.0))
+
+
+class RSAnalyzer:
+    """Accumulates RS group counts per channel over row tiles.
+
+    Groups never span rows, so tiles of whole rows need no carry-over.
+    All work is vectorised over the groups of a tile.
+    """
+
+    def __init__(self):
+        self.counts = None
+        self.groups = None
+
+    def add(self, tile):
+        planes = tile[..., None] if tile.ndim == 2 else tile
+        rows, width, channels = planes.shape
+        usable = width - width % RS_GROUP_SIZE
+        if self.counts is None:
+            self.counts = np.zeros((channels, 8), dtype=np.int64)
+            self.groups = np.zeros(channels, dtype=np.int64)
+        if not usable:
+            return
+        for c in range(channels):
+            groups = planes[:, :usable, c].reshape(-1, RS_GROUP_SIZE)
+            # int16 leaves room for F-1 to map 255 to 256 and 0 to -1
+            columns = [groups[:, k].astype(np.int16) for k in range(RS_GROUP_SIZE)]
+            self.counts[c, :4] += _rs_counts(*columns)
+            self.counts[c, 4:] += _rs_counts(*[column ^ 1 for column in columns])
+            self.groups[c] += groups.shape[0]
+
+    def result(self, channel_names):
+        """{channel: {'groups', 'counts', 'payload'}} including 'ALL'"""
+        stats = {}
+        if self.counts is None:
+            return stats
+        for name, counts, groups in zip(channel_names, self.counts, self.groups):
+            stats[name] = {'groups': int(groups), 'counts': counts.tolist(),
+                           'payload': rs_payload(counts, int(groups))}
+        if len(channel_names) > 1:
+            total, groups = self.counts.sum(axis=0), int(self.groups.sum())
+            stats["ALL"] = {'groups': groups, 'counts': total.tolist(),
+                            'payload': rs_payload(total, groups)}
+        return stats
+
+
+def rs_analysis(img_arr, channel_names=None):
+    analyzer = RSAnalyzer()
+    arr = np.asarray(img_arr, dtype=np.uint8)
+    analyzer.add(arr)
+    if channel_names is None:
+        channel_names = ["L"] if arr.ndim == 2 else ["R", "G", "B", "A"][:arr.shape[2]]
+    return analyzer.result(channel_names)
+
+
+# -----------------------------
+# Sample Pairs Analysis (Dumitrescu, Wu & Wang)
+# -----------------------------
+def _solve_smaller_root(a, b, c):
+    """Smaller real root of a*p^2 + b*p + c = 0, or None"""
+    if abs(a) < 1e-12:
+        return None if abs(b) < 1e-12 else -c / b
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    return min((-b + disc ** 0.5) / (2 * a), (-b - disc ** 0.5) / (2 * a))
+
+
+def spa_payload(counts):
+    """SPA payload estimate from accumulated (X, Y, Z, W, P) pair counts.
+
+    p is the smaller root of 0.5(W+Z)p^2 + (2X-P)p + Y-X = 0, clipped to
+    [0, 1]; None when the quadratic has no real root.
+    """
+    x, y, z, w, pairs = (float(v) for v in counts)
+    if not pairs:
+        return None
+    p = _solve_smaller_root(0.5 * (w + z), 2 * x - pairs, y - x)
+    return None if p is None else float(min(max(p, 0.0), 1.0))
+
+
+class SPAAnalyzer:
+    """Accumulates sample-pair counts over horizontally adjacent pixels.
+
+    X: pairs (u, v) with v even and u < v, or v odd and u > v
+    Y: pairs with v even and u > v, or v odd and u < v
+    Z: pairs with u == v
+    W: pairs differing only in the LSB
+    Pairs never span rows, so tiles need no carry-over. Everything is
+    computed with uint8 comparisons.
+    """
+
+    def __init__(self):
+        self.counts = None
+
+    def add(self, tile):
+        planes = tile[..., None] if tile.ndim == 2 else tile
+        channels = planes.shape[2]
+        if self.counts is None:
+            self.counts = np.zeros((channels, 5), dtype=np.int64)
+        if planes.shape[1] < 2:
+            return
+        for c in range(channels):
+            u, v = planes[:, :-1, c], planes[:, 1:, c]
+            v_even = (v & 1) == 0
+            less, greater = u < v, u > v
+            self.counts[c] += (
+                np.count_nonzero(np.where(v_even, less, greater)),
+                np.count_nonzero(np.where(v_even, greater, less)),
+                np.count_nonzero(u == v),
+                np.count_nonzero((u >> 1) == (v >> 1)) - np.count_nonzero(u == v),
+                u.size,
+            )
+
+    def result(self, channel_names):
+        """{channel: {'counts', 'payload'}} including 'ALL'"""
+        return _per_channel(self.counts, channel_names, spa_payload)
+
+
+# -----------------------------
+# Weighted stego-image (WS) estimator (Fridrich & Goljan; Ker & Boehme)
+# -----------------------------
+# Offset in the local-variance weight w = 1 / (WS_VARIANCE_OFFSET + var)
+WS_VARIANCE_OFFSET = 5.0
+
+
+class WSAnalyzer:
+    """Accumulates the weighted-stego payload estimate over row tiles.
+
+    Each interior pixel s is predicted by the mean of its four neighbours,
+    and contributes w * (s - s_flipped) * (s - prediction), where w favours
+    pixels in smooth areas. The estimate is 2 * sum / sum(w). The
+    predictor needs the rows above and below, so the last two rows of each
+    tile are carried into the next one, unless top shows the tile does not
+    continue the previous one (sampled bands).
+    """
+
+    def __init__(self):
+        self.tail = None
+        self.sums = None
+        self.next_top = None
+
+    def add(self, tile, top=None):
+        planes = tile[..., None] if tile.ndim == 2 else tile
+        channels = planes.shape[2]
+        if self.sums is None:
+            self.sums = np.zeros((channels, 2), dtype=np.float64)
+        if top is not None:
+            if top != self.next_top:
+                self.tail = None
+            self.next_top = top + planes.shape[0]
+        block = planes if self.tail is None else np.concatenate((self.tail, planes))
+        self.tail = block[-2:]
+        if block.shape[0] < 3 or block.shape[1] < 3:
+            return
+        for c in range(channels):
+            plane = block[..., c].astype(np.float32)
+            up, down = plane[:-2, 1:-1], plane[2:, 1:-1]
+            left, right = plane[1:-1, :-2], plane[1:-1, 2:]
+            centre = plane[1:-1, 1:-1]
+            prediction = (up + down + left + right) / 4
+            variance = (up * up + down * down + left * left + right * right) / 4 - prediction * prediction
+            weight = 1.0 / (WS_VARIANCE_OFFSET + variance)
+            # s - s_flipped is +1 for odd pixels and -1 for even ones
+            sign = (block[1:-1, 1:-1, c] & 1).astype(np.float32) * 2 - 1
+            self.sums[c, 0] += float(np.sum(weight * sign * (centre - prediction), dtype=np.float64))
+            self.sums[c, 1] += float(np.sum(weight, dtype=np.float64))
+
+    def result(self, channel_names):
+        """{channel: {'counts', 'payload'}} including 'ALL'"""
+        return _per_channel(self.sums, channel_names, ws_payload)
+
+
+def ws_payload(sums):
+    """WS payload estimate from accumulated (weighted residual, weight) sums"""
+    residual, weight = sums
+    if not weight:
+        return None
+    return float(min(max(2 * residual / weight, 0.0), 1.0))
+
+
+def _per_channel(values, channel_names, estimate):
+    stats = {}
+    if values is None:
+        return stats
+    for name, channel_values in zip(channel_names, values):
+        stats[name] = {'counts': channel_values.tolist(), 'payload': estimate(channel_values)}
+    if len(channel_names) > 1:
+        total = values.sum(axis=0)
+        stats["ALL"] = {'counts': total.tolist(), 'payload': estimate(total)}
+    return stats
+
+
+# -----------------------------
+# Combined detector
+# -----------------------------
+# The payload estimates of clean images scatter around zero with a spread
+# of a few percent; the logistic maps the mean estimate to a 0-1 score
+# centred where clean images become rare
+SCORE_CENTER = 0.04
+SCORE_SCALE = 0.01
+SUSPICIOUS_SCORE = 0.5
+DETECTION_SCORE = 0.9
+
+
+def suspicion_score(payload):
+    """Calibrated 0-1 suspicion score for a combined payload estimate"""
+    if payload is None:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-(payload - SCORE_CENTER) / SCORE_SCALE))
+
+
+def combine_estimates(rs_stats, spa_stats, ws_stats, channel):
+    """Mean RS/SPA/WS payload for one channel (or 'ALL'), and its score"""
+    estimates = {
+        name: stats[channel]['payload']
+        for name, stats in (("rs", rs_stats), ("spa", spa_stats), ("ws", ws_stats))
+        if channel in stats and stats[channel]['payload'] is not None
+    }
+    payload = sum(estimates.values()) / len(estimates) if estimates else None
+    return {'estimates': estimates, 'payload': payload, 'score': suspicion_score(payload)}
+
+
+# -----------------------------
+# LSB payload extraction
+# -----------------------------
+# Only the start of the LSB stream is extracted and scanned
+LSB_SCAN_BYTES = 64 * 1024
+
+# Known file headers are looked for in the first bytes of the stream
+HEADER_SEARCH_BYTES = 64
+FILE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF8', 'gif'),
+    (b'PK\x03\x04', 'zip'),
+    (b'%PDF-', 'pdf'),
+    (b"7z\xbc\xaf'\x1c", '7z'),
+    (b'\x1f\x8b\x08', 'gzip'),
+    (b'Rar!\x1a\x07', 'rar'),
+    (b'BZh', 'bzip2'),
+    (b'\x7fELF', 'elf'),
+    (b'OggS', 'ogg'),
+    (b'ID3', 'mp3'),
+    (b'-----BEGIN ', 'pem'),
+)
+
+# stegano's lsb module prefixes the message with "<byte length>:"
+STEGANO_PREFIX_RE = re.compile(rb'(\d{1,10}):')
+
+# A printable run must be this long and this varied; flat image areas
+# produce short-period LSB patterns that can be printable but repetitive
+MIN_PRINTABLE_RUN = 24
+MIN_PRINTABLE_DISTINCT = 8
+PRINTABLE_RUN_RE = re.compile(rb'[\x20-\x7e\t\r\n]{%d,}' % MIN_PRINTABLE_RUN)
+
+
+def lsb_stream(img, channels="RGB", bits=1, max_bytes=LSB_SCAN_BYTES):
+    """Extract the LSB stream of an image with NumPy.
+
+    Pixels are read in raster order; for each pixel the low `bits` bits of
+    every channel in `channels` (most significant first) are appended,
+    and the bit stream is packed MSB-first with np.packbits. This is the
+    layout stegano's lsb module writes with channels="RGB", bits=1. Only
+    the rows needed for max_bytes are decoded.
+    """
+    target = "L" if channels == "L" else ("RGBA" if "A" in channels else "RGB")
+    bands = img.getbands() if img.mode == target else tuple(target)
+    indices = [bands.index(channel) for channel in channels]
+    width, height = img.size
+    pixels = min(width * height, -(-max_bytes * 8 // (len(indices) * bits)))
+    rows = min(height, -(-pixels // width))
+
+    top = img.crop((0, 0, width, rows))
+    if top.mode != target:
+        top = top.convert(target)
+    samples = np.asarray(top, dtype=np.uint8).reshape(-1, len(bands))[:pixels][:, indices]
+    if bits == 1:
+        stream = samples & 1
+    else:
+        stream = np.unpackbits(samples[..., None], axis=-1)[..., 8 - bits:]
+    return np.packbits(stream.ravel())[:max_bytes].tobytes()
+
+
+def _printable_share(data):
+    if not data:
+        return 0.0
+    return sum(1 for byte in data if 32 <= byte < 127 or byte in (9, 10, 13)) / len(data)
+
+
+def scan_lsb_stream(data, capacity):
+    """Look for payload structure in an LSB stream.
+
+    Returns a finding dict (kind, offset, detail, preview) or None. Checks,
+    in order: a stegano "<n>:" prefix, a known file header, a 32-bit length
+    prefix followed by a header or text, and a long varied printable run.
+    """
+    match = STEGANO_PREFIX_RE.match(data)
+    if match:
+        length = int(match.group(1))
+        if 0 < length <= capacity - match.end():
+            message = data[match.end():match.end() + length]
+            return {'kind': 'stegano', 'offset': 0, 'detail': f"{length} byte message",
+                    'preview': message.decode('utf-8', errors='replace')}
+
+    for signature, name in FILE_SIGNATURES:
+        offset = data.find(signature, 0, HEADER_SEARCH_BYTES + len(signature))
+        if offset >= 0:
+            return {'kind': 'file_header', 'offset': offset, 'detail': name,
+                    'preview': data[offset:offset + 32].hex()}
+
+    for order in ('>I', '<I'):
+        if len(data) < 8:
+            break
+        (length,) = struct.unpack(order, data[:4])
+        payload = data[4:4 + min(length, 256)]
+        if 8 <= length <= capacity - 4 and (
+                any(payload.startswith(signature) for signature, _ in FILE_SIGNATURES)
+                or _printable_share(payload) >= 0.95):
+            return {'kind': 'length_prefix', 'offset': 0, 'detail': f"{length} bytes ({order[1:]} {'big' if order[0] == '>' else 'little'}-endian)",
+                    'preview': payload[:50].decode('latin-1')}
+
+    for run in PRINTABLE_RUN_RE.finditer(data):
+        if len(set(run.group())) >= MIN_PRINTABLE_DISTINCT:
+            return {'kind': 'printable', 'offset': run.start(), 'detail': f"{len(run.group())} printable bytes",
+                    'preview': run.group().decode('ascii')}
+    return None
+
+
+def lsb_detect(img, channels="RGB", bits=1):
+    """Extract and scan the LSB stream of an open image or a path.
+
+    Returns (detected, finding) where finding is a scan_lsb_stream dict.
+    """
+    if not isinstance(img, Image.Image):
+        with Image.open(img) as opened:
+            return lsb_detect(opened, channels, bits)
+    try:
+        data = lsb_stream(img, channels, bits)
+    except ValueError:
+        # The image lacks a requested channel (e.g. "A" on an RGB image)
+        return False, None
+    capacity = img.width * img.height * len(channels) * bits // 8
+    finding = scan_lsb_stream(data, capacity)
+    return finding is not None, finding
+
+
+# -----------------------------
+# Main analyze function
+# -----------------------------
+def verdict(pval_all, score, steg_detected):
+    """'detection_lsb', 'detection', 'suspicious' or 'clean'"""
+    if steg_detected:
+        return "detection_lsb"
+    if pval_all < 0.01 or score >= DETECTION_SCORE:
+        return "detection"
+    if pval_all < 0.10 or score >= SUSPICIOUS_SCORE:
+        return "suspicious"
+    return "clean"
+
+
+def analyze(path, verbose=True, tile_rows=None, channels="RGB", bits=1, max_pixels=None):
+    """Run every estimator over an image and print a report when verbose.
+
+    Returns (chi-square rows, estimators, (lsb detected, lsb finding), image),
+    where image holds the file's mode, width and height. With max_pixels,
+    larger images are sampled in bands (see iter_bands). Images of up to
+    ANALYZE_MAX_PIXELS are read (see open_image).
+    """
+    # Statistics are accumulated tile by tile; no full-size array is built
+    lsb = LSBCounter()
+    rs = RSAnalyzer()
+    spa = SPAAnalyzer()
+    ws = WSAnalyzer()
+    with open_image(path) as img:
+        mode = img.mode
+        image = {"mode": mode, "width": img.width, "height": img.height}
+        grayscale = mode == "L"
+        shape = (img.height, img.width) if grayscale else (img.height, img.width, 3)
+        for top, tile in iter_bands(img, max_pixels, tile_rows):
+            lsb.add(tile)
+            rs.add(tile)
+            spa.add(tile)
+            ws.add(tile, top)
+
+        # LSB payload check on the start of the LSB stream
+        steg_detected, finding = lsb_detect(img, "L" if grayscale else channels, bits)
+    counts = lsb.result(grayscale)
+
+    results = []
+    channel_names = ["L"] if grayscale else ["R", "G", "B"]
+    if grayscale:
+        chi2v, pval = chi2_stat(counts)
+        results.append(("L", counts, chi2v, pval))
+        pval_all = pval
+    else:
+        for chname, c in zip(channel_names, counts):
+            chi2v, pval = chi2_stat(c)
+            results.append((chname, c, chi2v, pval))
+        flat = sum(counts)
+        chi2v_all, pval_all = chi2_stat(flat)
+        results.append(("ALL", flat, chi2v_all, pval_all))
+
+    # Payload estimators, combined into one calibrated score
+    estimators = {
+        'rs': rs.result(channel_names),
+        'spa': spa.result(channel_names),
+        'ws': ws.result(channel_names),
+    }
+    overall = channel_names[0] if grayscale else "ALL"
+    combined = combine_estimates(estimators['rs'], estimators['spa'], estimators['ws'], overall)
+    estimators['combined'] = combined
+
+    if verbose:
+        print(f"File: {path}")
+        print(f"Image mode: {mode}, shape: {shape}")
+        for ch, c, chi2v, pval in results:
+            n0, n1 = int(c[0]), int(c[1])
+            total = n0 + n1
+            print(f"Channel {ch}: n0={n0} n1={n1} total={total} chi2={chi2v:.4f} p={pval:.4e}")
+
+        # Decision
+        decision = verdict(pval_all, combined['score'], steg_detected)
+        if decision == "detection_lsb":
+            print(f"\n=> DETECTION (LSB payload): {finding['kind']} at byte {finding['offset']}: {finding['detail']}")
+            print(f"Extracted (partial) payload: {finding['preview'][:50]}...")
+        elif decision == "detection":
+            print("\n=> DETECTION: likely hidden data (statistical)")
+        elif decision == "suspicious":
+            print("\n=> SUSPICIOUS: possible hidden data")
+        else:
+            print("\n=> CLEAN")
+
+        for ch, stats in estimators['rs'].items():
+            rm, sm, rnm, snm = stats['counts'][:4]
+            print(f"RS {ch}: R_M={rm} S_M={sm} R_-M={rnm} S_-M={snm}")
+        for ch in estimators['rs']:
+            rates = "  ".join(
+                f"{name.upper()}={'n/a' if estimators[name][ch]['payload'] is None else format(estimators[name][ch]['payload'], '.3f')}"
+                for name in ("rs", "spa", "ws")
+            )
+            print(f"Estimated payload {ch}: {rates}")
+        print(f"Suspicion score: {combined['score']:.3f}")
+
+    return results, estimators, (steg_detected, finding), image
+
+
+
+# -----------------------------
+# Scrub pipeline stage
+# -----------------------------
+POLICY_PASS = 'pass'
+POLICY_QUARANTINE = 'quarantine'
+POLICY_SANITISE = 'sanitise'
+POLICIES = (POLICY_PASS, POLICY_QUARANTINE, POLICY_SANITISE)
+
+# LSB embedding only survives lossless formats in direct-colour modes
+STEG_SUFFIXES = {'.png', '.bmp', '.tif', '.tiff'}
+STEG_MODES = {'L', 'LA', 'RGB', 'RGBA'}
+
+# The screen runs SPA over this many sampled pixels; the full RS/SPA/WS
+# pass, over at most FULL_PIXELS, only runs when the sampled estimate
+# reaches ESCALATE_PAYLOAD
+SCREEN_PIXELS = 1_000_000
+FULL_PIXELS = 8_000_000
+ESCALATE_PAYLOAD = 0.02
+
+# Sampling bounds the analysis, not the decode: PIL holds the whole image
+# in memory, and sanitising makes further full-size copies. Images over
+# MAX_DECODE_PIXELS are not analysed; in memory-limited workers the cap is
+# lowered to fit DECODE_BYTES_PER_PIXEL into half the limit
+MAX_DECODE_PIXELS = 40_000_000
+DECODE_BYTES_PER_PIXEL = 16
+
+DEFAULT_QUARANTINE_DIR = "quarantine/steg"
+
+# Setting STEG_STAGE to a policy name enables the stage on the default
+# scrub service
+ENV_POLICY = "STEG_STAGE"
+ENV_QUARANTINE_DIR = "STEG_QUARANTINE_DIR"
+
+# Other spellings accepted for a policy; ENABLED_VALUES select the default
+# policy and DISABLED_VALUES turn the stage off
+POLICY_ALIASES = {'sanitize': POLICY_SANITISE}
+ENABLED_VALUES = {'1', 'true', 'yes', 'on'}
+DISABLED_VALUES = {'', '0', 'false', 'no', 'off', 'none'}
+
+
+def parse_policy(value) -> Optional[str]:
+    """Map a configured policy to one of POLICIES; None disables the stage.
+
+    Unknown values fall back to quarantine with a warning instead of
+    raising, so a typo cannot take the scrub service down, nor silently
+    turn the stage off.
+    """
+    policy = str(value if value is not None else '').strip().lower()
+    if policy in DISABLED_VALUES:
+        return None
+    if policy in ENABLED_VALUES:
+        return POLICY_QUARANTINE
+    policy = POLICY_ALIASES.get(policy, policy)
+    if policy not in POLICIES:
+        logging.getLogger('CommsShield').warning(
+            f"Unknown steg policy {value!r}; expected one of {', '.join(POLICIES)}. "
+            f"Using {POLICY_QUARANTINE}")
+        return POLICY_QUARANTINE
+    return policy
+
+
+@dataclass
+class StegResult:
+    """Outcome of the steganalysis stage for one image"""
+    name: str
+    verdict: str = 'clean'  # 'clean', 'suspicious', 'detection', 'detection_lsb' or 'unanalysed'
+    flagged: bool = False
+    escalated: bool = False
+    screen_payload: Optional[float] = None
+    payload: Optional[float] = None
+    score: float = 0.0
+    estimates: Dict[str, float] = field(default_factory=dict)
+    finding: Optional[Dict] = None
+    screen_ms: float = 0.0
+    full_ms: float = 0.0
+    action: str = POLICY_PASS
+    quarantined_to: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def elapsed_ms(self) -> float:
+        return round(self.screen_ms + self.full_ms, 1)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['elapsed_ms'] = self.elapsed_ms
+        return data
+
+    def summary(self) -> str:
+        if self.error:
+            detail = f"not analysed: {self.error}"
+        elif self.finding:
+            detail = f"LSB {self.finding['kind']}: {self.finding['detail']}"
+        elif self.escalated:
+            detail = f"score {self.score:.2f}, payload {self.payload or 0.0:.3f}"
+        else:
+            detail = f"sampled payload {self.screen_payload or 0.0:.3f}"
+        return f"{self.verdict} ({detail}) in {self.elapsed_ms:.0f} ms"
+
+
+class StegDetected(ValueError):
+    """Raised when the steganalysis stage quarantines an input"""
+
+    def __init__(self, result: StegResult):
+        self.result = result
+        super().__init__(f"Quarantined {result.name}: {result.summary()}")
+
+    def __reduce__(self):
+        # Raised in worker processes; rebuild from the result, not the message
+        return StegDetected, (self.result,)
+
+
+def randomise_lsbs(img: Image.Image) -> Image.Image:
+    """Copy of img with the low bit of every colour sample replaced at random.
+
+    Alpha is left alone. The copy carries no metadata. To the estimators
+    the result looks fully embedded, but any payload is gone.
+    """
+    arr = np.array(img, dtype=np.uint8)
+    colour = arr if arr.ndim == 2 else arr[..., :len(img.mode.rstrip('A'))]
+    colour &= 0xFE
+    colour |= np.random.default_rng().integers(0, 2, colour.shape, dtype=np.uint8)
+    return Image.fromarray(arr, img.mode)
+
+
+class StegStage:
+    """Optional steganalysis step run on images before they are scrubbed.
+
+    A cheap screen runs first: the LSB payload scan on the start of the LSB
+    stream, and SPA over a sample of at most screen_pixels. Only when the
+    sampled estimate reaches escalate_payload (or cannot be computed) are
+    RS, SPA and WS run over at most full_pixels. A file is flagged when the
+    scan finds a payload or the combined score reaches threshold, and the
+    policy then decides: quarantine (copy it aside and refuse to scrub),
+    sanitise (randomise pixel LSBs while scrubbing) or pass (log only).
+
+    Images that cannot be analysed (decode errors, over max_decode_pixels)
+    are quarantined under both blocking policies: the stage fails closed.
+    """
+
+    def __init__(self, policy: str = POLICY_QUARANTINE, quarantine_dir=DEFAULT_QUARANTINE_DIR,
+                 threshold: float = DETECTION_SCORE, escalate_payload: float = ESCALATE_PAYLOAD,
+                 screen_pixels: int = SCREEN_PIXELS, full_pixels: int = FULL_PIXELS,
+                 max_decode_pixels: int = MAX_DECODE_PIXELS):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown steg policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.quarantine_dir = Path(quarantine_dir)
+        self.threshold = threshold
+        self.escalate_payload = escalate_payload
+        self.screen_pixels = screen_pixels
+        self.full_pixels = full_pixels
+        self.max_decode_pixels = max_decode_pixels
+
+    @classmethod
+    def from_config(cls, config) -> Optional['StegStage']:
+        """Build a stage from the steg_* settings of a Config; None when disabled"""
+        if not config.get("steg_stage_enabled", False):
+            return None
+        return cls(
+            policy=parse_policy(config.get("steg_policy", POLICY_QUARANTINE)) or POLICY_QUARANTINE,
+            quarantine_dir=config.get("steg_quarantine_dir", DEFAULT_QUARANTINE_DIR),
+            threshold=config.get("steg_threshold", DETECTION_SCORE),
+            screen_pixels=config.get("steg_screen_pixels", SCREEN_PIXELS),
+            full_pixels=config.get("steg_full_pixels", FULL_PIXELS),
+            max_decode_pixels=config.get("steg_max_decode_pixels", MAX_DECODE_PIXELS)
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional['StegStage']:
+        """Build a stage from STEG_STAGE / STEG_QUARANTINE_DIR; None when unset"""
+        policy = parse_policy(os.environ.get(ENV_POLICY))
+        if policy is None:
+            return None
+        return cls(policy=policy, quarantine_dir=os.environ.get(ENV_QUARANTINE_DIR, DEFAULT_QUARANTINE_DIR))
+
+    def within_memory(self, memory_limit_mb: int) -> 'StegStage':
+        """Copy of the stage whose decode cap fits a worker memory limit"""
+        stage = copy.copy(self)
+        fit = memory_limit_mb * 1024 * 1024 // 2 // DECODE_BYTES_PER_PIXEL
+        stage.max_decode_pixels = min(self.max_decode_pixels, fit)
+        return stage
+
+    def unanalysed(self, name: str, reason: str) -> StegResult:
+        """Result for an image the stage could not analyse.
+
+        Flagged for quarantine under both blocking policies: an image that
+        cannot be decoded for analysis cannot be sanitised either.
+        """
+        result = StegResult(name=name, verdict='unanalysed', error=reason)
+        if self.policy != POLICY_PASS:
+            result.flagged = True
+            result.action = POLICY_QUARANTINE
+        return result
+
+    def applies(self, hint: str) -> bool:
+        return Path(hint or '').suffix.lower() in STEG_SUFFIXES
+
+    def inspect(self, source: Union[Path, str, BinaryIO], hint: Optional[str] = None) -> Optional[StegResult]:
+        """Screen one image, escalating when needed.
+
+        source is a path or a seekable binary stream (whose position is
+        restored). Returns None for formats and modes the stage skips. Any
+        failure, MemoryError included, gives an unanalysed result rather
+        than an exception.
+        """
+        name = os.path.basename(str(hint or getattr(source, 'name', '') or source))
+        if not self.applies(name):
+            return None
+        try:
+            if isinstance(source, (str, Path)):
+                with Image.open(source) as img:
+                    return self._inspect_image(img, name)
+            start = source.tell()
+            try:
+                with Image.open(source) as img:
+                    return self._inspect_image(img, name)
+            finally:
+                source.seek(start)
+        except Exception as e:
+            return self.unanalysed(name, f"{type(e).__name__}: {e}")
+
+    def _inspect_image(self, img: Image.Image, name: str) -> Optional[StegResult]:
+        if img.mode not in STEG_MODES:
+            return None
+        # Checked before anything is decoded; Image.open only reads the header
+        pixels = img.width * img.height
+        if pixels > self.max_decode_pixels:
+            return self.unanalysed(name, f"{pixels:,} pixels is over the {self.max_decode_pixels:,} pixel decode limit")
+        result = StegResult(name=name)
+        start = time.perf_counter()
+        channels = "L" if img.mode in ("L", "LA") else "RGB"
+        channel_names = ["L"] if channels == "L" else ["R", "G", "B"]
+        overall = "L" if channels == "L" else "ALL"
+
+        detected, result.finding = lsb_detect(img, channels)
+        if not detected:
+            spa = SPAAnalyzer()
+            for _, tile in iter_bands(img, self.screen_pixels):
+                spa.add(tile)
+            result.screen_payload = spa.result(channel_names).get(overall, {}).get('payload')
+        result.screen_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        # No real SPA root is itself unusual (e.g. fully embedded images)
+        if not detected and (result.screen_payload is None or result.screen_payload >= self.escalate_payload):
+            start = time.perf_counter()
+            rs, spa, ws = RSAnalyzer(), SPAAnalyzer(), WSAnalyzer()
+            for top, tile in iter_bands(img, self.full_pixels):
+                rs.add(tile)
+                spa.add(tile)
+                ws.add(tile, top)
+            combined = combine_estimates(rs.result(channel_names), spa.result(channel_names),
+                                         ws.result(channel_names), overall)
+            result.escalated = True
+            result.estimates = combined['estimates']
+            result.payload = combined['payload']
+            result.score = combined['score']
+            result.full_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        if detected:
+            result.verdict = "detection_lsb"
+        elif result.score >= DETECTION_SCORE:
+            result.verdict = "detection"
+        elif result.score >= SUSPICIOUS_SCORE:
+            result.verdict = "suspicious"
+        result.flagged = detected or result.score >= self.threshold
+        if result.flagged:
+            result.action = self.policy
+        return result
+
+    def quarantine(self, source: Union[Path, str, BinaryIO], result: StegResult) -> Path:
+        """Copy a flagged input into the quarantine folder, with its result as JSON"""
+        self.quarantine_dir.mkdir(parents=True, exist_ok=True)
+        target = self.quarantine_dir / f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}_{result.name}"
+        if isinstance(source, (str, Path)):
+            shutil.copy2(source, target)
+        else:
+            start = source.tell()
+            try:
+                with open(target, 'wb') as out:
+                    shutil.copyfileobj(source, out)
+            finally:
+                source.seek(start)
+        result.quarantined_to = str(target)
+        target.with_name(target.name + ".json").write_text(json.dumps(result.to_dict(), indent=2))
+        return target
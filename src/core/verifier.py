@@ -0,0 +1,57 @@
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+
+from .probes import probe
+
+
+@dataclass
+class VerificationResult:
+    """Whether a scrubbed file still carries metadata, and which fields"""
+    name: str
+    passed: bool
+    checked: bool = True
+    residual: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def render_text(self) -> str:
+        if self.error:
+            return f"Verification of {self.name} failed: {self.error}"
+        if not self.checked:
+            return f"{self.name}: no metadata probe for this format"
+        if self.passed:
+            return f"{self.name}: PASS - no residual metadata ({self.elapsed_ms:.1f} ms)"
+        lines = [f"{self.name}: FAIL - {len(self.residual)} residual field(s)"]
+        lines.extend(f"  {key}: {value}" for key, value in self.residual.items())
+        return "\n".join(lines)
+
+
+def verify_scrubbed(source: Union[Path, str, BinaryIO], hint: Optional[str] = None,
+                    show: bool = False) -> VerificationResult:
+    """Check a scrubbed file for residual metadata using the format probes.
+
+    Nothing is printed unless show is True.
+    """
+    if isinstance(source, (str, Path)):
+        name = Path(hint or source).name
+    else:
+        name = Path(hint or getattr(source, 'name', '') or 'stream').name
+    start = time.perf_counter()
+    try:
+        fields = probe(source, hint)
+        if fields is None:
+            result = VerificationResult(name=name, passed=True, checked=False)
+        else:
+            result = VerificationResult(name=name, passed=not fields, residual=fields)
+    except Exception as e:
+        result = VerificationResult(name=name, passed=False, error=str(e))
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if show:
+        print(result.render_text())
+    return result
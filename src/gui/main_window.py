@@ -5,6 +5,7 @@ import threading
 
 from ..core.scrubber import UniversalScrubber
 from ..core.folder_watcher import FolderWatcher
+from ..core.service import get_scrub_service
 from ..utils.logger import SecureLogger
 
 class MainWindow:
@@ -108,8 +109,8 @@ class MainWindow:
     def scrub_files(self, file_paths):
         def scrub_thread():
             self.progress.start()
-            for file_path in file_paths:
-                success = self.scrubber.scrub_file(Path(file_path))
+            results = get_scrub_service().map(Path(p) for p in file_paths)
+            for file_path, success in zip(file_paths, results):
                 if success:
                     self.log(f"Scrubbed: {Path(file_path).name}")
                 else:
@@ -122,7 +123,7 @@ class MainWindow:
     def scrub_folder(self, folder_path):
         def scrub_thread():
             self.progress.start()
-            results = self.scrubber.scrub_folder(folder_path)
+            results = get_scrub_service().scrub_folder(folder_path)
             self.progress.stop()
             messagebox.showinfo("Complete", 
                               f"Scrubbed {results['successful']}/{results['total']} files")
@@ -11,6 +11,7 @@ from contextlib import redirect_stdout
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from core.scrubber import UniversalScrubber
+from core.service import get_scrub_service
 from utils.logger import SecureLogger
 from core.metadata_analyzer import show_comprehensive_metadata
 
@@ -211,13 +212,12 @@ class SimpleMainWindow:
             self.progress.start()
             self.output_text.delete(1.0, tk.END)
             
-            for i, file_path in enumerate(self.selected_files, 1):
+            results = get_scrub_service().map(self.selected_files)
+            for i, (file_path, success) in enumerate(zip(self.selected_files, results), 1):
                 self.output_text.insert(tk.END, f"Scrubbing: {file_path.name}\n")
                 self.output_text.see(tk.END)
                 self.root.update()
                 
-                success = self.scrubber.scrub_file(file_path)
-                
                 if success:
                     self.output_text.insert(tk.END, f"✓ Success: scrubbed_{file_path.name}\n")
                 else:
@@ -250,7 +250,7 @@ class SimpleMainWindow:
             self.folder_results.insert(tk.END, "Working...\n")
             self.root.update()
             
-            results = self.scrubber.scrub_folder(self.selected_folder, output_folder)
+            results = get_scrub_service().scrub_folder(self.selected_folder, output_folder)
             
             self.folder_results.delete(1.0, tk.END)
             self.folder_results.insert(tk.END, f"Folder Scrubbing Results:\n")
@@ -4,5 +4,6 @@ Utility functions and classes for Comms Shield
 
 from .logger import SecureLogger
 from .config import Config
+from .hashing import hash_file, hash_bytes
 
-__all__ = ['SecureLogger', 'Config']
\ No newline at end of file
+__all__ = ['SecureLogger', 'Config', 'hash_file', 'hash_bytes']
@@ -11,7 +11,29 @@ class Config:
             "log_retention_days": 30,
             "backup_original_files": True,
             "supported_formats": [".jpg", ".jpeg", ".png", ".pdf", ".docx", ".xlsx"],
-            "ui_theme": "dark"
+            "ui_theme": "dark",
+            "scrub_cache_dir": "",
+            "scrub_cache_max_mb": 512,
+            "scrub_workers": 0,
+            "scrub_max_pending": 0,
+            "scrub_use_processes": False,
+            "scrub_isolated": True,
+            "scrub_timeout_s": 60,
+            "scrub_memory_limit_mb": 1024,
+            "scrub_cpu_limit_s": 60,
+            "scrub_constrained_workers": 1,
+            "analysis_cache_entries": 256,
+            "analysis_cache_max_mb": 32,
+            "analysis_cache_db": "",
+            "analysis_depth": "standard",
+            "inventory_db": "logs/metadata_inventory.db",
+            "steg_stage_enabled": False,
+            "steg_policy": "quarantine",
+            "steg_quarantine_dir": "quarantine/steg",
+            "steg_threshold": 0.9,
+            "steg_screen_pixels": 1000000,
+            "steg_full_pixels": 8000000,
+            "steg_max_decode_pixels": 40000000
         }
         self.config = self.load_config()
     
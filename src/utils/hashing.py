@@ -0,0 +1,18 @@
+import hashlib
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of an in-memory buffer"""
+    return hashlib.sha256(data).hexdigest()
@@ -76,6 +76,12 @@ class SecureLogger:
             operation_data.update({'level': 'INFO', 'timestamp': datetime.now()})
             self.log_operation(operation_data)
     
+    def warning(self, message, operation_data=None):
+        self.logger.warning(message)
+        if operation_data:
+            operation_data.update({'level': 'WARNING', 'timestamp': datetime.now()})
+            self.log_operation(operation_data)
+
     def error(self, message, operation_data=None):
         self.logger.error(message)
         if operation_data:
@@ -1,117 +1,368 @@
+#!/usr/bin/env python3
+# stegscan.py - LSB steganalysis of images, one at a time or in batches
+# The estimators live in src/core/steganalysis.py; this script adds the
+# batch mode and the command line
+
+import argparse
+import csv
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
 import sys
-from PIL import Image
-import numpy as np
-from scipy.stats import chi2
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from urllib.request import pathname2url
 
-# Import the steganography-tools detector
-from stegano import lsb  # assuming you installed `steganography-tools`
+def _load_steganalysis():
+    """Load src/core/steganalysis.py by file path.
 
-# -----------------------------
-# Chi-square helpers
-# -----------------------------
-def lsb_counts(img_arr):
-    if img_arr.ndim == 2:  # grayscale
-        bits = img_arr & 1
-        return np.bincount(bits.ravel(), minlength=2).astype(int)
-    else:
-        counts = []
-        for c in range(img_arr.shape[2]):
-            bits = img_arr[..., c] & 1
-            counts.append(np.bincount(bits.ravel(), minlength=2).astype(int))
-        return counts
-
-def chi2_stat(counts):
-    total = counts.sum()
-    expected = np.array([total/2.0, total/2.0])
-    chi2v = ((counts - expected)**2 / expected).sum()
-    pval = chi2.sf(chi2v, df=1)
-    return chi2v, pval
+    Importing it as src.core.steganalysis runs src/core/__init__, which pulls
+    in every scrubber and its parsers; the module has no package-relative
+    imports, so each batch worker loads just the one file instead.
+    """
+    name = "_stegscan_steganalysis"
+    module = sys.modules.get(name)
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "core", "steganalysis.py")
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
 
-# -----------------------------
-# RS Analysis (basic)
-# -----------------------------
-def rs_analysis(img_arr):
-    channel = img_arr[..., 0].astype(int)  # red channel
-    pairs = channel.flatten()[::2], channel.flatten()[1::2]
-    diffs = np.abs(pairs[0] - pairs[1])
-    reg = np.sum(diffs % 2 == 0)
-    sing = np.sum(diffs % 2 == 1)
-    return reg, sing
+_steganalysis = _load_steganalysis()
+analyze = _steganalysis.analyze
+verdict = _steganalysis.verdict
 
 # -----------------------------
-# Steganography-tools detection
+# Batch mode
 # -----------------------------
-def stegano_detect(path):
+# Bump when analysis changes, so cached results from older code are not reused
+STEGSCAN_VERSION = "1"
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "stegscan.db")
+IMAGE_SUFFIXES = {".png", ".bmp", ".tif", ".tiff", ".jpg", ".jpeg", ".gif", ".webp", ".ppm", ".pgm"}
+REPORT_FORMATS = ("ndjson", "csv")
+CSV_COLUMNS = ["rank", "path", "verdict", "score", "payload", "rs", "spa", "ws",
+               "chi2_p", "lsb_finding", "mode", "width", "height", "sha256", "cached",
+               "elapsed_ms", "error"]
+
+# Images queued per worker, and new cache rows written per transaction
+QUEUE_FACTOR = 4
+CACHE_BATCH_SIZE = 200
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(sha256, channels, bits):
+    """Cache key: image content plus every option that changes the result"""
+    return f"{sha256}:{channels}:{bits}:v{STEGSCAN_VERSION}"
+
+class ResultCache:
+    """SQLite store of batch records keyed by content hash and options.
+
+    Workers only read it, each through one read-only connection opened at
+    startup; the parent process writes new results in batches. WAL lets the
+    reads proceed while a batch is being written.
     """
-    Use stegano LSB reveal as a detection attempt.
-    If it returns non-empty or non-trivial data, we flag it.
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, readonly=False):
+        self.db_path = db_path
+        self._reader = None
+        if readonly:
+            uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+            self._reader = sqlite3.connect(uri, uri=True)
+            return
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def get(self, key):
+        if self._reader is not None:
+            row = self._reader.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, items):
+        if not items:
+            return
+        now = time.time()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany("INSERT OR REPLACE INTO results (key, record, created) VALUES (?, ?, ?)",
+                             [(key, json.dumps(record), now) for key, record in items])
+            conn.commit()
+        finally:
+            conn.close()
+
+def _is_glob(pattern):
+    return any(char in pattern for char in "*?[")
+
+def iter_images(inputs):
+    """Expand files, folders and glob patterns into image paths.
+
+    Folders are walked recursively with os.scandir. Files named explicitly
+    are kept whatever their suffix; files found through a folder or a glob
+    must have an image suffix.
+    """
+    seen = set()
+    for item in inputs:
+        if _is_glob(item):
+            candidates = sorted(glob.glob(item, recursive=True))
+        else:
+            candidates = [item]
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                stack = [candidate]
+                while stack:
+                    directory = stack.pop()
+                    try:
+                        with os.scandir(directory) as entries:
+                            entries = sorted(entries, key=lambda entry: entry.name)
+                    except OSError:
+                        continue
+                    subdirs = []
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES:
+                                if entry.path not in seen:
+                                    seen.add(entry.path)
+                                    yield entry.path
+                        except OSError:
+                            continue
+                    stack.extend(reversed(subdirs))
+            elif candidate not in seen and (
+                    candidate == item or os.path.splitext(candidate)[1].lower() in IMAGE_SUFFIXES):
+                seen.add(candidate)
+                yield candidate
+
+# Each batch worker opens the result cache once, read-only
+_worker_cache = None
+
+def _init_worker(cache_path):
+    global _worker_cache
+    try:
+        _worker_cache = ResultCache(cache_path, readonly=True) if cache_path else None
+    except sqlite3.Error:
+        _worker_cache = None
+
+def _scan_in_worker(path, channels, bits):
+    return scan_record(path, channels, bits, _worker_cache)
+
+def scan_record(path, channels="RGB", bits=1, cache=None):
+    """Analyse one image for the batch report.
+
+    Returns (cache key or None, record, newly analysed). A hit in cache (a
+    ResultCache) skips the analysis entirely; the record's path is always
+    the one scanned.
     """
+    start = time.perf_counter()
+    record = {"path": path}
+    key = None
     try:
-        secret = lsb.reveal(path)
-        if secret:
-            return True, secret
-        return False, None
-    except Exception:
-        return False, None
+        record["sha256"] = _sha256(path)
+        key = cache_key(record["sha256"], channels, bits)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            cached.update(path=path, cached=True,
+                          elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+            return key, cached, False
 
-# -----------------------------
-# Main analyze function
-# -----------------------------
-def analyze(path, verbose=True):
-    img = Image.open(path)
-    mode = img.mode
-    if mode not in ("RGB", "L"):
-        img = img.convert("RGB")
-    arr = np.array(img)
-    counts = lsb_counts(arr)
-
-    results = []
-    if isinstance(counts[0], np.integer) if hasattr(counts[0], "dtype") else False:
-        chi2v, pval = chi2_stat(counts)
-        results.append(("L", counts, chi2v, pval))
+        results, estimators, (steg_detected, finding), image = analyze(
+            path, verbose=False, channels=channels, bits=bits)
+        record.update(image)
+        pval_all = results[-1][3]
+        combined = estimators["combined"]
+        record.update(
+            verdict=verdict(pval_all, combined["score"], steg_detected),
+            score=round(combined["score"], 6),
+            payload=combined["payload"],
+            estimates=combined["estimates"],
+            chi2_p=pval_all,
+            lsb_finding=finding,
+        )
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["cached"] = False
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return (None if "error" in record else key), record, True
+
+def rank_records(records):
+    """LSB payload finds first, then by combined score, highest first; failures last"""
+    return sorted(records, key=lambda r: (
+        "error" not in r, r.get("verdict") == "detection_lsb", r.get("score", 0.0)), reverse=True)
+
+def write_report(records, out, fmt="ndjson"):
+    """Write ranked records as NDJSON or CSV"""
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for rank, record in enumerate(records, 1):
+            row = dict(record, rank=rank)
+            for name in ("rs", "spa", "ws"):
+                row[name] = record.get("estimates", {}).get(name)
+            finding = record.get("lsb_finding")
+            row["lsb_finding"] = f"{finding['kind']}: {finding['detail']}" if finding else ""
+            writer.writerow(row)
     else:
-        channel_names = ["R","G","B"]
-        for chname, c in zip(channel_names, counts):
-            chi2v, pval = chi2_stat(c)
-            results.append((chname, c, chi2v, pval))
-        flat = sum(counts)
-        chi2v_all, pval_all = chi2_stat(flat)
-        results.append(("ALL", flat, chi2v_all, pval_all))
-
-    # RS analysis
-    reg, sing = rs_analysis(arr)
-
-    # Stegano-tools check
-    steg_detected, secret = stegano_detect(path)
-
-    if verbose:
-        print(f"File: {path}")
-        print(f"Image mode: {mode}, shape: {arr.shape}")
-        for ch, c, chi2v, pval in results:
-            n0, n1 = int(c[0]), int(c[1])
-            total = n0 + n1
-            print(f"Channel {ch}: n0={n0} n1={n1} total={total} chi2={chi2v:.4f} p={pval:.4e}")
-
-        # Decision
-        if steg_detected:
-            print("\n=> DETECTION (stegano-tools): hidden data detected")
-            print(f"Extracted (partial) secret: {secret[:50]}...")
-        elif pval_all < 0.01 or reg != sing:
-            print("\n=> DETECTION: likely hidden data (statistical)")
-        elif pval_all < 0.10:
-            print("\n=> SUSPICIOUS: possible hidden data")
-        else:
-            print("\n=> CLEAN")
+        for rank, record in enumerate(records, 1):
+            out.write(json.dumps(dict(record, rank=rank)) + "\n")
+
+def _new_pool(jobs, cache_path):
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(cache_path,))
 
-        print(f"RS analysis: Regular={reg}, Singular={sing}")
+def run_batch(inputs, output=None, fmt=None, jobs=None, channels="RGB", bits=1,
+              cache_path=DEFAULT_CACHE_PATH):
+    """Scan every image under inputs on a process pool and write a ranked report.
 
-    return results, (reg, sing), (steg_detected, secret)
+    A worker that dies (e.g. a decoder crash) breaks the whole pool. The pool
+    is then rebuilt and the images that were in flight are scanned again one
+    at a time, so only the one that kills a worker is recorded as failed.
+    Returns stats counting analysed, cached and failed images, and verdicts.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    fmt = fmt or ("csv" if output and output.lower().endswith(".csv") else "ndjson")
+    cache = ResultCache(cache_path) if cache_path else None
+    worker_cache_path = cache_path if cache else None
+    stats = {"analysed": 0, "cached": 0, "failed": 0}
+    records, fresh = [], []
+    pending = {}
+    pool = _new_pool(jobs, worker_cache_path)
+
+    def finish(key, record, analysed):
+        records.append(record)
+        if "error" in record:
+            stats["failed"] += 1
+            return
+        stats["analysed" if analysed else "cached"] += 1
+        stats[record["verdict"]] = stats.get(record["verdict"], 0) + 1
+        if analysed and cache and key:
+            fresh.append((key, dict(record, cached=False)))
+        if cache and len(fresh) >= CACHE_BATCH_SIZE:
+            cache.put_many(fresh)
+            fresh.clear()
+
+    def failed(path, error):
+        return None, {"path": path, "error": f"{type(error).__name__}: {error}"}, True
+
+    def recover(extra=()):
+        # Every job in flight fails with the broken pool; rerun each alone
+        nonlocal pool
+        suspects = list(pending.values()) + list(extra)
+        pending.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = _new_pool(jobs, worker_cache_path)
+        for path in suspects:
+            try:
+                result = pool.submit(_scan_in_worker, path, channels, bits).result()
+            except BrokenProcessPool as e:
+                pool.shutdown(wait=False)
+                pool = _new_pool(jobs, worker_cache_path)
+                result = failed(path, e)
+            except Exception as e:
+                result = failed(path, e)
+            finish(*result)
+
+    def drain():
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        broken = []
+        for future in done:
+            path = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken.append(path)
+                continue
+            except Exception as e:
+                result = failed(path, e)
+            finish(*result)
+        if broken:
+            recover(broken)
+
+    try:
+        for path in iter_images(inputs):
+            try:
+                pending[pool.submit(_scan_in_worker, path, channels, bits)] = path
+            except BrokenProcessPool:
+                recover([path])
+                continue
+            if len(pending) >= jobs * QUEUE_FACTOR:
+                drain()
+        while pending:
+            drain()
+    finally:
+        pool.shutdown(cancel_futures=True)
+        # Results already scanned are kept even if the run is interrupted
+        if cache:
+            cache.put_many(fresh)
+
+    ranked = rank_records(records)
+    if output:
+        with open(output, "w", encoding="utf-8", newline="") as out:
+            write_report(ranked, out, fmt)
+    else:
+        write_report(ranked, sys.stdout, fmt)
+    return stats
 
 # -----------------------------
 # CLI
 # -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="LSB steganalysis: chi-square, RS, SPA and WS estimators and an LSB payload scan")
+    parser.add_argument("inputs", nargs="+", help="Image files, folders or glob patterns")
+    parser.add_argument("--output", "-o", help="Write the ranked batch report here (.ndjson or .csv)")
+    parser.add_argument("--format", choices=REPORT_FORMATS,
+                        help="Report format (default: from the output suffix, else ndjson)")
+    parser.add_argument("--jobs", "-j", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Result cache database")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--channels", default="RGB", help="Channels for the LSB payload scan")
+    parser.add_argument("--bits", type=int, default=1, choices=range(1, 9), metavar="{1-8}",
+                        help="Low bits per channel for the LSB payload scan")
+    args = parser.parse_args(argv)
+
+    # A single plain image keeps the original detailed output
+    single = (len(args.inputs) == 1 and not _is_glob(args.inputs[0])
+              and not os.path.isdir(args.inputs[0]) and not args.output and not args.format)
+    if single:
+        analyze(args.inputs[0], channels=args.channels, bits=args.bits)
+        return 0
+
+    start = time.perf_counter()
+    stats = run_batch(args.inputs, args.output, args.format, args.jobs, args.channels, args.bits,
+                      None if args.no_cache else args.cache)
+    summary = ", ".join(f"{value} {name}" for name, value in stats.items())
+    print(f"Scanned in {time.perf_counter() - start:.1f}s: {summary}", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python stegscan.py <image.png>")
-        sys.exit(1)
-    analyze(sys.argv[1])
+    sys.exit(main())
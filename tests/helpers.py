@@ -0,0 +1,46 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from src.utils.logger import SecureLogger
+
+
+def temp_logger(root: Path) -> SecureLogger:
+    """A SecureLogger that writes under root instead of ./logs"""
+    return SecureLogger(log_dir=root / "logs", db_path=root / "logs" / "operations.db")
+
+
+def noise_image(path: Path, size=(64, 48), mode="RGB", seed=0) -> Path:
+    """Write a random image; different seeds give different pixels"""
+    rng = np.random.default_rng(seed)
+    channels = len(mode)
+    shape = (size[1], size[0], channels) if channels > 1 else (size[1], size[0])
+    Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8), mode).save(path)
+    return path
+
+
+def smooth_image(path: Path, size=(256, 192), seed=0) -> Path:
+    """Write a photo-like RGB image: a smooth field with slight sensor noise.
+
+    The LSB estimators read pure noise as embedded, so covers for
+    steganalysis tests use this instead of noise_image.
+    """
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(40, 216, (size[1] // 16 + 1, size[0] // 16 + 1, 3), dtype=np.uint8)
+    field = np.asarray(Image.fromarray(coarse).resize(size, Image.BICUBIC), dtype=np.float64)
+    pixels = np.clip(field + rng.normal(0, 2, field.shape), 0, 255).round().astype(np.uint8)
+    Image.fromarray(pixels, "RGB").save(path)
+    return path
+
+
+class TempDirMixin:
+    """Gives each test its own directory in self.root"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
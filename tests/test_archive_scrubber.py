@@ -0,0 +1,110 @@
+import io
+import tarfile
+import unittest
+import zipfile
+
+from PIL import Image
+
+from src.core.archive_scrubber import PY7ZR_AVAILABLE
+from src.core.probes import probe
+from src.core.scrubber import UniversalScrubber
+from tests.helpers import TempDirMixin, temp_logger
+
+if PY7ZR_AVAILABLE:
+    import py7zr
+    from py7zr.io import BytesIOFactory
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def make_tgz(path, members):
+    with tarfile.open(path, 'w:gz') as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1700000000
+            info.uname = "alice"
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+class ArchiveFailureTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+
+    def test_clean_archive_is_rewritten(self):
+        src = make_tgz(self.root / "a.tar.gz", {"notes.txt": b"hello"})
+        out = self.root / "out.tar.gz"
+        self.assertTrue(self.scrubber.scrub_file(src, out))
+        with tarfile.open(out) as tf:
+            member = tf.getmember("notes.txt")
+            self.assertEqual((member.mtime, member.uname), (0, ""))
+            self.assertEqual(tf.extractfile(member).read(), b"hello")
+
+    def test_budget_overrun_fails_without_output(self):
+        self.scrubber.archives.max_total_bytes = 1000
+        src = make_tgz(self.root / "a.tar.gz", {"a.txt": b"x" * 600, "b.txt": b"y" * 600})
+        out = self.root / "out.tar.gz"
+        self.assertFalse(self.scrubber.scrub_file(src, out))
+        self.assertFalse(out.exists())
+        with self.assertRaises(ValueError):
+            self.scrubber.scrub_bytes(src.read_bytes(), "a.tar.gz")
+
+    def test_unscrubbable_member_fails_the_archive(self):
+        src = make_zip(self.root / "a.zip", {"photo.png": b"\x89PNG\r\n\x1a\n not an image"})
+        out = self.root / "out.zip"
+        self.assertFalse(self.scrubber.scrub_file(src, out))
+        self.assertFalse(out.exists())
+
+    def test_excess_nesting_fails_the_archive(self):
+        self.scrubber.archives.max_depth = 0
+        inner = make_zip(self.root / "inner.zip", {"a.txt": b"hi"})
+        src = make_zip(self.root / "outer.zip", {"inner.zip": inner.read_bytes()})
+        dst = io.BytesIO()
+        with self.assertRaises(ValueError):
+            self.scrubber.scrub_stream(io.BytesIO(src.read_bytes()), dst, "outer.zip")
+        self.assertEqual(dst.getvalue(), b"")
+
+    @unittest.skipUnless(PY7ZR_AVAILABLE, "py7zr not installed")
+    def test_7z_members_are_scrubbed(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'SecretCam'  # Make
+        photo = self.root / "photo.jpg"
+        Image.new("RGB", (32, 32)).save(photo, exif=exif)
+        src = self.root / "a.7z"
+        with py7zr.SevenZipFile(src, 'w') as zf:
+            zf.write(photo, "photo.jpg")
+            zf.writestr(b"hello", "notes.txt")
+            zf.writestr(b"", "empty.txt")
+        out = self.root / "out.7z"
+        self.assertTrue(self.scrubber.scrub_file(src, out))
+        factory = BytesIOFactory(1024 * 1024)
+        with py7zr.SevenZipFile(out) as zf:
+            self.assertEqual(sorted(zf.getnames()), ["empty.txt", "notes.txt", "photo.jpg"])
+            zf.extractall(factory=factory)
+        self.assertEqual(factory.get("notes.txt").read(), b"hello")
+        self.assertNotIn(b"SecretCam", factory.get("photo.jpg").read())
+
+
+class OfficeScrubTest(TempDirMixin, unittest.TestCase):
+    def test_every_part_the_probe_reports_is_removed(self):
+        src = make_zip(self.root / "a.docx", {
+            "word/document.xml": b"<w:document/>",
+            "docProps/core.xml": b"<dc:creator>Alice</dc:creator>",
+            "meta.xml": b"<meta:initial-creator>Alice</meta:initial-creator>",
+        })
+        self.assertEqual(sorted(probe(src)), ["Office:docProps/core.xml", "Office:meta.xml"])
+        scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        out = self.root / "out.docx"
+        self.assertTrue(scrubber.scrub_file(src, out))
+        self.assertEqual(probe(out), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
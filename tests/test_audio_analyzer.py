@@ -0,0 +1,112 @@
+import unittest
+import wave
+
+import numpy as np
+
+from src.core.audio_analyzer import analyze_audio
+from tests.helpers import TempDirMixin
+
+RATE = 44100
+SECONDS = 2
+
+
+def pink_noise(rng, dbfs):
+    spectrum = np.fft.rfft(rng.normal(size=RATE * SECONDS))
+    spectrum /= np.sqrt(np.maximum(np.arange(spectrum.size), 1))
+    return _level(np.fft.irfft(spectrum, RATE * SECONDS), dbfs)
+
+
+def lowpass_noise(rng, cutoff, dbfs):
+    spectrum = np.fft.rfft(rng.normal(size=RATE * SECONDS))
+    spectrum[np.fft.rfftfreq(RATE * SECONDS, 1 / RATE) > cutoff] = 0
+    return _level(np.fft.irfft(spectrum, RATE * SECONDS), dbfs)
+
+
+def voiced(f0, dbfs, width=300.0, vibrato=0.02):
+    """Harmonics of f0 shaped by three formants, like a sustained vowel"""
+    t = np.arange(RATE * SECONDS) / RATE
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + vibrato * np.sin(2 * np.pi * 5 * t))) / RATE
+    signal = np.zeros(t.size)
+    for k in range(1, int(RATE / 2 / f0 / 1.2)):
+        gain = sum(np.exp(-0.5 * ((k * f0 - formant) / width) ** 2) for formant in (700, 1200, 2600))
+        signal += (gain + 0.05) / k * np.sin(k * phase)
+    return _level(signal, dbfs)
+
+
+def _level(signal, dbfs):
+    return signal / np.sqrt(np.mean(signal ** 2)) * 10 ** (dbfs / 20)
+
+
+def pcm16(signal):
+    return np.clip(np.round(signal * 32767), -32768, 32767).astype(np.int32)
+
+
+def embed_lsbs(samples, rng):
+    return (samples & ~1) | rng.integers(0, 2, samples.size)
+
+
+def add_echo(signal, delay_ms, gain=0.3):
+    delay = int(RATE * delay_ms / 1000)
+    echoed = signal.copy()
+    echoed[delay:] += gain * signal[:-delay]
+    return echoed
+
+
+def phase_code(signal, rng, segment=2048, bits=128):
+    coded = signal.copy()
+    spectrum = np.fft.rfft(coded[:segment])
+    message = rng.integers(0, 2, bits)
+    spectrum[1:bits + 1] = np.abs(spectrum[1:bits + 1]) * np.exp(1j * np.where(message, np.pi / 2, -np.pi / 2))
+    coded[:segment] = np.fft.irfft(spectrum, segment)
+    return coded
+
+
+class AudioFindingsTest(TempDirMixin, unittest.TestCase):
+    def analyze(self, samples):
+        path = self.root / "clip.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(RATE)
+            wav.writeframes(samples.astype("<i2").tobytes())
+        report = analyze_audio(path)
+        self.assertIsNone(report.error)
+        return report
+
+    # Clean signals that used to read as covert channels
+    def test_pink_noise_is_not_lsb_embedding(self):
+        report = self.analyze(pcm16(pink_noise(np.random.default_rng(0), -10)))
+        self.assertFalse(report.lsb['measurable'])
+        self.assertEqual(report.findings, [])
+
+    def test_voiced_harmonics_have_no_echo_or_phase_coding(self):
+        for f0, width, vibrato in [(120, 300.0, 0.02), (150, 150.0, 0.0), (200, 300.0, 0.02)]:
+            report = self.analyze(pcm16(voiced(f0, -20, width, vibrato)))
+            self.assertEqual(report.findings, [], f0)
+            self.assertLess(report.echo['z'], 6.0, f0)
+
+    def test_lowpass_noise_is_not_phase_coded(self):
+        for seed in range(3):
+            report = self.analyze(pcm16(lowpass_noise(np.random.default_rng(seed), 4000, -20)))
+            self.assertEqual(report.findings, [], seed)
+
+    # The signatures are still found
+    def test_lsb_embedding_is_found_in_a_quiet_voice(self):
+        samples = embed_lsbs(pcm16(voiced(150, -45)), np.random.default_rng(1))
+        report = self.analyze(samples)
+        self.assertTrue(report.lsb['measurable'])
+        self.assertTrue(any(finding.startswith("LSB embedding") for finding in report.findings))
+
+    def test_echo_is_found_at_its_delay(self):
+        report = self.analyze(pcm16(add_echo(pink_noise(np.random.default_rng(2), -20), 1.0)))
+        self.assertIn("echo at 1.00 ms", report.findings)
+
+    def test_phase_coding_is_found(self):
+        rng = np.random.default_rng(3)
+        for signal in (lowpass_noise(rng, 4000, -20), voiced(150, -20)):
+            report = self.analyze(pcm16(phase_code(signal, rng)))
+            self.assertIn("phase-coded opening segment", report.findings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import struct
+import unittest
+
+from src.core.audit import HEAD_BYTES, audit_file
+from tests.helpers import TempDirMixin
+
+
+def tiff_with_trailing_ifd(make: bytes, pixel_bytes: int) -> bytes:
+    """Little-endian TIFF whose IFD0 follows pixel_bytes of image data"""
+    ifd_offset = 8 + pixel_bytes
+    value_offset = ifd_offset + 2 + 2 * 12 + 4
+    entries = [
+        struct.pack('<HHII', 0x0100, 4, 1, 1),                              # ImageWidth
+        struct.pack('<HHII', 0x010F, 2, len(make) + 1, value_offset),       # Make
+    ]
+    return (b'II*\x00' + struct.pack('<I', ifd_offset) + b'\x00' * pixel_bytes +
+            struct.pack('<H', len(entries)) + b''.join(entries) + b'\x00' * 4 + make + b'\x00')
+
+
+class TiffAuditTest(TempDirMixin, unittest.TestCase):
+    def test_ifd_after_the_head_is_found(self):
+        path = self.root / "late.tif"
+        path.write_bytes(tiff_with_trailing_ifd(b'ExampleCam', HEAD_BYTES * 2))
+        result = audit_file(str(path))
+        self.assertTrue(result.has_metadata)
+        self.assertIn('device', result.kinds)
+
+    def test_unreachable_ifd_is_unchecked_not_clean(self):
+        data = tiff_with_trailing_ifd(b'ExampleCam', HEAD_BYTES * 2)
+        path = self.root / "truncated.tif"
+        path.write_bytes(data[:HEAD_BYTES + 100])
+        result = audit_file(str(path))
+        self.assertIsNone(result.has_metadata)
+        self.assertIsNone(result.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+from src.core import bulk_analysis
+from tests.helpers import TempDirMixin, noise_image
+
+_analyze_record = bulk_analysis.analyze_record
+
+
+def crashing_record(path, depth):
+    # Stands in for a parser that takes the whole worker process down
+    if path.endswith("crash.png"):
+        os._exit(1)
+    return _analyze_record(path, depth)
+
+
+class BulkAnalysisTest(TempDirMixin, unittest.TestCase):
+    def test_worker_crash_fails_only_its_file(self):
+        folder = self.root / "files"
+        folder.mkdir()
+        for i in range(6):
+            noise_image(folder / f"img{i}.png", seed=i)
+        noise_image(folder / "crash.png")
+        output = self.root / "out.ndjson"
+        with mock.patch.object(bulk_analysis, "analyze_record", crashing_record):
+            stats = bulk_analysis.run_bulk([str(folder)], output, jobs=2)
+
+        self.assertEqual((stats['analysed'], stats['failed']), (6, 1))
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        failed = [os.path.basename(record['path']) for record in records if 'error' in record]
+        self.assertEqual(failed, ["crash.png"])
+
+    def test_resume_skips_completed_files(self):
+        noise_image(self.root / "a.png")
+        output = self.root / "out.ndjson"
+        bulk_analysis.run_bulk([str(self.root / "a.png")], output, jobs=1)
+        noise_image(self.root / "b.png", seed=1)
+        stats = bulk_analysis.run_bulk([str(self.root / "a.png"), str(self.root / "b.png")],
+                                       output, jobs=1, resume=True)
+        self.assertEqual((stats['analysed'], stats['skipped']), (1, 1))
+        self.assertEqual(len(output.read_text().splitlines()), 2)
@@ -0,0 +1,106 @@
+import email
+import io
+import unittest
+from email.message import EmailMessage
+from email.policy import compat32
+
+from PIL import Image
+
+from src.core.scrubber import UniversalScrubber
+from tests.helpers import TempDirMixin, temp_logger
+
+
+def png_bytes(size) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 10, 10)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def truncated_jpeg() -> bytes:
+    """A JPEG whose EXIF parses but whose pixel data is cut short"""
+    exif = Image.Exif()
+    exif[0x010F] = 'SecretCam'  # Make
+    exif[0x013B] = 'Alice'  # Artist
+    buf = io.BytesIO()
+    Image.effect_noise((64, 64), 50).convert('RGB').save(buf, 'JPEG', exif=exif)
+    return buf.getvalue()[:-400]
+
+
+def make_message() -> bytes:
+    msg = EmailMessage()
+    msg['From'] = 'alice@example.com'
+    msg['To'] = 'bob@example.com'
+    msg['Subject'] = 'photos'
+    msg['Received'] = 'from laptop.alice.lan (10.0.0.7) by mx.example.com'
+    msg['X-Originating-IP'] = '[10.0.0.7]'
+    msg['X-Mailer'] = 'AliceMail 1.0'
+    msg['Message-ID'] = '<1234@laptop.alice.lan>'
+    msg.set_content('see attached')
+    msg.add_attachment(png_bytes((10, 10)), maintype='image', subtype='png', filename='small.png')
+    msg.add_attachment(png_bytes((200, 200)), maintype='image', subtype='png', filename='large.png')
+    return msg.as_bytes()
+
+
+class EmailFailureTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        # large.png declares more pixels than this budget allows
+        self.scrubber.budget.max_pixels = 1000
+
+    def parts(self, data: bytes):
+        msg = email.message_from_bytes(data, policy=compat32)
+        return msg, {part.get_filename(): part for part in msg.walk() if part.get_filename()}
+
+    def assert_sanitised(self, msg):
+        for header in ('Received', 'X-Originating-IP', 'X-Mailer'):
+            self.assertIsNone(msg[header], header)
+        self.assertEqual(msg['Message-ID'], '<1234@localhost>')
+
+    def test_rejected_attachment_is_replaced_and_headers_stripped(self):
+        src = self.root / "mail.eml"
+        src.write_bytes(make_message())
+        out = self.root / "out.eml"
+        self.assertTrue(self.scrubber.scrub_file(src, out))
+
+        msg, attachments = self.parts(out.read_bytes())
+        self.assert_sanitised(msg)
+        self.assertEqual(list(attachments), ['small.png'])
+        self.assertEqual(attachments['small.png'].get_payload(decode=True), png_bytes((10, 10)))
+        notices = [part.get_payload() for part in msg.walk() if 'was removed' in str(part.get_payload())]
+        self.assertEqual(len(notices), 1)
+        self.assertIn('large.png', notices[0])
+
+    def test_failed_handler_replaces_the_attachment(self):
+        msg = EmailMessage()
+        msg['From'] = 'alice@example.com'
+        msg.set_content('see attached')
+        msg.add_attachment(truncated_jpeg(), maintype='image', subtype='jpeg', filename='broken.jpg')
+        src = self.root / "mail.eml"
+        src.write_bytes(msg.as_bytes())
+        out = self.root / "out.eml"
+        # Within the default budget, so the JPEG handler itself fails
+        scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        self.assertTrue(scrubber.scrub_file(src, out))
+
+        data = out.read_bytes()
+        self.assertNotIn(b'SecretCam', data)
+        msg, attachments = self.parts(data)
+        self.assertEqual(attachments, {})
+        self.assertTrue(any('broken.jpg was removed' in str(part.get_payload()) for part in msg.walk()))
+
+    def test_mbox_messages_are_sanitised_despite_failures(self):
+        message = make_message()
+        src = self.root / "box.mbox"
+        src.write_bytes(b"From alice@example.com Mon Jan  1 00:00:00 2024\n" + message + b"\n" +
+                        b"From alice@example.com Mon Jan  1 00:00:00 2024\n" + message + b"\n")
+        out = self.root / "out.mbox"
+        self.assertTrue(self.scrubber.scrub_file(src, out))
+        data = out.read_bytes()
+        self.assertNotIn(b'10.0.0.7', data)
+        self.assertNotIn(b'AliceMail', data)
+        self.assertEqual(data.count(b'was removed'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import sqlite3
+import unittest
+
+from PIL import Image
+
+from src.core.inventory import DEFAULT_INVENTORY_PATH, MetadataInventory
+from src.utils.config import Config
+from tests.helpers import TempDirMixin
+
+
+def tagged_jpeg(path, make, artist=None):
+    exif = Image.Exif()
+    exif[0x010F] = make  # Make
+    if artist:
+        exif[0x013B] = artist  # Artist
+    Image.new("RGB", (16, 16)).save(path, exif=exif)
+    return path
+
+
+class InventoryTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.share = self.root / "share"
+        self.share.mkdir()
+        self.first = tagged_jpeg(self.share / "a.jpg", "SecretCam", "Alice Example")
+        self.second = tagged_jpeg(self.share / "b.jpg", "OtherCam")
+        self.inventory = MetadataInventory(self.root / "inventory.db")
+        self.stats = self.inventory.index([self.share], jobs=1)
+
+    def assert_full_text_in_sync(self):
+        # Raises when the FTS5 index and the fields table disagree
+        conn = sqlite3.connect(self.inventory.db_path)
+        try:
+            conn.execute("INSERT INTO fields_fts(fields_fts, rank) VALUES('integrity-check', 1)")
+        finally:
+            conn.close()
+
+    def paths(self, query, **options):
+        return sorted(result['path'] for result in self.inventory.search(query, **options))
+
+    def test_index_and_search(self):
+        self.assertEqual((self.stats['indexed'], self.stats['failed']), (2, 0))
+        self.assertEqual(self.paths("secretcam"), [str(self.first)])
+        # Words match as prefixes, in field names as well as values
+        self.assertEqual(self.paths("Secret"), [str(self.first)])
+        self.assertEqual(self.paths("artist alice"), [str(self.first)])
+        self.assertEqual(self.paths("make"), [str(self.first), str(self.second)])
+        self.assertEqual(self.paths("make", min_risk=10), [str(self.first)])
+        self.assertEqual(self.inventory.search("  "), [])
+
+    def test_reindex_skips_unchanged_and_replaces_changed_files(self):
+        self.assertEqual(self.inventory.index([self.share], jobs=1)['unchanged'], 2)
+
+        tagged_jpeg(self.first, "NewerCamera")
+        stats = self.inventory.index([self.share], jobs=1)
+        self.assertEqual((stats['indexed'], stats['unchanged']), (1, 1))
+        # The delete trigger removed the old values from the full-text index
+        self.assertEqual(self.paths("secretcam"), [])
+        self.assertEqual(self.paths("newercamera"), [str(self.first)])
+        self.assert_full_text_in_sync()
+
+    def test_prune_removes_deleted_files(self):
+        fields = self.inventory.get_stats()['fields']
+        self.second.unlink()
+        self.assertEqual(self.inventory.index([self.share], jobs=1)['removed'], 1)
+        self.assertEqual(self.paths("othercam"), [])
+        stats = self.inventory.get_stats()
+        self.assertEqual(stats['files'], 1)
+        self.assertLess(stats['fields'], fields)
+        self.assert_full_text_in_sync()
+
+    def test_from_config_uses_inventory_db(self):
+        config = Config(self.root / "config.json")
+        config.config["inventory_db"] = str(self.root / "configured.db")
+        self.assertEqual(MetadataInventory.from_config(config).db_path, self.root / "configured.db")
+        config.config["inventory_db"] = ""
+        self.assertEqual(str(MetadataInventory.from_config(config).db_path), DEFAULT_INVENTORY_PATH)
@@ -0,0 +1,56 @@
+import io
+import tarfile
+import unittest
+
+from src.core.archive_scrubber import PY7ZR_AVAILABLE
+from src.core.preflight import PreflightBudget, preflight
+from tests.helpers import TempDirMixin
+
+if PY7ZR_AVAILABLE:
+    import py7zr
+
+
+def make_tar(path, sizes, mode='w'):
+    with tarfile.open(path, mode) as tf:
+        for i, size in enumerate(sizes):
+            info = tarfile.TarInfo(f"f{i}.txt")
+            info.size = size
+            tf.addfile(info, io.BytesIO(bytes(size)))
+    return path
+
+
+class ArchivePreflightTest(TempDirMixin, unittest.TestCase):
+    def test_tar_members_are_counted(self):
+        src = make_tar(self.root / "a.tar", [10] * 30)
+        report = preflight(src)
+        self.assertEqual((report.format, report.verdict), ("tar", "ok"))
+        self.assertEqual(report.declared['archive_uncompressed'], 300)
+        report = preflight(src, budget=PreflightBudget(max_zip_members=20))
+        self.assertTrue(report.rejected)
+        self.assertEqual(report.reasons, ["Tar members 21 exceeds limit 20"])
+
+    def test_compressed_tar_bomb_is_rejected_from_its_headers(self):
+        src = make_tar(self.root / "a.tar.gz", [64 * 1024 * 1024], 'w:gz')
+        report = preflight(src)
+        self.assertEqual(report.format, "tar.gz")
+        self.assertTrue(report.rejected)
+        self.assertIn("Tar compression ratio", report.reasons[0])
+        report = preflight(io.BytesIO(src.read_bytes()), "a.tgz",
+                           PreflightBudget(max_zip_uncompressed=32 * 1024 * 1024, max_zip_ratio=1e9))
+        self.assertTrue(report.rejected)
+        self.assertIn("Tar uncompressed bytes", report.reasons[0])
+
+    @unittest.skipUnless(PY7ZR_AVAILABLE, "py7zr not installed")
+    def test_7z_listing_is_checked(self):
+        src = self.root / "a.7z"
+        with py7zr.SevenZipFile(src, 'w') as zf:
+            zf.writestr(b"hello", "a.txt")
+            zf.writestr(b"world!", "b.txt")
+        report = preflight(src)
+        self.assertEqual(report.declared['archive_members'], 2)
+        self.assertEqual(report.declared['archive_uncompressed'], 11)
+        self.assertTrue(preflight(src, budget=PreflightBudget(max_zip_uncompressed=10)).rejected)
+
+
+if __name__ == "__main__":
+    unittest.main()
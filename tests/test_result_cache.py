@@ -0,0 +1,93 @@
+import json
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.core.scrubber import UniversalScrubber
+from tests.helpers import TempDirMixin, noise_image, temp_logger
+
+
+class ScrubCacheTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.scrubber = UniversalScrubber(logger=temp_logger(self.root),
+                                          cache_dir=self.root / "cache")
+
+    def test_repeat_input_is_a_cache_hit(self):
+        src = noise_image(self.root / "a.png")
+        self.assertTrue(self.scrubber.scrub_file(src, self.root / "out1.png"))
+
+        failing = mock.Mock(side_effect=AssertionError("scrubbed twice"))
+        with mock.patch.dict(self.scrubber.supported_formats, {".png": failing}):
+            self.assertTrue(self.scrubber.scrub_file(src, self.root / "out2.png"))
+        failing.assert_not_called()
+        self.assertEqual((self.root / "out1.png").read_bytes(),
+                         (self.root / "out2.png").read_bytes())
+
+    def test_rewriting_a_served_output_leaves_the_cache_intact(self):
+        first = noise_image(self.root / "a.png", seed=1)
+        second = noise_image(self.root / "b.png", seed=2)
+        self.scrubber.scrub_file(first, self.root / "ref.png")
+        expected = (self.root / "ref.png").read_bytes()
+
+        shared = self.root / "shared.png"
+        self.scrubber.scrub_file(first, shared)          # served from the cache
+        self.scrubber.scrub_file(second, shared)         # rewritten in place
+        self.assertNotEqual(shared.read_bytes(), expected)
+
+        self.scrubber.scrub_file(first, self.root / "again.png")
+        self.assertEqual((self.root / "again.png").read_bytes(), expected)
+
+    def test_construction_touches_no_disk(self):
+        empty = self.root / "empty"
+        empty.mkdir()
+        cwd = os.getcwd()
+        os.chdir(empty)
+        try:
+            UniversalScrubber()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(list(empty.iterdir()), [])
+
+
+class CachedDiffLoggingTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.logger = temp_logger(self.root)
+        self.scrubber = UniversalScrubber(logger=self.logger, cache_dir=self.root / "cache")
+        self.photo = self.root / "photo.jpg"
+        exif = Image.Exif()
+        exif[0x010F] = "ExampleCam"      # Make
+        exif[0x0110] = "Model 1"         # Model
+        Image.new("RGB", (32, 32), (10, 120, 200)).save(self.photo, exif=exif)
+
+    def logged_removed(self, operation):
+        conn = sqlite3.connect(self.logger.db_path)
+        try:
+            rows = conn.execute('SELECT metadata_removed FROM operation_logs WHERE operation = ? '
+                                'ORDER BY id', (operation,)).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows]
+
+    def test_file_cache_hit_logs_the_stored_diff(self):
+        self.scrubber.scrub_file(self.photo, self.root / "a.jpg")
+        self.scrubber.scrub_file(self.photo, self.root / "b.jpg")
+        first, second = self.logged_removed('scrub_file')
+        self.assertIn('EXIF:Make', first)
+        self.assertEqual(first, second)
+
+    def test_bytes_path_logs_the_diff_on_miss_and_hit(self):
+        data = self.photo.read_bytes()
+        self.scrubber.scrub_bytes(data, "photo.jpg")
+        self.scrubber.scrub_bytes(data, "photo.jpg")
+        first, second = self.logged_removed('scrub_bytes')
+        self.assertIn('EXIF:Model', first)
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from src.core.sensitivity import (
+    MAX_SCAN_CHARS, MAX_SCORE, Rule, SensitivityEngine, score_fields
+)
+
+
+class SensitivityRulesTest(unittest.TestCase):
+    def rules(self, fields):
+        return {finding.rule for finding in score_fields(fields).findings}
+
+    def test_name_rules(self):
+        report = score_fields({'EXIF:GPSLatitude': '51.5', 'EXIF:Model': 'X100'})
+        self.assertEqual({f.rule for f in report.findings}, {'gps', 'device_model'})
+        self.assertEqual(report.level, 'high')
+        self.assertEqual(report.high_risk_fields, ['EXIF:GPSLatitude'])
+
+    def test_value_rules(self):
+        self.assertEqual(self.rules({'Comment': 'mail alice@example.com'}), {'email_address'})
+        self.assertEqual(self.rules({'Comment': 'from 10.0.0.7'}), {'ip_address'})
+        self.assertEqual(self.rules({'Path': '/home/alice/report.docx'}), {'user_path'})
+        self.assertEqual(self.rules({'Host': 'build01.corp'}), {'internal_hostname'})
+        self.assertEqual(self.rules({'Comment': 'nothing to see'}), set())
+
+    def test_a_rule_counts_once_per_file(self):
+        fields = {f'EXIF:DateTimeOriginal{i}': '2024:01:01' for i in range(40)}
+        report = score_fields(fields)
+        self.assertEqual(len(report.findings), 40)
+        self.assertEqual((report.score, report.level), (5, 'low'))
+
+    def test_score_is_capped(self):
+        report = score_fields({'GPSPosition': '', 'SerialNumber': '', 'Received': '', 'Author': '',
+                               'Comment': '10.0.0.7 /home/alice'})
+        self.assertEqual(report.score, MAX_SCORE)
+
+    def test_long_values_are_scanned_up_to_the_limit(self):
+        self.assertEqual(self.rules({'XMP': 'x' * 200 + ' 10.0.0.7'}), {'ip_address'})
+        self.assertEqual(self.rules({'XMP': 'x' * MAX_SCAN_CHARS + ' 10.0.0.7'}), set())
+
+    def test_custom_rules_with_only_name_patterns(self):
+        engine = SensitivityEngine([Rule('project', 'custom', 'medium', r'Codename', 'name')])
+        report = engine.scan_fields({'XMP:Codename': 'Bluebird', 'EXIF:GPSLatitude': '1'}, 'a.jpg')
+        self.assertEqual([(f.field, f.rule) for f in report.findings], [('XMP:Codename', 'project')])
+        self.assertEqual((report.name, report.score, report.level), ('a.jpg', 15, 'low'))
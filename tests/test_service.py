@@ -0,0 +1,125 @@
+import os
+import pickle
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.core import service as service_module
+from src.core.preflight import PreflightBudget, PreflightRejected, preflight
+from src.core.scrubber import ScrubFailed, UniversalScrubber
+from src.core.service import ScrubService, _setting
+from src.utils.config import Config
+from tests.helpers import TempDirMixin, noise_image, temp_logger
+
+
+class ServiceConfigTest(TempDirMixin, unittest.TestCase):
+    def config(self, **settings) -> Config:
+        config = Config(self.root / "config.json")
+        config.config.update(settings)
+        return config
+
+    def test_from_config_reads_scrub_preflight_and_steg_keys(self):
+        config = self.config(scrub_isolated=False, scrub_workers=2, scrub_max_pending=3,
+                             scrub_cache_dir=str(self.root / "cache"),
+                             preflight_max_pixels=1234,
+                             steg_stage_enabled=True, steg_policy="sanitise")
+        with mock.patch.dict(os.environ, {"STEG_STAGE": ""}):
+            service = ScrubService.from_config(config)
+        try:
+            status = service.get_status()
+            self.assertEqual((status['max_workers'], status['max_pending']), (2, 3))
+            self.assertEqual(service.budget.max_pixels, 1234)
+            self.assertEqual(service.steg_stage.policy, "sanitise")
+            self.assertEqual(service.scrubber.cache.cache_dir, self.root / "cache")
+        finally:
+            service.shutdown()
+
+    def test_environment_overrides_config(self):
+        config = self.config(scrub_timeout_s=60)
+        with mock.patch.dict(os.environ, {"SCRUB_TIMEOUT": "20"}):
+            self.assertEqual(_setting(config, "scrub_timeout_s", "SCRUB_TIMEOUT", float, 1), 20.0)
+        with mock.patch.dict(os.environ, {"SCRUB_TIMEOUT": ""}):
+            self.assertEqual(_setting(config, "scrub_timeout_s", "SCRUB_TIMEOUT", float, 1), 60)
+
+
+
+class WorkerSetupTest(TempDirMixin, unittest.TestCase):
+    def test_worker_scrubber_uses_the_service_budget(self):
+        budget = PreflightBudget(max_pixels=1234)
+        service_module._init_process_scrubber(budget, None, None)
+        self.assertIs(service_module._process_scrubber.budget, budget)
+
+    def test_scrub_file_reuses_the_callers_preflight_report(self):
+        scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        src = noise_image(self.root / "a.png")
+        report = preflight(src)
+        with mock.patch("src.core.scrubber.preflight") as again:
+            self.assertTrue(scrubber.scrub_file(src, self.root / "out.png", report))
+        again.assert_not_called()
+
+    def test_scrub_file_reuses_the_callers_probe(self):
+        scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        src = noise_image(self.root / "a.png")
+        out = self.root / "out.png"
+        with mock.patch("src.core.scrubber.probe", return_value={}) as probe:
+            self.assertTrue(scrubber.scrub_file(src, out, fields={}))
+        self.assertEqual([call.args[0] for call in probe.call_args_list], [out])
+
+    def test_strict_submit_raises_instead_of_returning_false(self):
+        service = ScrubService(scrubber=UniversalScrubber(logger=temp_logger(self.root), use_cache=False),
+                               max_workers=1)
+        try:
+            missing = self.root / "missing.png"
+            self.assertFalse(service.submit(missing, self.root / "out.png").result())
+            with self.assertRaises(ScrubFailed):
+                service.submit(missing, self.root / "out.png", strict=True).result()
+        finally:
+            service.shutdown()
+
+    def test_scrub_returns_its_metadata_diff(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'SecretCam'  # Make
+        src = self.root / "a.jpg"
+        Image.new("RGB", (32, 32)).save(src, exif=exif)
+        scrubber = UniversalScrubber(logger=temp_logger(self.root), use_cache=False)
+        service = ScrubService(scrubber=scrubber, max_workers=1)
+        process_service = ScrubService(use_processes=True, max_workers=1, cache=None)
+        try:
+            success, diff = service.submit(src, self.root / "out.jpg", return_diff=True).result()
+            self.assertTrue(success)
+            self.assertIn('SecretCam', diff.removed.values())
+            for current in (service, process_service):
+                data, diff = current.submit_bytes(src.read_bytes(), "a.jpg", return_diff=True).result()
+                self.assertNotIn(b'SecretCam', data)
+                self.assertIn('SecretCam', diff.removed.values())
+        finally:
+            service.shutdown()
+            process_service.shutdown()
+
+    def test_preflight_rejection_survives_pickling(self):
+        report = preflight(noise_image(self.root / "a.png", size=(100, 100)),
+                           budget=PreflightBudget(max_pixels=5000))
+        error = pickle.loads(pickle.dumps(PreflightRejected(report)))
+        self.assertEqual(error.report.reasons, report.reasons)
+
+    def test_process_service_scrubs_with_its_budget(self):
+        src = noise_image(self.root / "a.png", size=(100, 100))
+        service = ScrubService(use_processes=True, max_workers=1,
+                               budget=PreflightBudget(max_pixels=5000),
+                               cache=None)
+        try:
+            # With no parent report the job is dispatched, so only the worker can reject it
+            with mock.patch.object(service, "_preflight", return_value=None):
+                future = service.submit(src, self.root / "out.png", strict=True)
+            self.assertIsNone(future.preflight)
+            with self.assertRaises(PreflightRejected) as caught:
+                future.result()
+            self.assertEqual(caught.exception.report.declared['pixels'], 10000)
+            self.assertFalse((self.root / "out.png").exists())
+        finally:
+            service.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
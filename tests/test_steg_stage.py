@@ -0,0 +1,108 @@
+import io
+import os
+import unittest
+from unittest import mock
+
+from stegano import lsb
+
+from src.core.scrubber import UniversalScrubber
+from src.core.steganalysis import (
+    POLICY_PASS, POLICY_QUARANTINE, POLICY_SANITISE, StegDetected, StegStage, parse_policy
+)
+from tests.helpers import TempDirMixin, smooth_image, temp_logger
+
+MESSAGE = "meet at the usual place"
+
+
+class StegStageTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cover = smooth_image(self.root / "cover.png")
+        self.stego = self.root / "stego.png"
+        lsb.hide(str(self.cover), MESSAGE).save(self.stego)
+        self.output = self.root / "out.png"
+
+    def scrubber(self, policy, **stage_options) -> UniversalScrubber:
+        stage = StegStage(policy, quarantine_dir=self.root / "quarantine", **stage_options)
+        return UniversalScrubber(logger=temp_logger(self.root), use_cache=False, steg_stage=stage)
+
+    def quarantined(self):
+        folder = self.root / "quarantine"
+        return sorted(p.name for p in folder.iterdir()) if folder.exists() else []
+
+    def test_quarantine_refuses_a_flagged_image(self):
+        self.assertFalse(self.scrubber(POLICY_QUARANTINE).scrub_file(self.stego, self.output))
+        self.assertFalse(self.output.exists())
+        names = self.quarantined()
+        self.assertEqual(len(names), 2)
+        self.assertTrue(names[0].endswith("stego.png") and names[1].endswith("stego.png.json"))
+
+    def test_strict_scrub_raises_for_a_flagged_image(self):
+        with self.assertRaises(StegDetected) as raised:
+            self.scrubber(POLICY_QUARANTINE).scrub_file(self.stego, self.output, strict=True)
+        self.assertEqual(raised.exception.result.verdict, "detection_lsb")
+        self.assertFalse(self.output.exists())
+
+    def test_clean_image_is_scrubbed(self):
+        self.assertTrue(self.scrubber(POLICY_QUARANTINE).scrub_file(self.cover, self.output))
+        self.assertEqual(self.quarantined(), [])
+
+    def test_sanitise_destroys_the_payload(self):
+        self.assertTrue(self.scrubber(POLICY_SANITISE).scrub_file(self.stego, self.output))
+        try:
+            revealed = lsb.reveal(str(self.output))
+        except Exception:
+            revealed = None
+        self.assertNotEqual(revealed, MESSAGE)
+
+    def test_failed_inspection_is_quarantined(self):
+        scrubber = self.scrubber(POLICY_QUARANTINE)
+        with mock.patch.object(StegStage, "_inspect_image", side_effect=MemoryError):
+            self.assertFalse(scrubber.scrub_file(self.cover, self.output))
+        self.assertFalse(self.output.exists())
+        self.assertEqual(len(self.quarantined()), 2)
+
+    def test_failed_inspection_is_quarantined_under_sanitise(self):
+        scrubber = self.scrubber(POLICY_SANITISE)
+        with mock.patch.object(StegStage, "_inspect_image", side_effect=MemoryError):
+            with self.assertRaises(StegDetected) as raised:
+                scrubber.scrub_bytes(self.cover.read_bytes(), "cover.png")
+        self.assertEqual(raised.exception.result.verdict, "unanalysed")
+
+    def test_failed_sanitise_leaves_no_output(self):
+        scrubber = self.scrubber(POLICY_SANITISE)
+        with mock.patch("src.core.scrubber.randomise_lsbs", side_effect=MemoryError):
+            self.assertFalse(scrubber.scrub_file(self.stego, self.output))
+            self.assertFalse(self.output.exists())
+            with self.assertRaises(MemoryError):
+                scrubber.scrub_stream(io.BytesIO(self.stego.read_bytes()), io.BytesIO(), "stego.png")
+
+    def test_images_over_the_decode_limit_are_not_analysed(self):
+        result = StegStage(POLICY_QUARANTINE, max_decode_pixels=1000).inspect(self.cover)
+        self.assertEqual((result.verdict, result.flagged, result.action),
+                         ("unanalysed", True, POLICY_QUARANTINE))
+        result = StegStage(POLICY_PASS, max_decode_pixels=1000).inspect(self.cover)
+        self.assertFalse(result.flagged)
+
+    def test_decode_limit_fits_the_memory_limit(self):
+        stage = StegStage().within_memory(256)
+        self.assertEqual(stage.max_decode_pixels, 256 * 1024 * 1024 // 2 // 16)
+        self.assertEqual(StegStage().within_memory(1 << 20).max_decode_pixels, StegStage().max_decode_pixels)
+
+
+class StegPolicyTest(unittest.TestCase):
+    def test_policy_values(self):
+        for value, policy in [("1", POLICY_QUARANTINE), ("TRUE", POLICY_QUARANTINE),
+                              ("sanitize", POLICY_SANITISE), ("pass", POLICY_PASS),
+                              ("0", None), ("off", None), (None, None)]:
+            self.assertEqual(parse_policy(value), policy, value)
+
+    def test_unknown_environment_value_warns_instead_of_raising(self):
+        with mock.patch.dict(os.environ, {"STEG_STAGE": "strict"}):
+            with self.assertLogs("CommsShield", "WARNING"):
+                stage = StegStage.from_env()
+        self.assertEqual(stage.policy, POLICY_QUARANTINE)
+
+
+if __name__ == "__main__":
+    unittest.main()
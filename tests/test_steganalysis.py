@@ -0,0 +1,127 @@
+import struct
+import unittest
+import warnings
+
+import numpy as np
+from PIL import Image
+from stegano import lsb
+
+from src.core.steganalysis import analyze, lsb_detect, open_image, scan_lsb_stream
+from tests.helpers import TempDirMixin, smooth_image
+
+
+def embed_rate(cover, path, rate, seed=0):
+    """Randomise the LSBs of a share `rate` of the samples, as full embedding would"""
+    rng = np.random.default_rng(seed)
+    pixels = np.asarray(Image.open(cover)).copy()
+    flat = pixels.reshape(-1)
+    chosen = rng.random(flat.size) < rate
+    flat[chosen] = (flat[chosen] & 0xFE) | rng.integers(0, 2, int(chosen.sum()), dtype=np.uint8)
+    Image.fromarray(pixels, "RGB").save(path)
+    return path
+
+
+def embed_bytes(cover, path, data):
+    """Write data MSB-first into the RGB LSBs in raster order, stegano's layout"""
+    pixels = np.asarray(Image.open(cover)).copy()
+    flat = pixels.reshape(-1)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    flat[:bits.size] = (flat[:bits.size] & 0xFE) | bits
+    Image.fromarray(pixels, "RGB").save(path)
+    return path
+
+
+def estimates(path, **options):
+    _, estimators, _, _ = analyze(path, verbose=False, **options)
+    return estimators
+
+
+class TilingTest(TempDirMixin, unittest.TestCase):
+    def test_estimators_do_not_depend_on_tile_height(self):
+        path = embed_rate(smooth_image(self.root / "cover.png"), self.root / "stego.png", 0.3)
+        reference = estimates(path)
+        for tile_rows in (1, 7, 64, 1000):
+            tiled = estimates(path, tile_rows=tile_rows)
+            for name in ("rs", "spa"):
+                for channel, stats in reference[name].items():
+                    self.assertEqual(list(tiled[name][channel]['counts']), list(stats['counts']),
+                                     (name, channel, tile_rows))
+            for channel, stats in reference['ws'].items():
+                self.assertAlmostEqual(tiled['ws'][channel]['payload'], stats['payload'], places=6)
+            for name, value in reference['combined']['estimates'].items():
+                self.assertAlmostEqual(tiled['combined']['estimates'][name], value, places=6)
+
+    def test_lsb_counts_do_not_depend_on_tile_height(self):
+        path = smooth_image(self.root / "cover.png")
+        reference = analyze(path, verbose=False)[0]
+        for tile_rows in (1, 5, 1000):
+            rows = analyze(path, verbose=False, tile_rows=tile_rows)[0]
+            self.assertEqual([list(row[1]) for row in rows], [list(row[1]) for row in reference])
+
+    def test_images_over_the_pil_limit_are_analysed(self):
+        # Past PIL's default limit, which would raise DecompressionBombError
+        size = (20000, 9000)
+        self.assertGreater(size[0] * size[1], 2 * Image.MAX_IMAGE_PIXELS)
+        path = self.root / "large.png"
+        Image.new("L", size).save(path, compress_level=1)
+        default = Image.MAX_IMAGE_PIXELS
+
+        *_, image = analyze(path, verbose=False, max_pixels=1_000_000)
+        self.assertEqual((image["width"], image["height"]), size)
+        self.assertEqual(Image.MAX_IMAGE_PIXELS, default)
+        with warnings.catch_warnings(), self.assertRaises(Image.DecompressionBombError):
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            open_image(path, max_pixels=100_000_000)
+
+
+class PayloadEstimateTest(TempDirMixin, unittest.TestCase):
+    def test_known_embedding_rates_are_recovered(self):
+        for seed in range(3):
+            cover = smooth_image(self.root / f"cover{seed}.png", seed=seed)
+            for rate in (0.0, 0.25, 0.5):
+                path = embed_rate(cover, self.root / f"stego{seed}_{rate}.png", rate, seed)
+                for name, value in estimates(path)['combined']['estimates'].items():
+                    self.assertAlmostEqual(value, rate, delta=0.1, msg=(name, seed, rate))
+
+    def test_score_rises_with_the_payload(self):
+        cover = smooth_image(self.root / "cover.png")
+        scores = [estimates(embed_rate(cover, self.root / f"stego{rate}.png", rate))['combined']['score']
+                  for rate in (0.0, 0.25, 0.5)]
+        self.assertEqual(scores, sorted(scores))
+        self.assertLess(scores[0], 0.5)
+
+
+class LSBPayloadTest(TempDirMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cover = smooth_image(self.root / "cover.png")
+
+    def detect(self, data):
+        return lsb_detect(embed_bytes(self.cover, self.root / "stego.png", data))
+
+    def test_clean_cover_has_no_finding(self):
+        self.assertEqual(lsb_detect(self.cover), (False, None))
+
+    def test_stegano_prefix(self):
+        stego = self.root / "stegano.png"
+        lsb.hide(str(self.cover), "meet at the usual place").save(stego)
+        detected, finding = lsb_detect(stego)
+        self.assertTrue(detected)
+        self.assertEqual((finding['kind'], finding['preview']), ("stegano", "meet at the usual place"))
+
+    def test_file_header(self):
+        detected, finding = self.detect(b"\x00\x00" + b"PK\x03\x04" + bytes(range(64)))
+        self.assertTrue(detected)
+        self.assertEqual((finding['kind'], finding['offset'], finding['detail']), ("file_header", 2, "zip"))
+
+    def test_length_prefix(self):
+        text = b"the shipment leaves from pier nine on thursday night"
+        for order, endian in ((">I", "big"), ("<I", "little")):
+            detected, finding = self.detect(struct.pack(order, len(text)) + text)
+            self.assertTrue(detected)
+            self.assertEqual(finding['kind'], "length_prefix")
+            self.assertIn(endian, finding['detail'])
+
+    def test_implausible_prefixes_are_ignored(self):
+        self.assertIsNone(scan_lsb_stream(b"99999:" + bytes(64), 100))
+        self.assertIsNone(scan_lsb_stream(struct.pack(">I", 4) + bytes(64), 1000))
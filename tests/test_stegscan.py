@@ -0,0 +1,61 @@
+import json
+import os
+import sqlite3
+import unittest
+from unittest import mock
+
+import stegscan
+from tests.helpers import TempDirMixin, noise_image
+
+
+_scan_record = stegscan.scan_record
+
+
+def crashing_scan_record(path, *args):
+    # Stands in for a decoder that takes the whole worker process down
+    if path.endswith("crash.png"):
+        os._exit(1)
+    return _scan_record(path, *args)
+
+
+class BatchCacheTest(TempDirMixin, unittest.TestCase):
+    def test_record_reports_image_geometry(self):
+        path = noise_image(self.root / "a.png", size=(40, 30), mode="L")
+        key, record, analysed = stegscan.scan_record(str(path))
+        self.assertTrue(analysed)
+        self.assertEqual((record["mode"], record["width"], record["height"]), ("L", 40, 30))
+
+    def test_workers_read_the_cache_without_writing(self):
+        path = noise_image(self.root / "a.png")
+        db_path = str(self.root / "cache.db")
+        writer = stegscan.ResultCache(db_path)
+        key, record, _ = stegscan.scan_record(str(path))
+        writer.put_many([(key, record)])
+
+        reader = stegscan.ResultCache(db_path, readonly=True)
+        _, cached, analysed = stegscan.scan_record(str(path), cache=reader)
+        self.assertFalse(analysed)
+        self.assertTrue(cached["cached"])
+        with self.assertRaises(sqlite3.OperationalError):
+            reader._reader.execute("DELETE FROM results")
+
+    def test_worker_crash_fails_only_its_image(self):
+        for i in range(8):
+            noise_image(self.root / f"img{i}.png", seed=i)
+        noise_image(self.root / "crash.png")
+        report = self.root / "report.ndjson"
+        db_path = str(self.root / "cache.db")
+        # Workers are forked, so they inherit the patch
+        with mock.patch.object(stegscan, "scan_record", crashing_scan_record):
+            stats = stegscan.run_batch([str(self.root)], str(report), jobs=2, cache_path=db_path)
+
+        self.assertEqual((stats["analysed"], stats["failed"]), (8, 1))
+        records = [json.loads(line) for line in report.read_text().splitlines()]
+        failed = [record["path"] for record in records if "error" in record]
+        self.assertEqual([os.path.basename(path) for path in failed], ["crash.png"])
+        rows = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self.assertEqual(rows, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,31 @@ except ImportError:
     METADATA_ANALYZER_AVAILABLE = False
     print("[INFO] Advanced metadata analyzer not available")
 
+try:
+    from src.core.result_cache import ScrubCache
+    SCRUB_CACHE_AVAILABLE = True
+except ImportError:
+    SCRUB_CACHE_AVAILABLE = False
+
+try:
+    from src.core.verifier import verify_scrubbed
+    VERIFIER_AVAILABLE = True
+except ImportError:
+    VERIFIER_AVAILABLE = False
+
+# Part of every result cache key; bump when scrubbing behaviour changes
+SCRUBBER_VERSION = "universal_scrubber/1"
+
+_scrub_cache = None
+
+
+def get_scrub_cache():
+    """Return the shared result cache, creating it on first use."""
+    global _scrub_cache
+    if _scrub_cache is None and SCRUB_CACHE_AVAILABLE:
+        _scrub_cache = ScrubCache()
+    return _scrub_cache
+
 
 def scrub_image(input_path: Path, output_path: Path):
     """Remove EXIF metadata from images."""
@@ -29,11 +54,12 @@ def scrub_image(input_path: Path, output_path: Path):
 
 def scrub_audio_video(input_path: Path, output_path: Path):
     """Remove metadata from audio/video (MP3, MP4, etc.)."""
-    media = MutagenFile(input_path, easy=True)
+    # Strip tags from the copy so the input is never modified in place
+    shutil.copy(input_path, output_path)
+    media = MutagenFile(output_path, easy=True)
     if media:
         media.delete()  # remove tags
         media.save()
-    shutil.copy(input_path, output_path)
 
 
 def scrub_docx_images(docx_path: Path, temp_dir: Path):
@@ -158,8 +184,13 @@ def scrub_generic(input_path: Path, output_path: Path):
     shutil.copy(input_path, output_path)
 
 
-def detect_and_scrub(file_path: Path, output_path: Path = None):
-    """Detect file type and scrub accordingly."""
+def detect_and_scrub(file_path: Path, output_path: Path = None, verify: bool = False, show: bool = False):
+    """Detect file type and scrub accordingly.
+
+    With verify=True the output is checked for residual metadata and the
+    VerificationResult is returned; show=True also prints the full metadata
+    of the output.
+    """
     suffix = file_path.suffix.lower()
 
     if output_path is None:
@@ -169,6 +200,20 @@ def detect_and_scrub(file_path: Path, output_path: Path = None):
 
     output_path.parent.mkdir(exist_ok=True)
 
+    # Repeat inputs cost one hash pass instead of a full scrub
+    cache = get_scrub_cache()
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = cache.key_for_file(file_path, SCRUBBER_VERSION)
+            if cache.fetch(cache_key, output_path):
+                print(f"[INFO] Reused cached scrub result → {output_path}")
+                return verify_output(output_path, verify, show)
+            cache.detach(output_path, file_path)
+        except Exception as e:
+            print(f"[WARN] Scrub cache lookup failed: {e}")
+            cache_key = None
+
     try:
         if suffix in [".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif"]:
             scrub_image(file_path, output_path)
@@ -183,13 +228,27 @@ def detect_and_scrub(file_path: Path, output_path: Path = None):
 
         print(f"[INFO] Scrubbed file saved → {output_path}")
 
-        # Always show metadata AFTER scrubbing
-        show_metadata(output_path)
+        if cache_key:
+            try:
+                cache.store(cache_key, output_path, SCRUBBER_VERSION)
+            except Exception as e:
+                print(f"[WARN] Scrub cache store failed: {e}")
 
     except Exception as e:
         print(f"[ERROR] Failed to scrub {file_path}: {e}")
         scrub_generic(file_path, output_path)
 
+    return verify_output(output_path, verify, show)
+
+
+def verify_output(output_path: Path, verify: bool, show: bool):
+    """Run the opt-in post-scrub checks."""
+    if show:
+        show_metadata(output_path)
+    if verify and VERIFIER_AVAILABLE:
+        return verify_scrubbed(output_path, show=True)
+    return None
+
 
 def show_metadata(file_path: Path):
     """Show metadata using the comprehensive analyzer."""
@@ -203,7 +262,8 @@ def show_metadata(file_path: Path):
 def main():
     parser = argparse.ArgumentParser(description="Universal metadata scrubber")
     parser.add_argument("files", nargs="+", help="Path(s) to file(s)")
-    parser.add_argument("--show", action="store_true", help="Show metadata before scrubbing")
+    parser.add_argument("--show", action="store_true", help="Show metadata before and after scrubbing")
+    parser.add_argument("--verify", action="store_true", help="Check the output for residual metadata")
 
     args = parser.parse_args()
 
@@ -215,8 +275,7 @@ def main():
 
         if args.show:
             show_metadata(path)
-        show_metadata(path)
-        detect_and_scrub(path)
+        detect_and_scrub(path, verify=args.verify, show=args.show)
 
 
 if __name__ == "__main__":
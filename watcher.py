@@ -1,11 +1,14 @@
 # watcher.py - Standalone file watcher functionality
-import shutil
+import os
 from pathlib import Path
 import threading
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from universal_scrubber import detect_and_scrub
+from src.core.processed_index import ProcessedIndex
+from src.core.service import get_scrub_service
+from src.core.probes import probe
+from src.core.sensitivity import score_fields
 
 # Global state
 watch_folder = Path("watch_folder")
@@ -13,6 +16,14 @@ clean_folder = watch_folder / "clean"
 is_watcher_active = False
 file_observer = None
 watcher_logs = []
+processed_index = None
+
+def get_processed_index():
+    """Return the persistent processed-file index, opening it on first use"""
+    global processed_index
+    if processed_index is None:
+        processed_index = ProcessedIndex()
+    return processed_index
 
 def add_watcher_log(message, level="INFO"):
     """Add log entry with timestamp"""
@@ -21,6 +32,31 @@ def add_watcher_log(message, level="INFO"):
     watcher_logs.append(log_entry)
     print(f"WATCHER: {log_entry}")
 
+def assess_sensitivity(file_path):
+    """Risk-score a file's metadata before it is scrubbed and log what it exposed.
+
+    Returns the probed fields, which the scrub reuses instead of probing again.
+    """
+    try:
+        fields = probe(file_path)
+        report = score_fields(fields, file_path.name)
+    except Exception as e:
+        add_watcher_log(f"Sensitivity check failed for {file_path.name}: {str(e)}", "WARNING")
+        return None
+    if report.findings:
+        categories = ", ".join(sorted({finding.category for finding in report.findings}))
+        add_watcher_log(f"Metadata risk {report.level.upper()} (score {report.score}) in {file_path.name}: {categories}",
+                        "WARNING" if report.level == 'high' else "INFO")
+    return fields
+
+def discard_stale_output(output_path):
+    """Remove the cleaned copy of an earlier version after a failed scrub"""
+    try:
+        output_path.unlink()
+        add_watcher_log(f"Removed stale output: {output_path.name}", "WARNING")
+    except FileNotFoundError:
+        pass
+
 class FileWatcher(FileSystemEventHandler):
     def on_created(self, event):
         """Called when a file is created in the watch folder"""
@@ -38,10 +74,19 @@ class FileWatcher(FileSystemEventHandler):
     
     def process_file(self, file_path):
         """Process a file by scrubbing it and saving to clean folder"""
-        if not file_path.exists():
+        try:
+            stat_result = file_path.stat()
+        except FileNotFoundError:
             return
             
         try:
+            # Skip if this exact version was already processed
+            index = get_processed_index()
+            current, content_hash = index.is_current(file_path, stat_result, index.lookup(file_path))
+            if current:
+                add_watcher_log(f"File already processed: {file_path.name}")
+                return
+            
             add_watcher_log(f"Processing file: {file_path.name}")
             
             # Create clean folder if it doesn't exist
@@ -51,29 +96,24 @@ class FileWatcher(FileSystemEventHandler):
             output_filename = f"cleaned_{file_path.name}"
             output_path = clean_folder / output_filename
             
-            # Skip if already processed
-            if output_path.exists():
-                add_watcher_log(f"File already processed: {file_path.name}")
-                return
+            # Record what the original exposed
+            fields = assess_sensitivity(file_path)
             
-            # Use the existing scrub function - handle both function signatures
+            # Scrub on the shared, capacity-limited engine
             try:
-                # Try the new signature with output path
-                detect_and_scrub(file_path, output_path)
-            except TypeError as e:
-                # Fall back to old signature
-                add_watcher_log(f"Using fallback processing for {file_path.name}")
-                detect_and_scrub(file_path)
-                # Move the scrubbed file to clean folder
-                downloads_dir = Path("downloads")
-                scrubbed_file = downloads_dir / f"scrubbed_{file_path.name}"
-                if scrubbed_file.exists():
-                    shutil.move(scrubbed_file, output_path)
+                scrubbed = get_scrub_service().submit(file_path, output_path, fields=fields).result()
+            except Exception:
+                discard_stale_output(output_path)
+                raise
             
-            if output_path.exists():
+            if scrubbed:
+                index.record(file_path, stat_result, content_hash, output_path, 'success')
                 add_watcher_log(f"Successfully cleaned: {file_path.name} -> {output_filename}")
             else:
-                add_watcher_log(f"Warning: Output file not created for {file_path.name}", "WARNING")
+                # Failed, quarantined or rejected; cleaned output of an older version must not stay
+                discard_stale_output(output_path)
+                index.record(file_path, stat_result, content_hash, None, 'error')
+                add_watcher_log(f"Warning: {file_path.name} was not cleaned", "WARNING")
                 
         except Exception as e:
             add_watcher_log(f"Error processing {file_path.name}: {str(e)}", "ERROR")
@@ -166,32 +206,54 @@ def process_existing_files():
         processed_count = 0
         clean_folder.mkdir(exist_ok=True)
         
-        # Process all files in watch folder
-        for file_path in watch_folder.glob('*'):
-            if file_path.is_file():
-                try:
-                    output_filename = f"cleaned_{file_path.name}"
-                    output_path = clean_folder / output_filename
-                    
-                    # Skip if already processed
-                    if output_path.exists():
-                        continue
-                    
-                    # Try new signature first, then fallback
-                    try:
-                        detect_and_scrub(file_path, output_path)
-                    except TypeError:
-                        detect_and_scrub(file_path)
-                        downloads_dir = Path("downloads")
-                        scrubbed_file = downloads_dir / f"scrubbed_{file_path.name}"
-                        if scrubbed_file.exists():
-                            shutil.move(scrubbed_file, output_path)
-                    
-                    processed_count += 1
-                    add_watcher_log(f"Processed existing file: {file_path.name}")
+        # One directory scan plus one batched index lookup
+        with os.scandir(watch_folder) as it:
+            entries = [entry for entry in it if entry.is_file()]
+        index = get_processed_index()
+        known = index.lookup_many(entry.path for entry in entries)
+        
+        # Work out which files are new or changed
+        pending = []
+        for entry in entries:
+            file_path = Path(entry.path)
+            try:
+                stat_result = entry.stat()
+                
+                # Skip if this exact version was already processed
+                current, content_hash = index.is_current(
+                    file_path, stat_result, known.get(index.key(file_path))
+                )
+                if not current:
+                    fields = assess_sensitivity(file_path)
+                    output_path = clean_folder / f"cleaned_{file_path.name}"
+                    pending.append((file_path, output_path, stat_result, content_hash, fields))
                     
-                except Exception as e:
-                    add_watcher_log(f"Failed to process {file_path.name}: {str(e)}", "ERROR")
+            except Exception as e:
+                add_watcher_log(f"Failed to process {file_path.name}: {str(e)}", "ERROR")
+        
+        # Scrub them across the shared engine's pool
+        service = get_scrub_service()
+        jobs = [(item, service.submit(item[0], item[1], fields=item[4])) for item in pending]
+        for (file_path, output_path, stat_result, content_hash, _), future in jobs:
+            try:
+                scrubbed = future.result()
+            except Exception as e:
+                discard_stale_output(output_path)
+                add_watcher_log(f"Failed to process {file_path.name}: {str(e)}", "ERROR")
+                continue
+            
+            try:
+                if not scrubbed:
+                    discard_stale_output(output_path)
+                status = 'success' if scrubbed else 'error'
+                index.record(file_path, stat_result, content_hash,
+                             output_path if scrubbed else None, status)
+                
+                processed_count += 1
+                add_watcher_log(f"Processed existing file: {file_path.name}")
+                
+            except Exception as e:
+                add_watcher_log(f"Failed to process {file_path.name}: {str(e)}", "ERROR")
         
         add_watcher_log(f"Processed {processed_count} existing files")
         return {